@@ -0,0 +1,258 @@
+# 🗂️ Batch runner: de zaterdag-simulatie voor veel portfolio's, zonder Streamlit
+#
+# Leest een bestand met portfolio's (JSON of CSV) en boostwaarden, en draait elk
+# portfolio in een procespool met dezelfde logica als de pagina
+# (`compute_saturday_aggregates` + `simulate_from_aggregates`, oftewel
+# `simulate_conversion_boost_on_saturdays` met de aggregaten één keer per portfolio).
+#
+# Gedeelde fetch-cache: de parent haalt eerst elke unieke winkel precies één keer op
+# (cache → lokale historie → API) en schrijft die naar de Parquet-historie. Workers
+# lezen daarna alleen van schijf, dus overlappende portfolio's kosten geen extra
+# requests. Zonder --api-url draait alles op de lokale historie.
+#
+# Portfoliobestand:
+#   JSON: [{"name": "Klant A", "shop_ids": [26304, 26560], "boost_values": [0.5, 1]}, ...]
+#         of {"boost_values": [...], "portfolios": [...]}; boost_values per portfolio is optioneel
+#   CSV:  kolommen portfolio,shop_id (één regel per winkel)
+#
+# Gebruik:
+#   python batch_runner.py portfolios.json --api-url http://127.0.0.1:8765/get-report --boost 0.5 1 2 -o results.parquet
+#   python batch_runner.py portfolios.csv --history-dir .kpi_history -o results.csv     # alleen lokale data
+#   ... --intervals --seed 7        # + bootstrap-intervallen per winkel en per portfolio
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from roi_core import SETTING_DEFAULTS, get_kpi_data_for_stores, load_settings
+
+LOGGER = logging.getLogger("roi.batch")
+DEFAULT_BOOST_VALUES = [1.0]
+RESULT_COLUMNS = [
+    "portfolio",
+    "boost_pct",
+    "shop_id",
+    "store_name",
+    "original_total_turnover",
+    "original_saturday_turnover",
+    "extra_turnover",
+    "new_total_turnover",
+    "growth_pct",
+]
+INTERVAL_COLUMNS = [
+    "extra_turnover_low",
+    "extra_turnover_high",
+    "portfolio_extra_turnover_low",
+    "portfolio_extra_turnover_high",
+]
+
+
+def load_portfolios(path, boost_values=DEFAULT_BOOST_VALUES):
+    """Geeft [(naam, shop_ids, boost_values)] in de volgorde van het bestand."""
+    if path.endswith(".csv"):
+        shops_by_name = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                shops_by_name.setdefault(row["portfolio"], []).append(int(row["shop_id"]))
+        return [(name, shop_ids, list(boost_values)) for name, shop_ids in shops_by_name.items()]
+
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    if isinstance(payload, dict):
+        boost_values = payload.get("boost_values", boost_values)
+        payload = payload["portfolios"]
+    return [
+        (str(item["name"]), [int(shop_id) for shop_id in item["shop_ids"]], list(item.get("boost_values", boost_values)))
+        for item in payload
+    ]
+
+
+def prefetch(shop_ids, period, settings):
+    """Zet elke winkel één keer in de lokale historie; geeft de winkels die daarna nog ontbreken.
+
+    Ontbreken = de fetch mislukte, of het bereik is nooit opgehaald. Een winkel die een
+    deel van de periode geen data had (later geopend, gesloten) telt niet als ontbrekend:
+    de historie legt het opgehaalde bereik vast, niet alleen de dagen met rijen.
+    Zonder API_URL wordt er niets opgehaald en telt alleen wat al op schijf staat.
+    """
+    from history_store import covered_shops, period_date_range
+
+    errors, failed = [], []
+    if settings["API_URL"]:
+        get_kpi_data_for_stores(shop_ids, period=period, step="day", settings=settings, on_error=errors.append,
+                                on_failed=failed.extend)
+    for error in errors:
+        LOGGER.warning(error)
+
+    failed = set(failed)
+    covered = set(covered_shops(settings["HISTORY_DIR"], shop_ids, *period_date_range(period)))
+    return [shop_id for shop_id in shop_ids if shop_id in failed or shop_id not in covered]
+
+
+# 🧵 Workers: één keer per proces ingesteld, daarna alleen portfolio's
+_worker_settings = None
+
+
+def _init_worker(settings):
+    global _worker_settings
+    from shop_registry import get_shop_registry
+
+    _worker_settings = settings
+    get_shop_registry(settings["SHOP_REGISTRY_SOURCE"])
+
+
+def run_portfolio(name, shop_ids, boost_values, period, intervals=False):
+    """Simuleert één portfolio voor alle boostwaarden; geeft (naam, resultaten of None, fout, seconden).
+
+    Met `intervals` komen er bootstrap-intervallen bij (`BOOTSTRAP_*`-settings), per
+    winkel en voor het portfolio; dezelfde seed voor elk portfolio.
+    """
+    import pandas as pd
+    from simulation import (
+        bootstrap_saturday_potential,
+        compute_saturday_aggregates,
+        compute_saturday_matrix,
+        simulate_from_aggregates,
+        simulate_intervals_from_bootstrap,
+    )
+
+    start = time.perf_counter()
+    errors = []
+    df = get_kpi_data_for_stores(shop_ids, period=period, step="day", settings=_worker_settings, on_error=errors.append)
+    if df.empty:
+        return name, None, errors[0] if errors else "no data", time.perf_counter() - start
+
+    # Aggregaten één keer; elke boostwaarde is daarna O(winkels)
+    aggregates = compute_saturday_aggregates(df)
+    bootstrap = None
+    if intervals:
+        bootstrap = bootstrap_saturday_potential(
+            compute_saturday_matrix(df),
+            n_draws=_worker_settings["BOOTSTRAP_DRAWS"],
+            confidence=_worker_settings["BOOTSTRAP_CONFIDENCE"],
+            seed=_worker_settings["BOOTSTRAP_SEED"],
+        )
+    frames = []
+    for boost in boost_values:
+        results = simulate_from_aggregates(aggregates, boost)
+        results.insert(0, "boost_pct", float(boost))
+        results.insert(0, "portfolio", name)
+        if bootstrap is None:
+            frames.append(results[RESULT_COLUMNS])
+            continue
+        store_intervals, (_, portfolio_low, portfolio_high) = simulate_intervals_from_bootstrap(bootstrap, boost)
+        results = results.merge(store_intervals[["shop_id", "extra_turnover_low", "extra_turnover_high"]], on="shop_id", how="left")
+        results["portfolio_extra_turnover_low"] = portfolio_low
+        results["portfolio_extra_turnover_high"] = portfolio_high
+        frames.append(results[RESULT_COLUMNS + INTERVAL_COLUMNS])
+    return name, pd.concat(frames, ignore_index=True), errors[0] if errors else None, time.perf_counter() - start
+
+
+def run_batch(portfolios, period, settings, workers=None, intervals=False):
+    """Draait alle portfolio's; geeft (gecombineerde resultaten, rapport per portfolio, totaalcijfers)."""
+    import pandas as pd
+
+    start = time.perf_counter()
+    unique_shops = list(dict.fromkeys(shop_id for _, shop_ids, _ in portfolios for shop_id in shop_ids))
+    missing = set(prefetch(unique_shops, period, settings))
+    prefetch_seconds = time.perf_counter() - start
+
+    # Rapport in de volgorde van het bestand; portfolio's met ontbrekende winkels draaien niet
+    report = [{"portfolio": name, "shops": len(shop_ids), "seconds": 0.0, "error": None} for name, shop_ids, _ in portfolios]
+    frames, jobs = [], []
+    for row, (name, shop_ids, boost_values) in zip(report, portfolios):
+        absent = [shop_id for shop_id in shop_ids if shop_id in missing]
+        if absent:
+            # Liever geen resultaat dan een onvolledig portfolio
+            row["error"] = f"{len(absent)} store(s) could not be loaded: {absent[:5]}"
+        else:
+            jobs.append((row, name, shop_ids, boost_values))
+
+    # spawn: de parent heeft al fetch-threads gedraaid, die horen niet in een fork
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(settings,)) as pool:
+        futures = [pool.submit(run_portfolio, name, shop_ids, boost_values, period, intervals) for _, name, shop_ids, boost_values in jobs]
+        for (row, *_), future in zip(jobs, futures):
+            _, results, row["error"], seconds = future.result()
+            row["seconds"] = round(seconds, 3)
+            if results is not None:
+                frames.append(results)
+
+    elapsed = time.perf_counter() - start
+    done = sum(row["error"] is None for row in report)
+    totals = {
+        "portfolios": len(portfolios),
+        "succeeded": done,
+        "unique_shops": len(unique_shops),
+        "workers": workers,
+        "prefetch_seconds": round(prefetch_seconds, 2),
+        "seconds": round(elapsed, 2),
+        "portfolios_per_minute": round(done / elapsed * 60, 1) if elapsed else 0.0,
+    }
+    columns = RESULT_COLUMNS + (INTERVAL_COLUMNS if intervals else [])
+    results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    return results, report, totals
+
+
+def write_results(df, path):
+    from exporter import write_csv, write_parquet
+
+    with open(path, "wb") as f:
+        if path.endswith(".parquet"):
+            write_parquet(df, f)
+        else:
+            write_csv(df, f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Saturday conversion simulation for many portfolios.")
+    parser.add_argument("portfolios", help="JSON- of CSV-bestand met portfolio's")
+    parser.add_argument("-o", "--output", default="batch_results.parquet", help=".parquet of .csv")
+    parser.add_argument("--boost", type=float, nargs="+", default=DEFAULT_BOOST_VALUES, help="conversieboost in %%")
+    parser.add_argument("--api-url", default="", help="leeg = alleen de lokale historie")
+    parser.add_argument("--history-dir", default=".kpi_history", help="gedeelde cache voor alle workers")
+    parser.add_argument("--period", default="last_year", choices=["last_year", "this_year"])
+    parser.add_argument("--date-from", type=date.fromisoformat, help="eigen bereik (samen met --date-to)")
+    parser.add_argument("--date-to", type=date.fromisoformat)
+    parser.add_argument("--workers", type=int, help="standaard: aantal CPU's")
+    parser.add_argument("--shop-registry", default="", help="bron voor winkelnamen (zie shop_registry.py)")
+    parser.add_argument("--intervals", action="store_true", help="bootstrap-intervallen voor extra_turnover")
+    parser.add_argument("--draws", type=int, default=SETTING_DEFAULTS["BOOTSTRAP_DRAWS"])
+    parser.add_argument("--confidence", type=float, default=SETTING_DEFAULTS["BOOTSTRAP_CONFIDENCE"])
+    parser.add_argument("--seed", type=int, default=SETTING_DEFAULTS["BOOTSTRAP_SEED"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if not args.history_dir:
+        parser.error("--history-dir is required: it is the cache the workers share")
+    period = (args.date_from, args.date_to) if args.date_from and args.date_to else args.period
+    settings = load_settings({
+        "API_URL": args.api_url,
+        "HISTORY_DIR": args.history_dir,
+        "SHOP_REGISTRY_SOURCE": args.shop_registry,
+        "BOOTSTRAP_DRAWS": args.draws,
+        "BOOTSTRAP_CONFIDENCE": args.confidence,
+        "BOOTSTRAP_SEED": args.seed,
+    })
+
+    portfolios = load_portfolios(args.portfolios, args.boost)
+    results, report, totals = run_batch(portfolios, period, settings, args.workers, args.intervals)
+    write_results(results, args.output)
+
+    for row in report:
+        if row["error"]:
+            LOGGER.warning("%s: %s", row["portfolio"], row["error"])
+    LOGGER.info("%s rows written to %s", f"{len(results):,}", args.output)
+    LOGGER.info(" ".join(f"{key}={value}" for key, value in totals.items()))
+    return 0 if totals["succeeded"] == totals["portfolios"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# 🗂️ Batch runner tegen de lokale stand-in, daarna volledig offline
+#
+# Genereert --portfolios overlappende portfolio's uit een pool van winkels en draait
+# ze met batch_runner: eerst tegen de stand-in (elke unieke winkel één keer
+# opgehaald, ongeacht het aantal portfolio's of workers), daarna zonder API op de
+# lokale historie. Controleert dat beide runs dezelfde cijfers geven als
+# `simulate_conversion_boost_on_saturdays` per portfolio, en rapporteert portfolio's/min.
+# Eén winkel opent pas halverwege het jaar: zijn portfolio moet gewoon draaien.
+# Faalt (exit 1) bij extra upstream requests of afwijkende resultaten.
+#
+# Gebruik: python benchmarks/bench_batch_runner.py --portfolios 40 --workers 4
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from batch_runner import run_batch
+from fake_vemcount_api import start_server
+from roi_core import get_kpi_cache, get_kpi_data_for_stores, load_settings
+from simulation import simulate_conversion_boost_on_saturdays
+from vemcount_client import chunk_shop_ids
+
+
+def make_portfolios(n_portfolios, pool_size, boost_values, seed=0):
+    rng = random.Random(seed)
+    pool = list(range(30000, 30000 + pool_size))
+    return [(f"portfolio-{i:03d}", rng.sample(pool, rng.randint(5, 40)), boost_values) for i in range(n_portfolios)]
+
+
+def expected_results(portfolios, settings):
+    """Zelfde som als de pagina: per portfolio en boost `simulate_conversion_boost_on_saturdays`."""
+    expected = {}
+    for name, shop_ids, boost_values in portfolios[:5]:
+        df = get_kpi_data_for_stores(shop_ids, "last_year", "day", settings)
+        for boost in boost_values:
+            expected[name, boost] = simulate_conversion_boost_on_saturdays(df, boost)["extra_turnover"].sum()
+    return expected
+
+
+def check(label, results, totals, expected, n_portfolios, failures):
+    print(f"{label:<10} {totals['succeeded']:>3}/{n_portfolios:<3} {totals['workers']:>7} {totals['prefetch_seconds']:>9.2f} "
+          f"{totals['seconds']:>8.2f} {totals['portfolios_per_minute']:>12.1f}")
+    if totals["succeeded"] != n_portfolios:
+        failures.append(f"{label}: {totals['succeeded']}/{n_portfolios} portfolios succeeded")
+    sums = results.groupby(["portfolio", "boost_pct"])["extra_turnover"].sum()
+    for key, value in expected.items():
+        if abs(sums.get(key, float("nan")) - value) > 1e-6 * max(1.0, abs(value)):
+            failures.append(f"{label}: {key} extra turnover {sums.get(key)} != {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--portfolios", type=int, default=40)
+    parser.add_argument("--pool", type=int, default=300, help="aantal verschillende winkels")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    boost_values = [0.5, 1.0, 2.0]
+    portfolios = make_portfolios(args.portfolios, args.pool, boost_values)
+    unique_shops = list(dict.fromkeys(shop_id for _, shop_ids, _ in portfolios for shop_id in shop_ids))
+    failures = []
+
+    with tempfile.TemporaryDirectory() as history_dir:
+        calls = []
+        # Winkel met data voor maar een deel van de periode (geopend op 1 juli)
+        openings = {portfolios[0][1][0]: date(date.today().year - 1, 7, 1)}
+        server, url = start_server(latency_ms=args.latency_ms, calls=calls, openings=openings)
+        try:
+            settings = load_settings({"API_URL": url, "HISTORY_DIR": history_dir})
+            print(f"{'run':<10} {'ok':>7} {'workers':>7} {'prefetch s':>9} {'total s':>8} {'portfolios/min':>12}")
+            results, _, totals = run_batch(portfolios, "last_year", settings, args.workers)
+            n_requests = len(calls)
+            get_kpi_cache(settings).clear()
+            expected = expected_results(portfolios, settings)
+        finally:
+            server.shutdown()
+        check("stand-in", results, totals, expected, args.portfolios, failures)
+
+        expected_requests = len(chunk_shop_ids(unique_shops, settings["API_CHUNK_SIZE"]))
+        print(f"{len(unique_shops)} unique stores in {args.portfolios} portfolios: {n_requests} upstream requests "
+              f"(expected {expected_requests})")
+        if n_requests != expected_requests:
+            failures.append(f"{n_requests} upstream requests for {len(unique_shops)} unique stores, expected {expected_requests}")
+
+        # Offline: geen API, alleen de historie die de eerste run schreef
+        offline = load_settings({"API_URL": "", "HISTORY_DIR": history_dir})
+        results, _, totals = run_batch(portfolios, "last_year", offline, args.workers)
+        check("local", results, totals, expected, args.portfolios, failures)
+
+        # Een winkel zonder lokale data: dat portfolio faalt, de rest niet
+        partial = portfolios[:2] + [("unknown", [99999], boost_values)]
+        _, report, totals = run_batch(partial, "last_year", offline, args.workers)
+        if totals["succeeded"] != 2 or not report[-1]["error"]:
+            failures.append(f"missing local data was not reported: {report}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Batch results match the page logic and each store is fetched once")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# 🎲 Bootstrap-intervallen: snelheid en correctheid
+#
+# Meet `bootstrap_saturday_potential` voor --shops winkels × --draws trekkingen
+# (doel: ongeveer een seconde voor 1.000 × 10.000) en controleert:
+#   - het puntschatting-deel is gelijk aan de zaterdag-aggregaten van de pagina;
+#   - de gevectoriseerde sommen zijn gelijk aan een lus per trekking met dezelfde indexen;
+#   - dezelfde seed geeft dezelfde intervallen, een andere seed andere;
+#   - de interval-kwantielen zijn gelijk aan np.quantile.
+# Faalt (exit 1) boven --max-seconds of bij een afwijking.
+#
+# Gebruik: python benchmarks/bench_bootstrap.py --shops 1000 --draws 10000
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+import numpy as np
+
+from data_transformer import normalize_vemcount_response
+from simulation import (
+    _quantiles,
+    bootstrap_saturday_potential,
+    compute_saturday_aggregates,
+    compute_saturday_matrix,
+    simulate_intervals_from_bootstrap,
+)
+from synthetic import make_vemcount_payload
+
+
+def loop_reference(saturday_matrix, n_draws, seed):
+    """Dezelfde indexen als de gevectoriseerde versie, maar één Python-iteratie per trekking."""
+    _, matrix = saturday_matrix
+    n_saturdays = matrix.shape[1]
+    index = np.random.default_rng(seed).integers(0, n_saturdays, size=(n_draws, n_saturdays))
+    return np.stack([matrix[:, draw].sum(axis=1) for draw in index], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shops", type=int, default=1000)
+    parser.add_argument("--draws", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    df = normalize_vemcount_response(make_vemcount_payload(args.shops, n_days=365))
+    failures = []
+
+    start = time.perf_counter()
+    saturday_matrix = compute_saturday_matrix(df)
+    matrix_seconds = time.perf_counter() - start
+    bootstrap_saturday_potential(saturday_matrix, n_draws=100, seed=0)  # BLAS opwarmen
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        bootstrap = bootstrap_saturday_potential(saturday_matrix, n_draws=args.draws, seed=args.seed)
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+
+    print(f"{'shops':>6} {'saturdays':>9} {'draws':>7} {'matrix (s)':>10} {'bootstrap (s)':>13}")
+    print(f"{args.shops:>6} {saturday_matrix[1].shape[1]:>9} {args.draws:>7} {matrix_seconds:>10.3f} {seconds:>13.3f}")
+    point, low, high = bootstrap["portfolio"]
+    print(f"portfolio potential {point:,.0f}, {bootstrap['confidence']:.0%} interval [{low:,.0f}, {high:,.0f}]")
+    if seconds > args.max_seconds:
+        failures.append(f"bootstrap took {seconds:.2f}s > {args.max_seconds}s")
+
+    aggregates = compute_saturday_aggregates(df)
+    if not np.allclose(bootstrap["point"], aggregates["saturday_potential"].fillna(0).to_numpy()):
+        failures.append("point estimates differ from compute_saturday_aggregates")
+    if not (np.all(bootstrap["low"] <= bootstrap["point"] * 1.0001) and np.all(bootstrap["point"] <= bootstrap["high"] * 1.0001)):
+        failures.append("a store's point estimate lies outside its interval")
+
+    small = (saturday_matrix[0][:50], saturday_matrix[1][:50])
+    reference = loop_reference(small, 500, args.seed)
+    small_bootstrap = bootstrap_saturday_potential(small, n_draws=500, seed=args.seed)
+    reference_bounds = np.quantile(reference, [0.025, 0.975], axis=1)
+    if not (np.allclose(small_bootstrap["low"], reference_bounds[0]) and np.allclose(small_bootstrap["high"], reference_bounds[1])):
+        failures.append("vectorized bootstrap differs from the per-draw loop")
+    if not np.allclose(_quantiles(reference, [0.1, 0.5, 0.9]), np.quantile(reference, [0.1, 0.5, 0.9], axis=1).T):
+        failures.append("_quantiles differs from np.quantile")
+
+    again = bootstrap_saturday_potential(small, n_draws=500, seed=args.seed)
+    other = bootstrap_saturday_potential(small, n_draws=500, seed=args.seed + 1)
+    if not np.array_equal(again["low"], small_bootstrap["low"]):
+        failures.append("the same seed gave different intervals")
+    if np.array_equal(other["low"], small_bootstrap["low"]):
+        failures.append("a different seed gave identical intervals")
+
+    results, portfolio = simulate_intervals_from_bootstrap(bootstrap, 1.0)
+    if not np.isclose(results["extra_turnover"].sum(), portfolio[0]):
+        failures.append("per-store extra turnover does not add up to the portfolio")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Bootstrap intervals are fast, reproducible and match the reference")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
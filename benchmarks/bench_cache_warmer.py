@@ -0,0 +1,90 @@
+# 🔥 Eerste klik met en zonder cache warmer, tegen de lokale stand-in
+#
+# Meet wat "Run simulation" kost (KPI's ophalen + zaterdag-aggregaten) voor het
+# standaardportfolio: koud, na één warmer-ronde, en de tweede klik. Controleert dat
+# de voorberekende aggregaten gelijk zijn aan `compute_saturday_aggregates`, dat de
+# warmer bijna-verlopen items ververst en dat het freshness-rapport klopt.
+# Faalt (exit 1) als de gewarmde eerste klik niet ongeveer zo snel is als de tweede.
+#
+# Gebruik: python benchmarks/bench_cache_warmer.py --latency-ms 300
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from cache_warmer import freshness_report, warm_once
+from fake_vemcount_api import start_server
+from roi_core import DEFAULT_SHOP_IDS, get_kpi_cache, get_kpi_data_for_stores, get_saturday_aggregates, load_settings
+from simulation import compute_saturday_aggregates
+
+
+def first_click(settings, shop_ids):
+    """Zelfde werk als de knop op de calculatorpagina; geeft (seconden, df, aggregaten)."""
+    start = time.perf_counter()
+    df = get_kpi_data_for_stores(shop_ids, "last_year", "day", settings)
+    aggregates = get_saturday_aggregates(shop_ids, "last_year", "day", df, settings)
+    return time.perf_counter() - start, df, aggregates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--shops", type=int, default=200, help="aantal winkels in het portfolio")
+    args = parser.parse_args()
+
+    shop_ids = (DEFAULT_SHOP_IDS + list(range(30000, 30000 + args.shops)))[:args.shops]
+    portfolios = {"default": shop_ids}
+    calls = []
+    server, url = start_server(latency_ms=args.latency_ms, calls=calls)
+    settings = load_settings({"API_URL": url, "HISTORY_DIR": "", "CACHE_WARMER_CONCURRENCY": 2})
+    cache = get_kpi_cache(settings)
+    failures = []
+
+    try:
+        cache.clear()
+        cold, df, aggregates = first_click(settings, shop_ids)
+        expected = compute_saturday_aggregates(df)
+        if not aggregates.equals(expected):
+            failures.append("aggregates from the cache differ from compute_saturday_aggregates")
+
+        cache.clear()
+        report = warm_once(portfolios, settings)
+        warmed, _, aggregates = first_click(settings, shop_ids)
+        second, _, _ = first_click(settings, shop_ids)
+        if not aggregates.equals(expected):
+            failures.append("precomputed aggregates differ from compute_saturday_aggregates")
+
+        freshness = freshness_report(portfolios, settings)[0]
+        if (freshness["fresh"], freshness["aggregates"]) != (len(shop_ids), len(shop_ids)):
+            failures.append(f"freshness report after warming: {freshness}")
+
+        # Een ronde met een marge groter dan de TTL ververst alles wat vóór de volgende ronde verloopt
+        n_calls = len(calls)
+        refresh = warm_once(portfolios, settings, refresh_margin=settings["KPI_CACHE_TTL_SECONDS"])
+        if refresh[0]["refreshed"] != len(shop_ids) or len(calls) == n_calls:
+            failures.append("warmer did not refresh entries that expire before its next run")
+        if get_kpi_cache(settings).get_derived(shop_ids[0], "last_year", "day", "saturday_aggregates") is None:
+            failures.append("aggregates were not recomputed after the refresh")
+    finally:
+        server.shutdown()
+
+    print(f"{'first click':<24} {'ms':>8}")
+    print(f"{'cold (no warmer)':<24} {cold * 1000:>8.1f}")
+    print(f"{'after warming':<24} {warmed * 1000:>8.1f}")
+    print(f"{'second click':<24} {second * 1000:>8.1f}")
+    print(f"warm run: {report[0]['seconds']:.2f}s, freshness: {freshness}")
+
+    if warmed > max(5 * second, 0.05):
+        failures.append(f"warmed first click {warmed * 1000:.1f} ms vs second click {second * 1000:.1f} ms")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ The first interaction is as fast as later ones once the warmer has run")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
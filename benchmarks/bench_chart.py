@@ -0,0 +1,46 @@
+# 📊 Figure-payload van de winkel-staafgrafiek bij groeiend aantal winkels
+#
+# Controleert dat de payload onder MAX_FIGURE_BYTES blijft (exit 1 als niet).
+# Gebruik: python benchmarks/bench_chart.py [--stores 10 100 1000 10000] [--top-n 25 500]
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from bench_table import make_results
+from presentation import MAX_FIGURE_BYTES, build_store_bar_chart, figure_payload_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stores", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--top-n", type=int, nargs="+", default=[25, 500])
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'stores':>7} {'top_n':>6} {'traces':>14} {'bars':>6} {'payload KB':>11} {'build (s)':>10}")
+    for n_stores in args.stores:
+        results = make_results(n_stores)
+        for top_n in args.top_n:
+            start = time.perf_counter()
+            fig = build_store_bar_chart(results, top_n=top_n)
+            elapsed = time.perf_counter() - start
+            payload = figure_payload_bytes(fig)
+            failures += payload > MAX_FIGURE_BYTES
+            print(
+                f"{n_stores:>7} {top_n:>6} {fig.data[0].type:>14} {len(fig.data[0].x):>6} "
+                f"{payload / 1024:>11.1f} {elapsed:>10.3f}"
+            )
+
+    print(f"ceiling: {MAX_FIGURE_BYTES / 1024:.0f} KB")
+    if failures:
+        print(f"❌ {failures} figure(s) over the payload ceiling")
+        return 1
+    print("✅ All figures within the payload ceiling")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
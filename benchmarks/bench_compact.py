@@ -0,0 +1,62 @@
+# 🧠 Geheugen en nauwkeurigheid: standaard vs compact schema
+#
+# Gebruik: python benchmarks/bench_compact.py [--rows 1000000]
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+import numpy as np
+import pandas as pd
+
+from data_transformer import to_compact_schema
+from simulation import compute_saturday_aggregates, simulate_from_aggregates
+
+
+def make_frame(n_rows, n_days=365, seed=0):
+    # Direct als genormaliseerde frame: een payload van 1M shop-dagen zou zelf al GB's kosten
+    rng = np.random.default_rng(seed)
+    n_shops = -(-n_rows // n_days)
+    shop_ids = np.repeat(np.arange(26000, 26000 + n_shops, dtype=np.int64), n_days)[:n_rows]
+    dates = np.tile(pd.date_range("2024-01-01", periods=n_days, freq="D").to_numpy(), n_shops)[:n_rows]
+    count_in = rng.integers(200, 2000, n_rows).astype(np.float64)
+    conversion_rate = rng.uniform(5, 35, n_rows).round(2)
+    sales_per_transaction = rng.uniform(15, 90, n_rows).round(2)
+    sales_per_transaction[rng.random(n_rows) < 0.02] = 0
+    return pd.DataFrame({
+        "shop_id": shop_ids,
+        "date": dates,
+        "turnover": (np.floor(count_in * conversion_rate / 100) * sales_per_transaction).round(2),
+        "count_in": count_in,
+        "conversion_rate": conversion_rate,
+        "sales_per_transaction": sales_per_transaction,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--boost", type=float, default=1.0)
+    parser.add_argument("--rtol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    compact = to_compact_schema(df)
+    per_million = 1_000_000 / len(df) / 2**20
+    default_mb = df.memory_usage(deep=True).sum() * per_million
+    compact_mb = compact.memory_usage(deep=True).sum() * per_million
+    print(f"default: {default_mb:6.1f} MB per 1M rows  {dict(df.dtypes.astype(str))}")
+    print(f"compact: {compact_mb:6.1f} MB per 1M rows  {dict(compact.dtypes.astype(str))}")
+    print(f"drop:    {default_mb - compact_mb:6.1f} MB ({1 - compact_mb / default_mb:.0%})")
+    assert not (compact.dtypes == object).any(), "compact schema must not contain object columns"
+
+    expected = simulate_from_aggregates(compute_saturday_aggregates(df), args.boost)
+    actual = simulate_from_aggregates(compute_saturday_aggregates(compact), args.boost)
+    for column in ["original_total_turnover", "original_saturday_turnover", "extra_turnover", "growth_pct"]:
+        np.testing.assert_allclose(actual[column].to_numpy(np.float64), expected[column].to_numpy(np.float64), rtol=args.rtol)
+    print(f"results within rtol={args.rtol} of the default schema ({len(expected)} shops)")
+
+
+if __name__ == "__main__":
+    main()
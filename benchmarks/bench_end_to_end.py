@@ -0,0 +1,63 @@
+# ⏱️ End-to-end latency: fetch -> normalize -> simulate -> tabel, tegen de lokale stand-in
+#
+# Gebruik: python benchmarks/bench_end_to_end.py [--shops 10 100 500] [--runs 20] [--latency-ms 100]
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+import numpy as np
+
+from fake_vemcount_api import start_server
+from presentation import style_table
+from simulation import compute_saturday_aggregates, simulate_from_aggregates
+from synthetic import make_shop_ids
+from vemcount_client import fetch_report_frame
+
+
+def run_once(url, shop_ids, boost, streaming):
+    timings = {}
+    start = time.perf_counter()
+    df = fetch_report_frame(url, shop_ids, period="last_year", step="day", streaming=streaming)
+    timings["fetch+normalize"] = time.perf_counter() - start
+
+    mark = time.perf_counter()
+    results = simulate_from_aggregates(compute_saturday_aggregates(df), boost)
+    timings["simulate"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    style_table(results).to_html()
+    timings["table"] = time.perf_counter() - mark
+
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shops", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--boost", type=float, default=1.0)
+    parser.add_argument("--streaming", action="store_true")
+    args = parser.parse_args()
+
+    server, url = start_server(latency_ms=args.latency_ms, error_rate=args.error_rate)
+    print(f"{'shops':>6} {'stage':>16} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    try:
+        for n_shops in args.shops:
+            shop_ids = make_shop_ids(n_shops)
+            run_once(url, shop_ids, args.boost, args.streaming)  # warm-up (server-cache, imports)
+            samples = [run_once(url, shop_ids, args.boost, args.streaming) for _ in range(args.runs)]
+            for stage in samples[0]:
+                values = np.array([sample[stage] for sample in samples]) * 1000
+                print(f"{n_shops:>6} {stage:>16} {np.percentile(values, 50):>10.1f} {np.percentile(values, 95):>10.1f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
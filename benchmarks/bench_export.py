@@ -0,0 +1,157 @@
+# 📥 Piekgeheugen bij exporteren: naïeve to_csv vs CSV/Parquet in blokken
+#
+# Bouwt een KPI-frame van --rows rijen (zelfde kolommen en dtypes als de
+# genormaliseerde Vemcount-data) en meet per modus in een verse subprocess hoeveel
+# de piek-RSS boven de frame zelf uitkomt, inclusief de uiteindelijke bytes die
+# Streamlit voor de download vasthoudt. Controleert dat de blokken-export hetzelfde
+# bestand (CSV) of dezelfde data (Parquet) oplevert.
+# Faalt (exit 1) boven --max-mb of als blokken niet zuiniger zijn dan naïef.
+#
+# Gebruik: python benchmarks/bench_export.py --rows 1000000
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+MODES = ["naive_csv", "chunked_csv", "parquet"]
+
+
+def make_frame(n_rows, n_days=365):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    n_shops = -(-n_rows // n_days)
+    dates = pd.date_range("2025-01-01", periods=n_days, freq="D")
+    count_in = rng.integers(200, 5000, n_rows)
+    return pd.DataFrame({
+        "shop_id": np.repeat(np.arange(26000, 26000 + n_shops, dtype="int32"), n_days)[:n_rows],
+        "date": np.tile(dates.values, n_shops)[:n_rows],
+        "turnover": rng.gamma(2.0, 2500.0, n_rows).astype("float32"),
+        "count_in": pd.array(count_in, dtype="Int32"),
+        "conversion_rate": rng.uniform(5, 40, n_rows).astype("float32"),
+        "sales_per_transaction": rng.uniform(20, 120, n_rows).astype("float32"),
+    })
+
+
+def _status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+def reset_peak_rss():
+    """Zet de piek-RSS terug naar de huidige RSS (Linux), zodat het bouwen van de frame niet meetelt.
+
+    Geeft de huidige RSS in kB; zonder /proc valt het terug op ru_maxrss.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return _status_kb("VmRSS")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss():
+    try:
+        return _status_kb("VmHWM")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_mode(mode, n_rows):
+    # Verse interpreter per modus, zodat de piek alleen deze export meet
+    import gc
+
+    from exporter import open_export
+
+    df = make_frame(n_rows)
+    if mode == "parquet":
+        import pyarrow.parquet  # noqa: F401  (importkosten tellen niet mee)
+    gc.collect()
+    baseline = reset_peak_rss()
+    start = time.perf_counter()
+    if mode == "naive_csv":
+        data = df.to_csv(index=False).encode("utf-8")
+    else:
+        # Wat Streamlit met het bestand doet: één keer uitlezen naar de bytes van de download
+        with open_export(df, "Parquet" if mode == "parquet" else "CSV") as f:
+            data = f.read()
+    elapsed = time.perf_counter() - start
+    peak = peak_rss()
+    print(json.dumps({
+        "mode": mode,
+        "rows": len(df),
+        "seconds": round(elapsed, 2),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        "file_mb": round(len(data) / 2**20, 1),
+        "extra_rss_mb": round((peak - baseline) / 1024, 1),
+    }))
+
+
+def check_roundtrip(n_rows=50_000):
+    """Blokken (kleiner dan de frame) moeten hetzelfde opleveren als in één keer."""
+    import io
+
+    import pandas as pd
+    from exporter import export_to_tempfile
+
+    df = make_frame(n_rows)
+    with export_to_tempfile(df, "CSV", chunk_rows=7_000) as f:
+        same_csv = f.read() == df.to_csv(index=False).encode("utf-8")
+    with export_to_tempfile(df, "Parquet", chunk_rows=7_000) as f:
+        same_parquet = pd.read_parquet(io.BytesIO(f.read())).equals(df)
+    return same_csv, same_parquet
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-mb", type=float, default=80.0, help="plafond voor extra RSS bij CSV in blokken")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.rows)
+        return 0
+
+    results = {}
+    print(f"{'mode':<12} {'rows':>9} {'frame MB':>9} {'file MB':>8} {'extra RSS MB':>13} {'seconds':>8}")
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--rows", str(args.rows)],
+            check=True, capture_output=True, text=True,
+        )
+        result = results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{mode:<12} {result['rows']:>9} {result['frame_mb']:>9} {result['file_mb']:>8} "
+              f"{result['extra_rss_mb']:>13} {result['seconds']:>8}")
+
+    failures = []
+    same_csv, same_parquet = check_roundtrip()
+    if not same_csv:
+        failures.append("chunked CSV differs from df.to_csv()")
+    if not same_parquet:
+        failures.append("chunked Parquet does not round-trip to the same frame")
+    chunked = results["chunked_csv"]["extra_rss_mb"]
+    if chunked > args.max_mb:
+        failures.append(f"chunked CSV export uses {chunked} MB extra, ceiling {args.max_mb} MB")
+    if chunked >= results["naive_csv"]["extra_rss_mb"]:
+        failures.append("chunked CSV export is not leaner than df.to_csv()")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print(f"✅ Exporting {args.rows:,} rows stays under {args.max_mb:.0f} MB extra RSS")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# 🗄️ Lokale historie: dekking per winkel, tegen de lokale stand-in
+#
+# Laadt eerst vorig jaar op één dag na en vraagt dan "last_year" op: alleen die ene dag
+# mag upstream (incrementeel aanvullen), de rest komt van schijf. Laadt daarna een later
+# datumbereik (zodat er een gat tussen zit), leegt de KPI-cache en vraagt bereiken op
+# die (deels) in dat gat vallen. Controleert dat elke dag terugkomt, dat alleen het
+# gat upstream wordt opgehaald en dat de historie daarna het hele bereik dekt.
+# Tot slot winkels die (een deel van) het jaar geen data hebben (later geopend of
+# helemaal stil): na één fetch telt het hele bereik als gedekt en gaat er niets
+# meer upstream. Ook `sync_history` moet voor die winkels na één run niets meer vragen.
+# Faalt (exit 1) bij ontbrekende dagen of onnodige requests.
+#
+# Gebruik: python benchmarks/bench_history.py
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from fake_vemcount_api import start_server
+from history_store import covered_shops, stored_ranges, sync_history
+from roi_core import DEFAULT_SHOP_IDS, get_kpi_cache, get_kpi_data_for_stores, load_settings
+
+
+def requested_ranges(calls, since):
+    return sorted({(query["form_date_from"][0], query["form_date_to"][0]) for query in calls[since:] if "form_date_from" in query})
+
+
+def check_empty_ranges(shop_ids, year, failures):
+    """Winkels zonder rijen in een deel van het bereik: één fetch, daarna alles van schijf."""
+    opened = date(year - 1, 7, 1)
+    openings = {shop_ids[0]: opened, shop_ids[1]: date(year + 1, 1, 1)}
+    last_year = (date(year - 1, 1, 1), date(year - 1, 12, 31))
+    with tempfile.TemporaryDirectory() as history_dir:
+        calls = []
+        server, url = start_server(calls=calls, openings=openings)
+        try:
+            settings = load_settings({"API_URL": url, "HISTORY_DIR": history_dir})
+            first = get_kpi_data_for_stores(shop_ids, "last_year", "day", settings)
+            get_kpi_cache(settings).clear()
+            n_calls = len(calls)
+            again = get_kpi_data_for_stores(shop_ids, "last_year", "day", settings)
+            refetched = len(calls) - n_calls
+        finally:
+            server.shutdown()
+        covered = covered_shops(history_dir, shop_ids, *last_year)
+
+    print(f"opened {opened} / silent all year: {len(again)} rows from disk, {refetched} upstream requests, "
+          f"{len(covered)}/{len(shop_ids)} stores covered")
+    if refetched:
+        failures.append(f"stores without data for part of the year were fetched again ({refetched} requests)")
+    if covered != list(shop_ids):
+        failures.append(f"only {covered} counted as covered after fetching {list(shop_ids)}")
+    if len(again) != len(first):
+        failures.append(f"history returned {len(again)} rows, the fetch {len(first)}")
+
+
+def check_sync_noop(shop_ids, year, failures):
+    """Een tweede `sync_history` over hetzelfde bereik mag niets meer ophalen, ook niet voor lege dagen."""
+    openings = {shop_ids[0]: date(year - 1, 7, 1), shop_ids[1]: date(year + 1, 1, 1)}
+    with tempfile.TemporaryDirectory() as history_dir:
+        calls = []
+        server, url = start_server(calls=calls, openings=openings)
+        try:
+            sync = dict(until=date(year - 1, 12, 31), backfill_from=date(year - 1, 1, 1))
+            sync_history(history_dir, url, shop_ids, **sync)
+            n_calls = len(calls)
+            sync_history(history_dir, url, shop_ids, **sync)
+            repeated = len(calls) - n_calls
+        finally:
+            server.shutdown()
+    print(f"sync_history again over the same range: {repeated} upstream requests")
+    if repeated:
+        failures.append(f"a repeated sync_history fetched {repeated} time(s) instead of being a no-op")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shops", type=int, default=3)
+    args = parser.parse_args()
+
+    shop_ids = DEFAULT_SHOP_IDS[:args.shops]
+    year = date.today().year
+    later = (date(year, 3, 1), date(year, 4, 30))
+    failures = []
+
+    with tempfile.TemporaryDirectory() as history_dir:
+        calls = []
+        server, url = start_server(calls=calls)
+        try:
+            settings = load_settings({"API_URL": url, "HISTORY_DIR": history_dir})
+            get_kpi_data_for_stores(shop_ids, (date(year - 1, 1, 1), date(year - 1, 12, 30)), "day", settings)
+            get_kpi_cache(settings).clear()
+            n_calls = len(calls)
+            df = get_kpi_data_for_stores(shop_ids, "last_year", "day", settings)
+            expected = (date(year, 1, 1) - date(year - 1, 1, 1)).days * len(shop_ids)
+            fetched = requested_ranges(calls, n_calls)
+            full_period = [query for query in calls[n_calls:] if query.get("period") == ["last_year"]]
+            print(f"last_year, history up to {date(year - 1, 12, 30)}: {len(df)} rows (expected {expected}), upstream {fetched}")
+            if len(df) != expected:
+                failures.append(f"last_year: {len(df)} rows, expected {expected}")
+            if full_period or fetched != [(str(date(year - 1, 12, 31)), str(date(year - 1, 12, 31)))]:
+                failures.append(f"last_year with one day missing fetched {fetched} and {len(full_period)} full-period requests")
+            get_kpi_data_for_stores(shop_ids, later, "day", settings)
+
+            print(f"{'range':<26} {'rows':>6} {'expected':>8}  upstream ranges")
+            for date_from, date_to in [(date(year, 1, 1), date(year, 2, 28)), (date(year, 1, 1), date(year, 4, 30))]:
+                get_kpi_cache(settings).clear()
+                n_calls = len(calls)
+                df = get_kpi_data_for_stores(shop_ids, (date_from, date_to), "day", settings)
+                expected = ((date_to - date_from).days + 1) * len(shop_ids)
+                fetched = requested_ranges(calls, n_calls)
+                print(f"{f'{date_from} – {date_to}':<26} {len(df):>6} {expected:>8}  {fetched or '-'}")
+                if len(df) != expected:
+                    failures.append(f"{date_from} – {date_to}: {len(df)} rows, expected {expected}")
+                if any(date.fromisoformat(first) >= later[0] for first, _ in fetched):
+                    failures.append(f"{date_from} – {date_to}: refetched days already on disk: {fetched}")
+        finally:
+            server.shutdown()
+
+        for shop_id in shop_ids:
+            ranges = stored_ranges(history_dir, shop_id)
+            if ranges != [(date(year - 1, 1, 1), later[1])]:
+                failures.append(f"shop {shop_id}: stored ranges {ranges}, expected one range up to {later[1]}")
+        print(f"stored ranges for shop {shop_ids[0]}: {[(str(a), str(b)) for a, b in stored_ranges(history_dir, shop_ids[0])]}")
+
+    get_kpi_cache(settings).clear()
+    check_empty_ranges(shop_ids, year, failures)
+    check_sync_noop(shop_ids, year, failures)
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ The local history returns every requested day and only fetches the missing days")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# ⏱️ Benchmark: rij-voor-rij vs kolomgewijze normalisatie
+#
+# Gebruik: python benchmarks/bench_normalize.py [--days 365] [--shops 10 100 1000 5000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+import pandas as pd
+
+from data_transformer import _normalize_vemcount_response_rows, normalize_vemcount_response
+from synthetic import make_vemcount_payload
+
+
+def best_of(func, payload, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(payload)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shops", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'shops':>6} {'rows':>10} {'rows (s)':>10} {'columnar (s)':>13} {'speedup':>8}")
+    for n_shops in args.shops:
+        payload = make_vemcount_payload(n_shops, n_days=args.days)
+        repeats = args.repeats if n_shops <= 1000 else 1
+        old_time, old_df = best_of(_normalize_vemcount_response_rows, payload, repeats)
+        new_time, new_df = best_of(normalize_vemcount_response, payload, repeats)
+        pd.testing.assert_frame_equal(old_df, new_df)
+        print(f"{n_shops:>6} {len(new_df):>10,} {old_time:>10.3f} {new_time:>13.3f} {old_time / new_time:>7.1f}x")
+        del payload, old_df, new_df
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# 🛡️ Gebruikerslatency bij een haperende upstream, tegen de lokale stand-in
+#
+# Scenario's:
+#   flaky      – 30% 503's: retries met jitter vangen ze op
+#   cold start – upstream reageert trager dan de read-timeout: de wachttijd blijft begrensd
+#   down       – alles 503: de circuit breaker gaat open en daarna falen calls direct
+#   stale      – verlopen cache + trage upstream: data komt direct uit de cache (stale)
+#                en wordt op de achtergrond ververst
+#   malformed  – breaker open, daarna een 200 met een niet-JSON body als half-open proef:
+#                de breaker gaat weer open (niet vast in half-open) en herstelt daarna
+# Faalt (exit 1) als een scenario zijn latencygrens of verwachte uitkomst niet haalt.
+#
+# Gebruik: python benchmarks/bench_resilience.py
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from circuit_breaker import CLOSED, OPEN, get_circuit_breaker
+from fake_vemcount_api import start_server
+from roi_core import DEFAULT_SHOP_IDS, get_kpi_cache, get_kpi_data_for_stores, load_settings, refreshes_in_flight
+from vemcount_client import BACKOFF_BASE_SECONDS, BACKOFF_CAP_SECONDS
+
+
+def make_settings(url, **overrides):
+    secrets = {
+        "API_URL": url,
+        "HISTORY_DIR": "",
+        "API_TIMEOUT_SECONDS": 1.0,
+        "API_RETRIES": 2,
+        "API_BREAKER_FAILURES": 5,
+        "API_BREAKER_RESET_SECONDS": 30.0,
+    }
+    secrets.update(overrides)
+    return load_settings(secrets)
+
+
+def timed_calls(settings, n_calls, shop_ids=DEFAULT_SHOP_IDS):
+    """Doet n_calls opeenvolgende paginafetches (lege cache per call); geeft (latencies, errors, rows)."""
+    latencies, errors, rows = [], [], []
+    for _ in range(n_calls):
+        get_kpi_cache(settings).clear()
+        messages = []
+        start = time.perf_counter()
+        df = get_kpi_data_for_stores(shop_ids, "last_year", "day", settings, on_error=messages.append)
+        latencies.append(time.perf_counter() - start)
+        errors.append(messages[0] if messages else None)
+        rows.append(len(df))
+    return latencies, errors, rows
+
+
+def summary(latencies):
+    ordered = sorted(latencies)
+    return ordered[len(ordered) // 2], ordered[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'scenario':<12} {'calls':>5} {'ok':>4} {'p50 ms':>8} {'max ms':>8}  note")
+
+    # 1. flaky: retries moeten de meeste fouten opvangen
+    calls = []
+    server, url = start_server(error_rate=0.3, seed=1, calls=calls)
+    latencies, errors, _ = timed_calls(make_settings(url, API_BREAKER_FAILURES=1000), args.calls)
+    server.shutdown()
+    ok = sum(error is None for error in errors)
+    p50, worst = summary(latencies)
+    print(f"{'flaky':<12} {args.calls:>5} {ok:>4} {p50 * 1000:>8.0f} {worst * 1000:>8.0f}  {len(calls)} upstream requests")
+    if ok < args.calls * 0.9:
+        failures.append(f"flaky: only {ok}/{args.calls} succeeded with retries")
+
+    # 2. cold start: grens = (retries + 1) × read-timeout + maximale backoff (lokaal geen connect-wachttijd)
+    server, url = start_server(latency_ms=3000)
+    settings = make_settings(url, API_BREAKER_FAILURES=1000)
+    max_backoff = sum(
+        min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt) for attempt in range(settings["API_RETRIES"])
+    )
+    bound = (settings["API_RETRIES"] + 1) * settings["API_TIMEOUT_SECONDS"] + max_backoff + 0.5
+    latencies, errors, _ = timed_calls(settings, 2)
+    server.shutdown()
+    p50, worst = summary(latencies)
+    print(f"{'cold start':<12} {2:>5} {sum(e is None for e in errors):>4} {p50 * 1000:>8.0f} {worst * 1000:>8.0f}  "
+          f"bound {bound * 1000:.0f} ms")
+    if worst > bound:
+        failures.append(f"cold start: {worst:.1f}s exceeds the {bound:.1f}s bound")
+
+    # 3. down: na API_BREAKER_FAILURES mislukte requests gaat de breaker open en faalt alles direct
+    calls = []
+    server, url = start_server(error_rate=1.0, calls=calls)
+    settings = make_settings(url)
+    latencies, errors, _ = timed_calls(settings, args.calls)
+    server.shutdown()
+    breaker = get_circuit_breaker(url)
+    # Alle calls ná de call waarin de breaker openging, mogen upstream niet meer raken
+    opened = next((i for i, error in enumerate(errors) if error and "circuit open" in error), len(errors))
+    fast = latencies[opened + 1:]
+    p50, worst = summary(latencies)
+    print(f"{'down':<12} {args.calls:>5} {0:>4} {p50 * 1000:>8.0f} {worst * 1000:>8.0f}  "
+          f"breaker {breaker.state}, {len(calls)} upstream requests, {len(fast)} fast failures")
+    if breaker.state != OPEN or len(calls) != settings["API_BREAKER_FAILURES"]:
+        failures.append(f"down: breaker {breaker.state} after {len(calls)} upstream requests")
+    if not fast or max(fast) > 0.05:
+        failures.append("down: calls with an open breaker did not fail fast")
+
+    # 4. stale: verlopen data direct tonen, verversen op de achtergrond
+    calls = []
+    server, url = start_server(latency_ms=1500, calls=calls)
+    settings = make_settings(url, KPI_CACHE_TTL_SECONDS=1, API_TIMEOUT_SECONDS=5.0)
+    get_kpi_cache(settings).clear()
+    get_kpi_data_for_stores(DEFAULT_SHOP_IDS, "last_year", "day", settings)
+    time.sleep(1.1)
+    stale_shops = []
+    start = time.perf_counter()
+    df = get_kpi_data_for_stores(DEFAULT_SHOP_IDS, "last_year", "day", settings, on_stale=stale_shops.extend)
+    served = time.perf_counter() - start
+    while refreshes_in_flight():
+        time.sleep(0.05)
+    refreshed = get_kpi_cache(settings).split_stale(DEFAULT_SHOP_IDS, "last_year", "day")
+    server.shutdown()
+    print(f"{'stale':<12} {1:>5} {int(not df.empty):>4} {served * 1000:>8.0f} {served * 1000:>8.0f}  "
+          f"{len(stale_shops)} stale shops served, {len(refreshed[0])} fresh after refresh, {len(calls)} upstream requests")
+    if df.empty or served > 0.2 or len(stale_shops) != len(DEFAULT_SHOP_IDS):
+        failures.append(f"stale: served in {served:.2f}s with {len(stale_shops)} stale shops")
+    if len(refreshed[0]) != len(DEFAULT_SHOP_IDS):
+        failures.append("stale: background refresh did not renew the cache")
+
+    # 5. malformed: een 200 met een kapotte body als proefrequest mag de breaker niet blokkeren
+    for streaming in [False, True]:
+        label = "bad stream" if streaming else "bad body"
+        server, url = start_server(error_rate=1.0)
+        settings = make_settings(url, API_RETRIES=0, API_BREAKER_FAILURES=1, API_BREAKER_RESET_SECONDS=0.2,
+                                 API_STREAMING=streaming)
+        breaker = get_circuit_breaker(url)
+        timed_calls(settings, 1)
+        opened = breaker.state
+        server.RequestHandlerClass.error_rate = 0.0
+        server.RequestHandlerClass.malformed_rate = 1.0
+        time.sleep(0.25)
+        _, errors, _ = timed_calls(settings, 1)
+        after_trial = breaker.state
+        server.RequestHandlerClass.malformed_rate = 0.0
+        time.sleep(0.25)
+        latencies, recovered, rows = timed_calls(settings, 1)
+        server.shutdown()
+        print(f"{label:<12} {3:>5} {sum(e is None for e in recovered):>4} {latencies[0] * 1000:>8.0f} "
+              f"{latencies[0] * 1000:>8.0f}  breaker {opened} → {after_trial} after the bad trial → {breaker.state}")
+        if opened != OPEN or after_trial != OPEN or not errors[0] or "Invalid JSON" not in errors[0]:
+            failures.append(f"{label}: breaker {opened} → {after_trial}, error {errors[0]!r}")
+        if breaker.state != CLOSED or recovered[0] is not None or not rows[0]:
+            failures.append(f"{label}: breaker stuck in {breaker.state} after a malformed trial ({recovered[0]!r})")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ User-facing latency stays bounded with a degraded upstream")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
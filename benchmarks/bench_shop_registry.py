@@ -0,0 +1,136 @@
+# 🏬 Winkelregister bij 10k+ winkels: bouwtijd, prefix-zoeken en type-ahead in de pagina
+#
+# Bouwt een synthetisch register (dubbele plaatsnamen inbegrepen), vergelijkt
+# `ShopRegistry.search()` met een lineaire scan (zelfde treffers) en meet de rerun
+# van de calculatorpagina bij het typen in het zoekveld: met type-ahead (alleen
+# selectie + treffers als opties) en met alle winkels als opties.
+# Faalt (exit 1) als zoeken of de type-ahead-rerun boven de drempel komt.
+#
+# Gebruik: python benchmarks/bench_shop_registry.py --shops 10000
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.dirname(__file__) + '/../')
+sys.path.append(ROOT)
+
+from shop_registry import ShopRegistry, Shop, load_shop_registry, normalize
+
+CITIES = ["Amsterdam", "Paris", "Berlin", "Zürich", "Madrid", "Stockholm", "Rotterdam", "Utrecht", "Hamburg",
+          "Milan", "Den Haag", "São Paulo", "Köln", "Lyon", "Porto", "Oslo", "Gent", "Antwerpen", "Wien", "Graz"]
+COUNTRIES = ["NL", "FR", "DE", "CH", "ES", "SE", "IT", "BE", "AT", "BR"]
+
+
+def make_shops(n_shops, seed=0):
+    rng = random.Random(seed)
+    shops = []
+    for i in range(n_shops):
+        city = rng.choice(CITIES)
+        # Een deel heeft een unieke naam, de rest deelt de plaatsnaam met andere winkels
+        name = city if rng.random() < 0.3 else f"{city} {rng.choice(['Centrum', 'Noord', 'Station', 'Mall'])} {i}"
+        shops.append(Shop(26000 + i, name, f"Region {i % 40}", rng.choice(COUNTRIES)))
+    return shops
+
+
+def linear_search(registry, query):
+    prefix = normalize(query)
+    return {
+        shop.shop_id for shop in registry.by_id.values()
+        if str(shop.shop_id).startswith(prefix)
+        or any(" ".join(normalize(shop.name).split()[i:]).startswith(prefix) for i in range(len(shop.name.split())))
+    }
+
+
+def page_rerun_ms(registry_path, max_options, query, repeats=3):
+    """Rerun van de calculatorpagina na typen in het zoekveld (of, zonder zoekveld, een gewone rerun)."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "pages", "zaterdag-conversie-calculator.py"), default_timeout=60)
+    at.secrets["API_URL"] = "http://127.0.0.1:9/get-report"
+    at.secrets["SHOP_REGISTRY_SOURCE"] = registry_path
+    at.secrets["SHOP_PICKER_MAX_OPTIONS"] = max_options
+    at.run()
+    timings = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        if at.text_input:
+            at.text_input[0].input(query[: i % len(query) + 1]).run()
+        else:
+            at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return sorted(timings)[len(timings) // 2], len(at.multiselect[0].options)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shops", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--max-search-ms", type=float, default=1.0)
+    parser.add_argument("--max-rerun-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    shops = make_shops(args.shops)
+    start = time.perf_counter()
+    registry = ShopRegistry(shops)
+    build_ms = (time.perf_counter() - start) * 1000
+    failures = []
+
+    rng = random.Random(1)
+    queries = [rng.choice(CITIES)[: rng.randint(1, 6)] for _ in range(args.queries)] + ["260", "haag", "zur", "sao p"]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        registry.search(query, limit=200)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+    for query in ["haag", "zur", "sao p", "Köln Noord", "2601"]:
+        expected = linear_search(registry, query)
+        found = registry.search(query, limit=len(registry))
+        if set(found) != expected:
+            failures.append(f"search {query!r}: {len(found)} hits, linear scan finds {len(expected)}")
+    if len(set(registry.labels.values())) != len(registry):
+        failures.append("labels are not unique")
+
+    start = time.perf_counter()
+    linear_search(registry, "ham")
+    linear_ms = (time.perf_counter() - start) * 1000
+
+    print(f"registry: {len(registry)} shops, {len(registry.ids_by_name)} distinct names, built in {build_ms:.0f} ms")
+    print(f"search:   p50 {p50:.3f} ms, p99 {p99:.3f} ms (linear scan {linear_ms:.1f} ms)")
+    if p99 > args.max_search_ms:
+        failures.append(f"search p99 {p99:.3f} ms > {args.max_search_ms} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "shops.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["shop_id", "name", "region", "country"])
+            writer.writerows(shops)
+        if len(load_shop_registry(path)) != len(registry):
+            failures.append("CSV source did not load every shop")
+
+        print(f"{'page rerun':<26} {'ms':>8} {'options':>8}")
+        for label, max_options in [("type-ahead", 200), ("all shops as options", args.shops + 1)]:
+            ms, n_options = page_rerun_ms(path, max_options, "Rotterdam")
+            print(f"{label:<26} {ms:>8.0f} {n_options:>8}")
+            if max_options < args.shops and ms > args.max_rerun_ms:
+                failures.append(f"type-ahead rerun {ms:.0f} ms > {args.max_rerun_ms:.0f} ms")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Shop search stays responsive with a large registry")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
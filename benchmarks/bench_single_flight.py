@@ -0,0 +1,96 @@
+# 🛬 Single-flight onder gelijktijdige sessies, tegen de lokale stand-in
+#
+# N threads (zoals N Streamlit-sessies) vragen tegelijk het standaardportfolio op.
+# Met coalescing moet de wrapper per chunk precies één request zien en krijgen alle
+# aanroepers dezelfde data (of dezelfde fout); zonder coalescing ziet hij er N.
+# Faalt (exit 1) als dat niet klopt.
+#
+# Gebruik: python benchmarks/bench_single_flight.py --callers 50 --latency-ms 200
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from fake_vemcount_api import start_server
+from roi_core import DEFAULT_SHOP_IDS
+from vemcount_client import VemcountAPIError, chunk_shop_ids, fetch_report_frame, get_single_flight
+
+
+def run_callers(url, n_callers, streaming, shop_ids):
+    """Start n_callers tegelijk (via een barrier); geeft (resultaten, fouten, seconden)."""
+    barrier = threading.Barrier(n_callers)
+    results, errors = [None] * n_callers, [None] * n_callers
+
+    def caller(i):
+        barrier.wait()
+        try:
+            # Zonder retries, zodat alleen de coalescing telt
+            results[i] = fetch_report_frame(url, shop_ids, period="last_year", step="day", streaming=streaming, retries=0)
+        except VemcountAPIError as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(n_callers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--callers", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--shops", type=int, default=len(DEFAULT_SHOP_IDS), help="aantal winkels per aanroeper")
+    args = parser.parse_args()
+
+    extra_shops = list(range(30000, 30000 + max(0, args.shops - len(DEFAULT_SHOP_IDS))))
+    shop_ids = (DEFAULT_SHOP_IDS + extra_shops)[:args.shops]
+    n_chunks = len(chunk_shop_ids(shop_ids))
+    flights = get_single_flight()
+    failures = []
+
+    print(f"{'mode':<24} {'callers':>7} {'upstream':>9} {'shared':>7} {'seconds':>8}")
+    for label, coalesce, streaming, error_rate in [
+        ("coalesced", True, False, 0.0),
+        ("coalesced+streaming", True, True, 0.0),
+        ("coalesced, upstream 503", True, False, 1.0),
+        ("no coalescing", False, False, 0.0),
+    ]:
+        calls = []
+        server, url = start_server(latency_ms=args.latency_ms, error_rate=error_rate, calls=calls)
+        flights.enabled = coalesce
+        flights.reset_stats()
+        try:
+            results, errors, seconds = run_callers(url, args.callers, streaming, shop_ids)
+        finally:
+            server.shutdown()
+            flights.enabled = True
+        stats = flights.stats()
+        print(f"{label:<24} {args.callers:>7} {len(calls):>9} {stats['shared']:>7} {seconds:>8.2f}")
+
+        expected_calls = n_chunks if coalesce else args.callers * n_chunks
+        if len(calls) != expected_calls:
+            failures.append(f"{label}: {len(calls)} upstream requests, expected {expected_calls}")
+        if stats["in_flight"]:
+            failures.append(f"{label}: {stats['in_flight']} calls still registered as in flight")
+        if error_rate:
+            if not all(isinstance(error, VemcountAPIError) for error in errors):
+                failures.append(f"{label}: not every caller saw the upstream error")
+        elif any(errors) or any(not results[0].equals(result) for result in results):
+            failures.append(f"{label}: callers did not all receive the same data")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Identical in-flight requests share one upstream call")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
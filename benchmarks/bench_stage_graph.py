@@ -0,0 +1,197 @@
+# 🧩 Stage graph: welke stappen rekent de calculatorpagina per soort wijziging opnieuw?
+#
+# Draait de pagina met AppTest tegen de lokale stand-in en leest na elke interactie
+# de hit/miss-tellers van de stage graph:
+#   - rerun zonder wijziging     → geen enkele stap rekent opnieuw;
+#   - andere boost               → alleen simulatie en grafieken, niet de aggregaten/sweep;
+#   - winkels erbij + klik       → alleen de nieuwe winkels gaan naar upstream;
+#   - terug naar de oude selectie → de aggregaten komen uit het geheugen.
+# Vergelijkt daarnaast de rerun-tijd met en zonder memo (STAGE_CACHE_MAX_BYTES = 0),
+# en controleert content-hashing (ook van de functie: een andere functie of een ander
+# gebonden partial-argument rekent opnieuw) en het bytebudget van `StageGraph` los.
+# Faalt (exit 1) als een stap onnodig opnieuw rekent of het budget wordt overschreden.
+#
+# Gebruik: python benchmarks/bench_stage_graph.py --repeats 5
+import argparse
+import os
+import statistics
+import sys
+import time
+from functools import partial
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+import numpy as np
+
+from fake_vemcount_api import start_server
+from roi_core import DEFAULT_SHOP_IDS
+from stage_graph import StageGraph, content_hash, get_stage_graph
+
+ROOT = os.path.abspath(os.path.dirname(__file__) + '/../')
+BOOST_STAGES = {"simulate", "store_chart", "weekday_heatmap"}
+
+
+def misses_since(graph, before):
+    """Stappen die sinds `before` (een stats()-snapshot) opnieuw hebben gerekend."""
+    previous = {row["stage"]: row["misses"] for row in before}
+    return {row["stage"] for row in graph.stats() if row["misses"] > previous.get(row["stage"], 0)}
+
+
+def requested_shops(calls, since):
+    return sorted({int(shop_id) for query in calls[since:] for shop_id in query.get("data", [])})
+
+
+def make_app(url, max_bytes=None):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "pages", "zaterdag-conversie-calculator.py"), default_timeout=60)
+    at.secrets["API_URL"] = url
+    at.secrets["HISTORY_DIR"] = ""
+    if max_bytes is not None:
+        at.secrets["STAGE_CACHE_MAX_BYTES"] = max_bytes
+    return at
+
+
+def boost_rerun_ms(at, repeats):
+    timings = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        at.slider[0].set_value(1.0 + 0.1 * (i % 2)).run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def round_sum(df, digits):
+    return round(float(df["turnover"].sum()), digits)
+
+
+def check_graph(failures):
+    """Content-hashing en bytebudget zonder Streamlit."""
+    import pandas as pd
+
+    df = pd.DataFrame({"shop_id": np.arange(1000), "turnover": np.linspace(0, 1, 1000)})
+    if content_hash(df) != content_hash(df.copy()):
+        failures.append("equal frames hash differently")
+    changed = df.copy()
+    changed.loc[500, "turnover"] += 1e-9
+    if content_hash(df) == content_hash(changed):
+        failures.append("a changed value did not change the hash")
+
+    # De functie hoort bij de key: wisselen van functie of partial-argument rekent opnieuw,
+    # een opnieuw aangemaakte maar gelijke lambda (zoals bij elke Streamlit-rerun) niet
+    graph = StageGraph()
+    source = graph.source("df", df)
+    for label, func in [
+        ("sum", lambda d: d["turnover"].sum()),
+        ("same lambda again", lambda d: d["turnover"].sum()),
+        ("other function", lambda d: d["turnover"].max()),
+        ("partial", partial(round_sum, digits=2)),
+        ("partial, other keyword", partial(round_sum, digits=3)),
+    ]:
+        before = graph.stats()
+        value = graph.run("func_key", func, source).value
+        recomputed = bool(misses_since(graph, before))
+        if recomputed != (label != "same lambda again"):
+            failures.append(f"stage key with '{label}': recomputed={recomputed}")
+        if value != func(df):
+            failures.append(f"stage with '{label}' returned {value}, expected {func(df)}")
+
+    graph = StageGraph(max_bytes=100_000)
+    source = graph.source("df", df)
+
+    def shifted(d, s):
+        return d.assign(turnover=d["turnover"] + s)
+
+    for shift in range(20):
+        graph.run("shifted", shifted, source, shift)
+    graph.run("shifted", shifted, source, 19)
+    row = graph.stats()[0]
+    if graph.nbytes() > graph.max_bytes:
+        failures.append(f"stage graph holds {graph.nbytes()} bytes, budget {graph.max_bytes}")
+    if row["evictions"] == 0 or row["hits"] != 1 or row["misses"] != 20:
+        failures.append(f"byte-bounded LRU: {row}")
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    calls = []
+    server, url = start_server(calls=calls)
+    graph = get_stage_graph()
+    try:
+        at = make_app(url)
+        at.run()
+        first_shops = DEFAULT_SHOP_IDS[:8]
+        at.multiselect[0].set_value(first_shops).run()
+        at.button[0].click().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+        steps = []
+        before = graph.stats()
+        at.run()
+        steps.append(("rerun, nothing changed", misses_since(graph, before), 0))
+        if steps[-1][1]:
+            failures.append(f"an unchanged rerun recomputed {sorted(steps[-1][1])}")
+
+        before = graph.stats()
+        n_calls = len(calls)
+        at.slider[0].set_value(2.0).run()
+        steps.append(("boost 1.0 → 2.0", misses_since(graph, before), len(calls) - n_calls))
+        if steps[-1][1] != BOOST_STAGES or steps[-1][2]:
+            failures.append(f"a boost change recomputed {sorted(steps[-1][1])} (expected {sorted(BOOST_STAGES)})")
+
+        before = graph.stats()
+        n_calls = len(calls)
+        at.multiselect[0].set_value(DEFAULT_SHOP_IDS).run()
+        at.button[0].click().run()
+        new_shops = requested_shops(calls, n_calls)
+        steps.append(("+2 stores, click", misses_since(graph, before), len(calls) - n_calls))
+        if new_shops != sorted(DEFAULT_SHOP_IDS[8:]):
+            failures.append(f"adding two stores fetched {new_shops}")
+
+        before = graph.stats()
+        n_calls = len(calls)
+        at.multiselect[0].set_value(first_shops).run()
+        at.button[0].click().run()
+        steps.append(("back to 8 stores, click", misses_since(graph, before), len(calls) - n_calls))
+        if "saturday_aggregates" in steps[-1][1] or steps[-1][2]:
+            failures.append("returning to an earlier selection recomputed its aggregates or fetched again")
+
+        memo_ms = boost_rerun_ms(at, args.repeats)
+        stage_stats = graph.stats()
+
+        graph.clear()
+        plain = make_app(url, max_bytes=0)
+        plain.run()
+        plain.multiselect[0].set_value(first_shops).run()
+        plain.button[0].click().run()
+        plain_ms = boost_rerun_ms(plain, args.repeats)
+    finally:
+        server.shutdown()
+
+    print(f"{'change':<26} {'upstream':>8}  recomputed stages")
+    for label, stages, n_requests in steps:
+        print(f"{label:<26} {n_requests:>8}  {', '.join(sorted(stages)) or '-'}")
+    print(f"boost rerun: {memo_ms:.0f} ms with stage memo, {plain_ms:.0f} ms without")
+    print(f"{'stage':<20} {'hits':>5} {'misses':>6} {'hit rate':>8} {'compute ms':>10}")
+    for row in stage_stats:
+        print(f"{row['stage']:<20} {row['hits']:>5} {row['misses']:>6} {row['hit_rate']:>8} {row['compute_ms']:>10}")
+
+    lru = check_graph(failures)
+    print(f"byte-bounded LRU: {lru['entries']} entries, {lru['bytes']:,} bytes, {lru['evictions']} evictions")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Reruns only recompute the stages whose inputs changed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
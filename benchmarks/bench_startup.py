@@ -0,0 +1,106 @@
+# 🚀 Opstarttijd: importprofiel en time-to-first-render van app.py en de calculatorpagina
+#
+# Elke meting draait in een vers Python-proces (koude imports). Streamlit zelf en
+# de AppTest-harness worden vóór de meting geladen: die kosten betaalt de server
+# één keer, los van onze scripts. Gemeten wordt de eerste render zonder klik, dus
+# alleen widgets; pandas, numpy, requests en plotly.express horen dan nog niet
+# geladen te zijn. Faalt (exit 1) boven de drempel of als een zware module toch
+# bij de eerste render wordt geïmporteerd.
+#
+# Gebruik:
+#   python benchmarks/bench_startup.py                       # controle met standaarddrempels
+#   python benchmarks/bench_startup.py --importtime 15        # + top-15 importtijden (-X importtime)
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.dirname(__file__) + '/../')
+TARGETS = {
+    "app.py": "app.py",
+    "calculator": os.path.join("pages", "zaterdag-conversie-calculator.py"),
+}
+FULL_PAGE_MODULES = ["streamlit", "roi_core", "vemcount_client", "simulation", "presentation", "history_store", "plotly.express"]
+INTERPRETER_STARTUP = {"site", "encodings", "io", "_frozen_importlib_external"}
+LAZY_MODULES = ["pandas", "numpy", "requests", "plotly.express", "pyarrow"]
+
+FIRST_RENDER_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+preloaded = set(sys.modules)
+start = time.perf_counter()
+at = AppTest.from_file({path!r}, default_timeout=60)
+at.secrets["API_URL"] = "http://127.0.0.1:9/get-report"  # eerste render doet geen request
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "exception": [str(e.value) for e in at.exception],
+    "heavy": [m for m in {lazy!r} if m in sys.modules and m not in preloaded],
+}}))
+"""
+
+
+def measure_first_render(path):
+    snippet = FIRST_RENDER_SNIPPET.format(path=os.path.join(ROOT, path), lazy=LAZY_MODULES)
+    result = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(modules, top):
+    """Top-N pakketten op cumulatieve importtijd volgens `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Alleen pakketten op het hoogste niveau (geen inspringing in de boom)
+        if not name.startswith("  ") and name.strip() not in INTERPRETER_STARTUP:
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-app-ms", type=float, default=500.0)
+    parser.add_argument("--max-page-ms", type=float, default=1000.0)
+    parser.add_argument("--repeats", type=int, default=3, help="verse processen per doel; de mediaan telt")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="toon de top-N importtijden")
+    args = parser.parse_args()
+
+    thresholds = {"app.py": args.max_app_ms, "calculator": args.max_page_ms}
+    failures = []
+    print(f"{'target':<12} {'first render ms':>16} {'budget ms':>10}  heavy modules loaded")
+    for name, path in TARGETS.items():
+        runs = [measure_first_render(path) for _ in range(args.repeats)]
+        ms = sorted(run["ms"] for run in runs)[len(runs) // 2]
+        heavy = sorted({module for run in runs for module in run["heavy"]})
+        print(f"{name:<12} {ms:>16.0f} {thresholds[name]:>10.0f}  {', '.join(heavy) or '-'}")
+        if runs[-1]["exception"]:
+            failures.append(f"{name} raised {runs[-1]['exception'][0]}")
+        if ms > thresholds[name]:
+            failures.append(f"{name} first render {ms:.0f} ms > {thresholds[name]:.0f} ms")
+        if heavy:
+            failures.append(f"{name} imports {', '.join(heavy)} before any data is requested")
+
+    if args.importtime:
+        print("\n-X importtime: alles wat een pagina met resultaten nodig heeft (cumulatief)")
+        for cumulative_ms, package in import_profile(FULL_PAGE_MODULES, args.importtime):
+            print(f"  {cumulative_ms:>8.1f} ms  {package}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# 🧠 Piekgeheugen: response.json() + normalisatie vs streaming parse
+#
+# Schrijft een grote synthetische /get-report response naar schijf (shop voor shop,
+# zodat de generator zelf weinig geheugen gebruikt) en meet per modus de piek-RSS
+# in een aparte subprocess. Controleert daarna dat de streaming parse dezelfde frame
+# oplevert als de normalisatie van de volledige JSON (ook compact).
+# Faalt (exit 1) als de frames verschillen.
+#
+# Gebruik: python benchmarks/bench_streaming.py [--shops 200] [--days 365] [--step hour]
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from synthetic import make_shop_content, make_shop_ids, make_timestamps
+
+
+def write_fixture(path, n_shops, n_days, step):
+    timestamps = make_timestamps(n_days=n_days, step=step)
+    with open(path, "w") as f:
+        f.write('{"data": {"last_year": {')
+        for i, shop_id in enumerate(make_shop_ids(n_shops)):
+            if i:
+                f.write(", ")
+            f.write(f'"{shop_id}": ')
+            json.dump(make_shop_content(shop_id, timestamps, step), f)
+        f.write("}}}")
+
+
+def run_mode(mode, path):
+    # Draait in een verse interpreter, zodat ru_maxrss alleen deze modus meet
+    from data_transformer import normalize_vemcount_response, normalize_vemcount_stream
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "json":
+        with open(path, "rb") as f:
+            df = normalize_vemcount_response(json.load(f)["data"]["last_year"])
+    else:
+        with open(path, "rb") as f:
+            df = normalize_vemcount_stream(f)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "mode": mode,
+        "rows": len(df),
+        "seconds": round(elapsed, 3),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        "baseline_rss_mb": round(baseline / 1024, 1),
+        "peak_rss_mb": round(peak / 1024, 1),
+    }))
+
+
+def check_equal(path):
+    """Geeft per variant de afwijking tussen stream en volledige JSON, of None als ze gelijk zijn."""
+    import pandas as pd
+    from data_transformer import normalize_vemcount_response, normalize_vemcount_stream
+
+    with open(path, "rb") as f:
+        response = json.load(f)["data"]["last_year"]
+    mismatches = {}
+    for compact in [False, True]:
+        with open(path, "rb") as f:
+            streamed = normalize_vemcount_stream(f, compact=compact)
+        try:
+            pd.testing.assert_frame_equal(streamed, normalize_vemcount_response(response, compact=compact))
+        except AssertionError as e:
+            mismatches["compact" if compact else "default"] = str(e)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shops", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--step", choices=["day", "hour"], default="day")
+    parser.add_argument("--mode", choices=["json", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--fixture", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.fixture)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.json")
+        write_fixture(path, args.shops, args.days, args.step)
+        print(f"fixture: {args.shops} shops x {args.days} days ({args.step}), {os.path.getsize(path) / 2**20:.1f} MB")
+        for mode in ["json", "stream"]:
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--fixture", path],
+                check=True, capture_output=True, text=True,
+            )
+            print(out.stdout.strip())
+        mismatches = check_equal(path)
+
+    if mismatches:
+        for variant, message in mismatches.items():
+            print(f"❌ stream and full-JSON frames differ ({variant}): {message}")
+        return 1
+    print("✅ The streaming parse returns the same frame as the full-JSON normalisation")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
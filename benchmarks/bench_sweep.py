@@ -0,0 +1,43 @@
+# ⏱️ Benchmark: gevoeligheidssweep (shops × weekdagen × boosts) in één broadcast
+#
+# Gebruik: python benchmarks/bench_sweep.py [--shops 1000 5000] [--steps 50]
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+import numpy as np
+
+from data_transformer import normalize_vemcount_response
+from simulation import compute_weekday_potential, sweep_from_weekday_potential
+from synthetic import make_vemcount_payload
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shops", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--steps", type=int, default=50)
+    args = parser.parse_args()
+
+    boost_values = np.linspace(0.1, 5.0, args.steps)
+    print(f"{'shops':>6} {'precompute (s)':>15} {'sweep (s)':>10} {'tensor':>16}")
+    for n_shops in args.shops:
+        df = normalize_vemcount_response(make_vemcount_payload(n_shops, n_days=args.days))
+
+        start = time.perf_counter()
+        weekday_potential = compute_weekday_potential(df)
+        precompute = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sweep = sweep_from_weekday_potential(weekday_potential, boost_values)
+        elapsed = time.perf_counter() - start
+
+        shape = "x".join(str(n) for n in sweep["extra_turnover"].shape)
+        print(f"{n_shops:>6} {precompute:>15.3f} {elapsed:>10.4f} {shape:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# ⏱️ Tabel-rendering: volledige Styler vs gepagineerde weergave bij groeiend aantal winkels
+#
+# Gebruik: python benchmarks/bench_table.py [--stores 100 1000 10000 50000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+import numpy as np
+import pandas as pd
+
+from presentation import build_table_page, sort_and_paginate, style_table, style_table_page
+
+
+def make_results(n_stores, seed=0):
+    rng = np.random.default_rng(seed)
+    total = rng.uniform(2e5, 5e6, n_stores)
+    saturday = total * rng.uniform(0.12, 0.2, n_stores)
+    extra = saturday * rng.uniform(0.005, 0.05, n_stores)
+    return pd.DataFrame({
+        "shop_id": np.arange(26000, 26000 + n_stores),
+        "original_total_turnover": total,
+        "original_saturday_turnover": saturday,
+        "extra_turnover": extra,
+        "store_name": [f"Store {i}" for i in range(n_stores)],
+        "new_total_turnover": total + extra,
+        "growth_pct": extra / total * 100,
+    })
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stores", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--full-limit", type=int, default=10000, help="grootste aantal voor de volledige Styler")
+    args = parser.parse_args()
+
+    print(f"{'stores':>7} {'full Styler (s)':>16} {'paged (s)':>10}")
+    for n_stores in args.stores:
+        results = make_results(n_stores)
+        full = timed(lambda: style_table(results).to_html()) if n_stores <= args.full_limit else float("nan")
+        paged = timed(lambda: style_table_page(build_table_page(
+            sort_and_paginate(results, "extra_turnover", False, 1, args.page_size)[0]
+        )).to_html())
+        print(f"{n_stores:>7} {full:>16.3f} {paged:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# 🧪 Lokale stand-in voor de Vemcount-wrapper (/get-report)
+#
+# Zelfde contract als de FastAPI-wrapper: herhaalde `data`/`data_output`-params,
+# `period` (last_year, this_year of date + form_date_from/form_date_to), `step`
+# (day/hour) en een response `data -> <period> -> shop -> dates -> data`.
+# De data is synthetisch en deterministisch per (seed, shop_id, datum), dus
+# overlappende of per maand opgesplitste requests geven dezelfde waarden.
+# Met `openings` ({shop_id: datum}) heeft een shop pas data vanaf zijn openingsdatum.
+#
+# Gebruik: python benchmarks/fake_vemcount_api.py --port 8765 --latency-ms 150 --error-rate 0.05
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from synthetic import make_shop_content, make_timestamps
+
+
+def resolve_period(query, today=None):
+    """Geeft (response-sleutel, eerste dag, aantal dagen) voor de query-params."""
+    today = today or date.today()
+    period = query.get("period", ["last_year"])[0]
+    if period == "date":
+        start = date.fromisoformat(query["form_date_from"][0])
+        end = date.fromisoformat(query["form_date_to"][0])
+    elif period == "this_year":
+        start, end = date(today.year, 1, 1), today - timedelta(days=1)
+    elif period == "last_year":
+        start, end = date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+    else:
+        raise ValueError(f"unsupported period: {period}")
+    return period, start, max(0, (end - start).days + 1)
+
+
+@lru_cache(maxsize=4096)
+def shop_json(shop_id, start, n_days, step, seed):
+    # Geserialiseerd per shop gecachet, zodat de server zelf geen bottleneck wordt in benchmarks
+    return json.dumps(make_shop_content(shop_id, make_timestamps(start, n_days, step), step, seed))
+
+
+class FakeVemcountHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    malformed_rate = 0.0
+    seed = 0
+    rng = random.Random(0)
+    today = None
+    calls = None
+    openings = {}
+
+    def do_GET(self):
+        self.do_POST()
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        if parsed.path.rstrip("/") != "/get-report":
+            self._send(404, b'{"detail": "Not Found"}')
+            return
+        query = parse_qs(parsed.query)
+        if self.calls is not None:
+            self.calls.append(query)
+
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.rng.uniform(0, self.jitter))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self._send(503, b'{"detail": "Injected upstream error"}')
+            return
+        if self.malformed_rate and self.rng.random() < self.malformed_rate:
+            # Status 200 met een body die geen JSON is (bijv. een foutpagina van een proxy)
+            self._send(200, b"<html><body>Upstream temporarily unavailable</body></html>")
+            return
+
+        try:
+            period, start, n_days = resolve_period(query, self.today)
+            shop_ids = [int(shop_id) for shop_id in query.get("data", [])]
+            step = query.get("step", ["day"])[0]
+        except (KeyError, ValueError) as e:
+            self._send(422, json.dumps({"detail": str(e)}).encode())
+            return
+
+        shops = ", ".join(f'"{shop_id}": {self._shop_json(shop_id, start, n_days, step)}' for shop_id in shop_ids)
+        self._send(200, f'{{"data": {{"{period}": {{{shops}}}}}}}'.encode())
+
+    def _shop_json(self, shop_id, start, n_days, step):
+        opened = self.openings.get(shop_id)
+        if opened is not None and opened > start:
+            n_days = max(0, n_days - (opened - start).days)
+            start = opened
+        return shop_json(shop_id, start, n_days, step, self.seed)
+
+    def _send(self, status, body):
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gaf het op (timeout); hoort bij de latency-scenario's
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=0, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=0, today=None, calls=None,
+                 malformed_rate=0.0, openings=None):
+    """Start de stand-in in een achtergrondthread; geeft (server, url) terug.
+
+    `calls` is een optionele lijst waarin elke ontvangen query wordt bijgehouden;
+    `openings` ({shop_id: datum}) geeft shops die pas later in het bereik data hebben.
+    """
+    handler = type("Handler", (FakeVemcountHandler,), {
+        "latency": latency_ms / 1000.0,
+        "jitter": jitter_ms / 1000.0,
+        "error_rate": error_rate,
+        "malformed_rate": malformed_rate,
+        "seed": seed,
+        "rng": random.Random(seed),
+        "today": today,
+        "calls": calls,
+        "openings": dict(openings or {}),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/get-report"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="aandeel 200's met een niet-JSON body")
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.seed,
+                               malformed_rate=args.malformed_rate)
+    print(f"Fake Vemcount API on {url} (zet API_URL in .streamlit/secrets.toml)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# ⏱️ Micro-benchmarks met baselines voor transform, simulatie en presentatie
+#
+# Meet per functie en schaal de mediane wall time en de piekallocatie (tracemalloc)
+# op synthetische Vemcount payloads; volledig offline. Vergelijkt met een
+# baselinebestand en faalt (exit 1) als een functie meer dan --tolerance trager is.
+# Een functie zonder baseline (bijv. een verse checkout: baselines.json wordt niet
+# meegeleverd) geeft een duidelijke waarschuwing, maar geen fout.
+#
+# Gebruik:
+#   python benchmarks/run_benchmarks.py --update-baseline   # baseline vastleggen
+#   python benchmarks/run_benchmarks.py --tolerance 25      # controleren
+#
+# Baselines zijn machine-afhankelijk: leg ze vast op de machine waarop je vergelijkt.
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from data_transformer import normalize_vemcount_response
+from presentation import build_table_page, sort_and_paginate, style_table, style_table_page
+from simulation import simulate_conversion_boost_on_saturdays
+from synthetic import make_vemcount_payload
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines.json")
+SCALES = {"small": 10, "medium": 100, "large": 1000}
+
+
+def make_cases(scales):
+    cases = []
+    for scale in scales:
+        payload = make_vemcount_payload(SCALES[scale], n_days=365)
+        df = normalize_vemcount_response(payload)
+        results = simulate_conversion_boost_on_saturdays(df, 1.0)
+        cases += [
+            (f"normalize_vemcount_response[{scale}]", lambda p=payload: normalize_vemcount_response(p)),
+            (f"simulate_conversion_boost_on_saturdays[{scale}]", lambda d=df: simulate_conversion_boost_on_saturdays(d, 1.0)),
+            (f"style_table[{scale}]", lambda r=results: style_table(r).to_html()),
+            (f"table_page[{scale}]", lambda r=results: style_table_page(build_table_page(sort_and_paginate(r)[0])).to_html()),
+        ]
+    return cases
+
+
+def measure(func, repeats):
+    func()  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": statistics.median(timings), "peak_alloc_bytes": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(SCALES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=25.0, help="toegestane vertraging in procenten")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    current, regressions, unbaselined = {}, [], []
+    print(f"{'benchmark':<50} {'ms':>9} {'base ms':>9} {'Δ':>7} {'peak MB':>8}")
+    for name, func in make_cases(args.scales):
+        result = measure(func, args.repeats)
+        current[name] = result
+        base = baseline.get(name)
+        delta = ""
+        if base:
+            change = (result["seconds"] / base["seconds"] - 1) * 100
+            delta = f"{change:+.0f}%"
+            if change > args.tolerance:
+                regressions.append(name)
+        else:
+            delta = "new"
+            unbaselined.append(name)
+        print(
+            f"{name:<50} {result['seconds'] * 1000:>9.1f} "
+            f"{(base['seconds'] * 1000 if base else float('nan')):>9.1f} {delta:>7} "
+            f"{result['peak_alloc_bytes'] / 2**20:>8.1f}"
+        )
+
+    if args.update_baseline:
+        baseline.update(current)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if unbaselined:
+        print(f"⚠️ {len(unbaselined)} benchmark(s) without a baseline in {args.baseline}, not compared: {', '.join(unbaselined)}")
+        print("   Record one on this machine: python benchmarks/run_benchmarks.py --update-baseline")
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark(s) more than {args.tolerance:.0f}% slower than baseline: {', '.join(regressions)}")
+        return 1
+    compared = len(current) - len(unbaselined)
+    print(f"✅ No regressions in {compared} compared benchmark(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
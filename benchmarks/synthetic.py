@@ -0,0 +1,63 @@
+# 🧪 Synthetische Vemcount payloads voor benchmarks (deterministisch per seed)
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+FIRST_SHOP_ID = 26000
+
+
+def make_shop_ids(n_shops, first_shop_id=FIRST_SHOP_ID):
+    return list(range(first_shop_id, first_shop_id + n_shops))
+
+
+def make_timestamps(start=date(2024, 1, 1), n_days=365, step="day"):
+    start = datetime(start.year, start.month, start.day)
+    if step == "hour":
+        return [start + timedelta(hours=h) for h in range(n_days * 24)]
+    return [start + timedelta(days=d) for d in range(n_days)]
+
+
+def _yearly_draws(shop_id, year, step, seed):
+    # Per kalenderjaar getrokken, zodat een dag dezelfde waarden heeft ongeacht het opgevraagde bereik
+    rng = np.random.default_rng([seed, int(shop_id), year])
+    n = 366 * 24 if step == "hour" else 366
+    count_in = rng.integers(20 if step == "hour" else 200, 80 if step == "hour" else 2000, n)
+    conversion_rate = rng.uniform(5, 35, n).round(2)
+    sales_per_transaction = rng.uniform(15, 90, n).round(2)
+    return count_in, conversion_rate, sales_per_transaction
+
+
+def make_shop_content(shop_id, timestamps, step="day", seed=0):
+    """Eén shop in de vorm `{"dates": {label: {"data": {...}}}}`, reproduceerbaar per (seed, shop_id, datum)."""
+    count_in, conversion_rate, sales_per_transaction = (np.empty(len(timestamps), dtype=dtype) for dtype in ("int64", "float64", "float64"))
+    years = np.array([ts.year for ts in timestamps], dtype=np.int64)
+    for year in np.unique(years):
+        mask = years == year
+        offsets = [ts - datetime(int(year), 1, 1) for ts in np.asarray(timestamps, dtype=object)[mask]]
+        index = [int(o.total_seconds() // 3600) if step == "hour" else o.days for o in offsets]
+        draws = _yearly_draws(shop_id, int(year), step, seed)
+        count_in[mask], conversion_rate[mask], sales_per_transaction[mask] = (draw[index] for draw in draws)
+    transactions = np.floor(count_in * conversion_rate / 100)
+    turnover = (transactions * sales_per_transaction).round(2)
+
+    dates = {}
+    for i, ts in enumerate(timestamps):
+        dt = ts.strftime("%Y-%m-%d %H:%M:%S") if step == "hour" else ts.strftime("%Y-%m-%d")
+        spt = float(sales_per_transaction[i]) if transactions[i] else None
+        dates[f"date_{dt}"] = {
+            "data": {
+                "dt": dt,
+                "count_in": int(count_in[i]),
+                "conversion_rate": float(conversion_rate[i]),
+                "turnover": float(turnover[i]),
+                "sales_per_transaction": spt,
+            }
+        }
+    return {"dates": dates}
+
+
+def make_vemcount_payload(n_shops, n_days=365, start=date(2024, 1, 1), step="day", seed=0, shop_ids=None):
+    """Payload zoals `data -> last_year` van de wrapper: `{shop_id: {"dates": ...}}`."""
+    shop_ids = shop_ids if shop_ids is not None else make_shop_ids(n_shops)
+    timestamps = make_timestamps(start, n_days, step)
+    return {str(shop_id): make_shop_content(shop_id, timestamps, step, seed) for shop_id in shop_ids}
@@ -0,0 +1,201 @@
+# 🔥 Cache warmer voor de standaardportfolio's
+#
+# Haalt de geconfigureerde portfolio's (`WARM_PORTFOLIOS`) op de achtergrond op,
+# normaliseert ze in de procesbrede KPI-cache en rekent hun zaterdag-aggregaten
+# vast voor. Zo is de eerste klik op "Run simulation" net zo snel als de volgende.
+# Items die vóór de volgende ronde zouden verlopen, worden alvast ververst.
+#
+# In de app: zet `CACHE_WARMER_ENABLED = true` in de secrets; de calculatorpagina
+# start dan één warmer per proces. Los (vult alleen de lokale historie op schijf,
+# want de cache zelf is per proces):
+#   python cache_warmer.py --api-url http://127.0.0.1:8000/get-report --once
+import argparse
+import logging
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from roi_core import (
+    DEFAULT_SHOP_IDS,
+    SATURDAY_AGGREGATES,
+    SETTING_DEFAULTS,
+    fetch_kpi_data,
+    get_kpi_cache,
+    get_kpi_data_for_stores,
+    get_saturday_aggregates,
+    load_settings,
+)
+
+LOGGER = logging.getLogger("roi.warmer")
+WARM_PERIODS = ("last_year",)
+
+
+def warm_settings(settings):
+    """Minder chunk-requests tegelijk dan een sessie, zodat de warmer gebruikers niet verdringt."""
+    return dict(settings, API_MAX_IN_FLIGHT=min(settings["API_MAX_IN_FLIGHT"], settings["CACHE_WARMER_MAX_IN_FLIGHT"]))
+
+
+def warm_portfolio(name, shop_ids, period="last_year", step="day", settings=None, refresh_margin=0.0):
+    """Warmt één portfolio; geeft een regel voor het rapport (geen exceptions)."""
+    settings = warm_settings(settings or load_settings())
+    cache = get_kpi_cache(settings)
+    errors = []
+    start = time.perf_counter()
+
+    # Verloopt binnen `refresh_margin` seconden: nu al opnieuw ophalen, niet pas bij de gebruiker
+    expiring_after = settings["KPI_CACHE_TTL_SECONDS"] - refresh_margin
+    expiring = [
+        shop_id for shop_id in shop_ids
+        if (age := cache.age(shop_id, period, step)) is not None and age >= expiring_after
+    ]
+    if expiring:
+        df_expiring = fetch_kpi_data(expiring, period=period, step=step, settings=settings, on_error=errors.append)
+        if df_expiring is not None:
+            cache.store_frame(df_expiring, expiring, period, step)
+
+    df = get_kpi_data_for_stores(shop_ids, period=period, step=step, settings=settings, on_error=errors.append)
+    if not df.empty:
+        get_saturday_aggregates(shop_ids, period=period, step=step, df=df, settings=settings)
+    return {
+        "portfolio": name,
+        "period": period,
+        "shops": len(shop_ids),
+        "refreshed": len(expiring),
+        "rows": len(df),
+        "seconds": round(time.perf_counter() - start, 3),
+        "error": errors[0] if errors else None,
+    }
+
+
+def warm_once(portfolios, settings=None, periods=WARM_PERIODS, step="day", refresh_margin=0.0):
+    """Eén ronde over alle portfolio's × periodes, met `CACHE_WARMER_CONCURRENCY` tegelijk."""
+    settings = settings or load_settings()
+    jobs = [(name, list(shop_ids), period) for name, shop_ids in portfolios.items() for period in periods]
+    with ThreadPoolExecutor(max_workers=max(1, settings["CACHE_WARMER_CONCURRENCY"]), thread_name_prefix="kpi-warm") as pool:
+        futures = [
+            pool.submit(warm_portfolio, name, shop_ids, period, step, settings, refresh_margin)
+            for name, shop_ids, period in jobs
+        ]
+        return [future.result() for future in futures]
+
+
+def freshness_report(portfolios, settings=None, periods=WARM_PERIODS, step="day"):
+    """Per portfolio: hoeveel shops vers, verlopen of afwezig zijn, en de oudste leeftijd."""
+    settings = settings or load_settings()
+    cache = get_kpi_cache(settings)
+    ttl = settings["KPI_CACHE_TTL_SECONDS"]
+    rows = []
+    for name, shop_ids in portfolios.items():
+        for period in periods:
+            ages = [cache.age(shop_id, period, step) for shop_id in shop_ids]
+            present = [age for age in ages if age is not None]
+            rows.append({
+                "portfolio": name,
+                "period": period,
+                "shops": len(shop_ids),
+                "fresh": sum(age < ttl for age in present),
+                "stale": sum(age >= ttl for age in present),
+                "missing": len(ages) - len(present),
+                "aggregates": sum(
+                    cache.get_derived(shop_id, period, step, SATURDAY_AGGREGATES) is not None for shop_id in shop_ids
+                ),
+                "oldest_age_s": round(max(present), 1) if present else None,
+            })
+    return rows
+
+
+class CacheWarmer:
+    def __init__(self, portfolios, settings, periods=WARM_PERIODS, step="day"):
+        self.portfolios = portfolios
+        self.settings = settings
+        self.periods = periods
+        self.step = step
+        self.interval = settings["CACHE_WARMER_INTERVAL_SECONDS"]
+        self.jitter = min(settings["CACHE_WARMER_JITTER_SECONDS"], self.interval / 2)
+        self.last_report = []
+        self.last_run_at = None
+        self.runs = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="kpi-warmer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Willekeurige start en interval: meerdere processen/replica's lopen niet in de pas
+        delay = random.uniform(0, self.jitter)
+        while not self._stop.wait(delay):
+            try:
+                # Alles wat vóór de volgende ronde verloopt, nu al verversen
+                self.last_report = warm_once(
+                    self.portfolios, self.settings, self.periods, self.step, refresh_margin=self.interval + self.jitter
+                )
+                for row in self.last_report:
+                    if row["error"]:
+                        LOGGER.warning("Warming %s failed: %s", row["portfolio"], row["error"])
+            except Exception:
+                LOGGER.exception("Cache warmer run failed")
+            self.last_run_at = time.time()
+            self.runs += 1
+            delay = self.interval + random.uniform(-self.jitter, self.jitter)
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def start_cache_warmer(settings=None):
+    """Start de warmer één keer per proces (idempotent); geeft de lopende warmer terug."""
+    global _warmer
+    settings = settings or load_settings()
+    with _warmer_lock:
+        if _warmer is None:
+            portfolios = {name: [int(shop_id) for shop_id in shop_ids] for name, shop_ids in settings["WARM_PORTFOLIOS"].items()}
+            _warmer = CacheWarmer(portfolios, settings).start()
+        return _warmer
+
+
+def get_cache_warmer():
+    return _warmer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fetch the default portfolios into the KPI cache and local history.")
+    parser.add_argument("--api-url", required=True)
+    parser.add_argument("--shops", type=int, nargs="*", default=DEFAULT_SHOP_IDS, help="portfolio 'default'")
+    parser.add_argument("--period", action="append", help="standaard: last_year")
+    parser.add_argument("--history-dir", default=SETTING_DEFAULTS["HISTORY_DIR"])
+    parser.add_argument("--once", action="store_true", help="één ronde en stoppen")
+    parser.add_argument("--interval", type=float, default=SETTING_DEFAULTS["CACHE_WARMER_INTERVAL_SECONDS"])
+    parser.add_argument("--jitter", type=float, default=SETTING_DEFAULTS["CACHE_WARMER_JITTER_SECONDS"])
+    parser.add_argument("--concurrency", type=int, default=SETTING_DEFAULTS["CACHE_WARMER_CONCURRENCY"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    settings = load_settings({
+        "API_URL": args.api_url,
+        "HISTORY_DIR": args.history_dir,
+        "CACHE_WARMER_CONCURRENCY": args.concurrency,
+    })
+    portfolios = {"default": args.shops}
+    periods = tuple(args.period or WARM_PERIODS)
+
+    while True:
+        report = warm_once(portfolios, settings, periods, refresh_margin=args.interval + args.jitter)
+        for row in report + freshness_report(portfolios, settings, periods):
+            LOGGER.info(" ".join(f"{key}={value}" for key, value in row.items()))
+        if args.once:
+            return 1 if any(row["error"] for row in report) else 0
+        time.sleep(max(0.0, args.interval + random.uniform(-args.jitter, args.jitter)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
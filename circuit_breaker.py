@@ -0,0 +1,76 @@
+# 🔌 Circuit breaker per upstream (de Vemcount-wrapper)
+#
+# closed: requests gaan gewoon door; na `failure_threshold` mislukte requests op rij
+# gaat hij open. open: requests falen direct (geen wachttijd voor de gebruiker) tot
+# `reset_seconds` voorbij is. half-open: precies één proefrequest mag door; lukt
+# die, dan weer closed, anders opnieuw open.
+import threading
+import time
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_seconds=DEFAULT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True als er een request door mag; in half-open alleen voor de eerste aanvrager."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._trial_running = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def retry_after(self):
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name, failure_threshold=None, reset_seconds=None):
+    """Eén breaker per upstream (bijv. de API-URL), gedeeld door alle sessies in het proces."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker()
+        if failure_threshold is not None:
+            breaker.failure_threshold = failure_threshold
+        if reset_seconds is not None:
+            breaker.reset_seconds = reset_seconds
+        return breaker
@@ -0,0 +1,75 @@
+# 📥 Export van resultaten en ruwe dagdata naar CSV of Parquet, in stukken
+#
+# `df.to_csv()` bouwt het hele bestand als één string (en `.encode()` daarna nog een
+# keer als bytes): bij miljoenen rijen verdubbelt dat de piek-RSS. Hier gaat de
+# frame per `chunk_rows` rijen naar een tijdelijk bestand op schijf (CSV-blokken of
+# Parquet-rowgroups), zodat er naast de frame zelf maar één blok in het geheugen staat.
+# In Streamlit gebeurt dat pas bij een klik op de downloadknop (deferred download).
+import os
+import tempfile
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+EXPORT_FORMATS = {
+    "CSV": ("text/csv", ".csv"),
+    "Parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def iter_csv_chunks(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """UTF-8 CSV-bytes per blok van `chunk_rows` rijen; de header alleen in het eerste blok."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def write_csv(df, f, chunk_rows=DEFAULT_CHUNK_ROWS):
+    for chunk in iter_csv_chunks(df, chunk_rows):
+        f.write(chunk)
+
+
+def write_parquet(df, f, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Eén rowgroup per blok; het schema komt van het eerste blok."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            table = pa.Table.from_pandas(df.iloc[start:start + chunk_rows], preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(f, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_to_tempfile(df, fmt="CSV", chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Schrijft df in blokken naar een anoniem tijdelijk bestand; geeft het (teruggespoeld) open bestand.
+
+    Het bestand verdwijnt zodra het gesloten of opgeruimd wordt.
+    """
+    f = tempfile.TemporaryFile(suffix=EXPORT_FORMATS[fmt][1])
+    try:
+        if fmt == "Parquet":
+            write_parquet(df, f, chunk_rows)
+        else:
+            write_csv(df, f, chunk_rows)
+    except BaseException:
+        f.close()
+        raise
+    f.seek(0)
+    return f
+
+
+def open_export(df, fmt="CSV", chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Zoals `export_to_tempfile`, maar als leesbestand (`io.BufferedReader`) dat Streamlit zelf uitleest.
+
+    Het tijdelijke bestand blijft bestaan tot ook dit bestand gesloten of opgeruimd is.
+    """
+    with export_to_tempfile(df, fmt, chunk_rows) as f:
+        return open(os.dup(f.fileno()), "rb")
+
+
+def export_file_name(name, fmt):
+    return f"{name}{EXPORT_FORMATS[fmt][1]}"
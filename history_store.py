@@ -0,0 +1,220 @@
+# 🗄️ Lokale Parquet-historie van dagelijkse KPI's
+#
+# Layout: <root>/shop_id=<id>/month=<YYYY-MM>/part-<eerste>-<laatste>.parquet
+# Bestaande partities worden nooit herschreven: er komen alleen nieuwe part-bestanden
+# bij voor dagen die nog niet gedekt waren. De datums in de bestandsnaam zijn het
+# opgehaalde bereik (niet alleen de dagen met data), zodat de gedekte bereiken per
+# shop, inclusief gaten ertussen, op te vragen zijn zonder iets te lezen.
+# Een opgehaald bereik zonder rijen (winkel nog niet open, gesloten of stil) krijgt een
+# leeg markerbestand part-<eerste>-<laatste>.empty: dat telt als gedekt, maar wordt
+# niet gelezen, zodat zo'n bereik niet bij elke cache-miss opnieuw wordt opgehaald.
+import glob
+import os
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+PART_DATE_FORMAT = "%Y%m%d"
+EMPTY_SUFFIX = ".empty"
+
+
+def period_date_range(period, today=None):
+    """Vertaalt een Vemcount-periode naar (eerste, laatste) dag; None als dat niet kan."""
+    today = today or date.today()
+    if isinstance(period, tuple):
+        return tuple(pd.Timestamp(d).date() for d in period)
+    if period == "last_year":
+        return date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+    if period == "this_year":
+        return date(today.year, 1, 1), today - timedelta(days=1)
+    return None
+
+
+def _shop_dir(root, shop_id):
+    return os.path.join(root, f"shop_id={int(shop_id)}")
+
+
+def _part_files(root, shop_id, suffix=".parquet"):
+    return sorted(glob.glob(os.path.join(_shop_dir(root, shop_id), "month=*", f"part-*{suffix}")))
+
+
+def _covered_files(root, shop_id):
+    """Part-bestanden met data én lege markers: samen het opgehaalde bereik."""
+    return _part_files(root, shop_id) + _part_files(root, shop_id, EMPTY_SUFFIX)
+
+
+def _part_range(path):
+    first, last = os.path.splitext(os.path.basename(path))[0][len("part-"):].split("-")
+    return (
+        datetime.strptime(first, PART_DATE_FORMAT).date(),
+        datetime.strptime(last, PART_DATE_FORMAT).date(),
+    )
+
+
+def stored_range(root, shop_id):
+    ranges = [_part_range(path) for path in _covered_files(root, shop_id)]
+    if not ranges:
+        return None
+    return min(first for first, _ in ranges), max(last for _, last in ranges)
+
+
+def stored_ranges(root, shop_id):
+    """Aaneengesloten (eerste, laatste)-bereiken die voor een shop op schijf staan, oplopend."""
+    merged = []
+    for first, last in sorted(_part_range(path) for path in _covered_files(root, shop_id)):
+        if merged and first <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def missing_ranges(root, shop_id, start, end):
+    """De delen van [start, end] die voor een shop nog niet op schijf staan."""
+    gaps = []
+    cursor = start
+    for first, last in stored_ranges(root, shop_id):
+        if last < cursor:
+            continue
+        if first > end:
+            break
+        if first > cursor:
+            gaps.append((cursor, first - timedelta(days=1)))
+        cursor = last + timedelta(days=1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def covered_shops(root, shop_ids, start, end):
+    """Shops waarvan elke dag van [start, end] op schijf staat (gaten tellen als niet gedekt)."""
+    return [shop_id for shop_id in shop_ids if not missing_ranges(root, shop_id, start, end)]
+
+
+def write_history(root, df, start=None, end=None, shop_ids=None):
+    """Schrijft de dagen van df die nog niet op schijf staan; bestaande dagen worden overgeslagen.
+
+    [start, end] is het opgehaalde bereik: dat telt daarna als gedekt voor elke shop in
+    `shop_ids` (standaard de shops in df), ook voor maanden of shops zonder rijen.
+    Zonder bereik geldt per shop de eerste t/m laatste datum in df.
+    """
+    from vemcount_client import month_ranges
+
+    frames = {} if df.empty else {
+        int(shop_id): shop_df.dropna(subset=["date"]).sort_values("date")
+        for shop_id, shop_df in df.groupby("shop_id", sort=False)
+    }
+    if shop_ids is not None and start and end:
+        frames.update({int(shop_id): df.iloc[:0] for shop_id in shop_ids if int(shop_id) not in frames})
+
+    written = 0
+    for shop_id, shop_df in frames.items():
+        if shop_df.empty and not (start and end):
+            continue
+        first = start or shop_df["date"].iloc[0].date()
+        last = end or shop_df["date"].iloc[-1].date()
+        for gap in missing_ranges(root, shop_id, first, last):
+            for month_first, month_last in month_ranges(gap):
+                if shop_df.empty:
+                    month_df = shop_df
+                else:
+                    month_df = shop_df[
+                        (shop_df["date"] >= pd.Timestamp(month_first))
+                        & (shop_df["date"] < pd.Timestamp(month_last) + pd.Timedelta(days=1))
+                    ]
+                month_dir = os.path.join(_shop_dir(root, shop_id), f"month={month_first.strftime('%Y-%m')}")
+                os.makedirs(month_dir, exist_ok=True)
+                name = f"part-{month_first.strftime(PART_DATE_FORMAT)}-{month_last.strftime(PART_DATE_FORMAT)}"
+                if month_df.empty:
+                    # Opgehaald maar zonder rijen: alleen de dekking vastleggen
+                    open(os.path.join(month_dir, name + EMPTY_SUFFIX), "w").close()
+                    continue
+                path = os.path.join(month_dir, name + ".parquet")
+                tmp_path = path + ".tmp"
+                month_df.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, path)
+                written += len(month_df)
+    return written
+
+
+def _read_parts(paths):
+    import pyarrow.dataset as ds
+
+    # Eén (parallelle) scan over alle part-bestanden i.p.v. een read_parquet per bestand.
+    # Een dataset cast alles naar het schema van het eerste bestand; bij afwijkende
+    # dtypes (bijv. deels compact geschreven) dus per bestand, zodat pd.concat upcast.
+    dataset = ds.dataset(paths, format="parquet")
+    if all(fragment.physical_schema.equals(dataset.schema) for fragment in dataset.get_fragments()):
+        return dataset.to_table().to_pandas()
+    return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+
+
+def read_history(root, shop_ids, start=None, end=None):
+    """Leest de opgeslagen dagen voor shop_ids in [start, end], per shop op datum gesorteerd."""
+    shop_ids = list(dict.fromkeys(int(shop_id) for shop_id in shop_ids))
+    paths = [
+        path for shop_id in shop_ids for path in _part_files(root, shop_id)
+        if (start is None or _part_range(path)[1] >= start) and (end is None or _part_range(path)[0] <= end)
+    ]
+    if not paths:
+        return pd.DataFrame()
+    df = _read_parts(paths)
+    if start is not None:
+        df = df[df["date"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["date"] < pd.Timestamp(end) + pd.Timedelta(days=1)]
+    # Shops in de gevraagde volgorde, per shop op datum; bij dubbele dagen wint het laatste part
+    shop_order = pd.Series(range(len(shop_ids)), index=shop_ids)
+    df = df.assign(_order=df["shop_id"].map(shop_order).to_numpy())
+    df = df.sort_values(["_order", "date"], kind="stable").drop_duplicates(["shop_id", "date"], keep="last")
+    return df.drop(columns="_order").reset_index(drop=True)
+
+
+def sync_history(root, api_url, shop_ids, until=None, backfill_from=None, **fetch_kwargs):
+    """Haalt per shop alleen de dagen ná het laatst opgehaalde bereik op (t/m gisteren).
+
+    Dagen zonder data tellen ook als opgehaald, zodat een tweede sync niets meer vraagt.
+
+    Shops zonder historie worden vanaf `backfill_from` (standaard 1 januari vorig
+    jaar) opgehaald. Shops met dezelfde startdatum delen één request.
+    """
+    from vemcount_client import fetch_report_frame
+
+    until = until or date.today() - timedelta(days=1)
+    backfill_from = backfill_from or date(until.year - 1, 1, 1)
+
+    by_start = {}
+    for shop_id in shop_ids:
+        stored = stored_range(root, shop_id)
+        start = stored[1] + timedelta(days=1) if stored else backfill_from
+        if start <= until:
+            by_start.setdefault(start, []).append(shop_id)
+
+    written = 0
+    for start, shops in sorted(by_start.items()):
+        df = fetch_report_frame(api_url, shops, period=(start.isoformat(), until.isoformat()), step="day", **fetch_kwargs)
+        written += write_history(root, df, start, until, shop_ids=shops)
+    return written
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Synchroniseer de lokale KPI-historie met de Vemcount-wrapper.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sync = subparsers.add_parser("sync", help="voeg de nieuwe dagen per shop toe")
+    sync.add_argument("--api-url", required=True)
+    sync.add_argument("--root", default=".kpi_history")
+    sync.add_argument("--shops", type=int, nargs="+", required=True)
+    sync.add_argument("--until", type=date.fromisoformat, help="laatste dag (standaard gisteren)")
+    sync.add_argument("--backfill-from", type=date.fromisoformat, help="startdag voor shops zonder historie")
+    args = parser.parse_args()
+
+    written = sync_history(args.root, args.api_url, args.shops, until=args.until, backfill_from=args.backfill_from)
+    print(f"{written:,} new shop-days written to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
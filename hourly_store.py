@@ -0,0 +1,90 @@
+# 🕐 Compacte opslag voor uurdata (step="hour")
+#
+# Elke kolom staat als los .npy-bestand in één map, zodat de data met
+# np.load(..., mmap_mode="r") geladen kan worden zonder alles in te lezen.
+# Per rij: shop_id int32 + uur int32 + count_in int32 + 3 × float32 = 24 bytes, plus
+# 1 byte masker voor count_in (int32 kent geen NaN: ontbrekende tellingen blijven zo
+# <NA> in plaats van een echte 0), dus 8.760 uur × 25 B ≈ 214 KB per shop-jaar op schijf.
+# De floats bewaren hun NaN gewoon zelf.
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_transformer import to_compact_schema
+
+STORE_DTYPES = {
+    "shop_id": np.int32,
+    "hour": np.int32,
+    "turnover": np.float32,
+    "count_in": np.int32,
+    "conversion_rate": np.float32,
+    "sales_per_transaction": np.float32,
+}
+STORE_COLUMNS = list(STORE_DTYPES)
+FLOAT_COLUMNS = ["turnover", "conversion_rate", "sales_per_transaction"]
+COUNT_IN_MASK = "count_in.na.npy"
+
+
+def save_hourly_store(df, path):
+    os.makedirs(path, exist_ok=True)
+    compact = to_compact_schema(df)
+    # Uren sinds 1970-01-01 passen ruim in int32
+    arrays = {
+        "shop_id": compact["shop_id"].to_numpy(),
+        "hour": compact["date"].to_numpy().astype("datetime64[h]").astype(np.int64),
+        "count_in": compact["count_in"].to_numpy(dtype=np.int64, na_value=0),
+    }
+    arrays.update({column: compact[column].to_numpy(dtype=np.float64, na_value=np.nan) for column in FLOAT_COLUMNS})
+    arrays = {column: np.asarray(arrays[column]).astype(dtype) for column, dtype in STORE_DTYPES.items()}
+    for column in STORE_COLUMNS:
+        np.save(os.path.join(path, f"{column}.npy"), arrays[column])
+    np.save(os.path.join(path, COUNT_IN_MASK), compact["count_in"].isna().to_numpy(dtype=bool))
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({
+            "rows": len(compact),
+            "columns": {column: str(arrays[column].dtype) for column in STORE_COLUMNS},
+            "masks": {"count_in": COUNT_IN_MASK},
+        }, f)
+
+
+def load_hourly_store(path, shop_ids=None, mmap=True):
+    """Laadt de opslag als frame; met `mmap=True` leest het OS alleen de pagina's die nodig zijn."""
+    mmap_mode = "r" if mmap else None
+    arrays = {column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode=mmap_mode) for column in STORE_COLUMNS}
+    # Oudere opslag zonder masker: elke telling geldt als aanwezig
+    mask_path = os.path.join(path, COUNT_IN_MASK)
+    if os.path.exists(mask_path):
+        arrays["count_in_na"] = np.load(mask_path, mmap_mode=mmap_mode)
+    else:
+        arrays["count_in_na"] = np.zeros(len(arrays["count_in"]), dtype=bool)
+    if shop_ids is not None:
+        mask = np.isin(arrays["shop_id"], np.asarray(list(shop_ids), dtype=np.int32))
+        arrays = {column: values[mask] for column, values in arrays.items()}
+
+    frame = {"shop_id": arrays["shop_id"], "date": arrays["hour"].astype("datetime64[h]").astype("datetime64[s]")}
+    frame.update({column: arrays[column] for column in STORE_COLUMNS[2:]})
+    frame["count_in"] = pd.arrays.IntegerArray(np.asarray(arrays["count_in"]), np.asarray(arrays["count_in_na"]))
+    return pd.DataFrame(frame, copy=False)
+
+
+def main():
+    import argparse
+
+    from vemcount_client import fetch_report_frame
+
+    parser = argparse.ArgumentParser(description="Haal uurdata op en schrijf die als memory-mapbare opslag weg.")
+    parser.add_argument("--api-url", required=True)
+    parser.add_argument("--shops", type=int, nargs="+", required=True)
+    parser.add_argument("--period", default="last_year")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    df = fetch_report_frame(args.api_url, args.shops, period=args.period, step="hour", streaming=True)
+    save_hourly_store(df, args.out)
+    print(f"{len(df):,} rows written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_TTL_SECONDS = 60 * 60
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_STALE_SECONDS = 24 * 60 * 60
+
+
+class KPICache:
+    """TTL + LRU cache met één genormaliseerde DataFrame per (shop_id, period, step).
+
+    Verlopen items blijven nog `max_stale_seconds` bewaard, zodat ze als "stale"
+    direct getoond kunnen worden terwijl er op de achtergrond ververst wordt.
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_stale_seconds=DEFAULT_MAX_STALE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_stale_seconds = max_stale_seconds
+        self._entries = OrderedDict()
+        self._derived = {}  # key -> {naam: waarde}, afgeleid van precies de frame in _entries
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(shop_id, period, step):
+        return (int(shop_id), period, step)
+
+    def get(self, shop_id, period, step, allow_stale=False):
+        df, stale = self._lookup(self.make_key(shop_id, period, step))
+        if stale and not allow_stale:
+            return None
+        return df
+
+    def _lookup(self, key):
+        """Geeft (df, stale); (None, False) als er niets (bruikbaars meer) is."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            stored_at, df = entry
+            age = time.monotonic() - stored_at
+            if age > self.ttl_seconds + self.max_stale_seconds:
+                del self._entries[key]
+                self._derived.pop(key, None)
+                return None, False
+            self._entries.move_to_end(key)
+            return df, age > self.ttl_seconds
+
+    def put(self, shop_id, period, step, df):
+        key = self.make_key(shop_id, period, step)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), df)
+            self._entries.move_to_end(key)
+            self._derived.pop(key, None)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._derived.pop(evicted, None)
+
+    def age(self, shop_id, period, step):
+        """Seconden sinds het item is opgeslagen; None als het er niet (meer) is."""
+        with self._lock:
+            entry = self._entries.get(self.make_key(shop_id, period, step))
+            return None if entry is None else time.monotonic() - entry[0]
+
+    def get_derived(self, shop_id, period, step, name):
+        with self._lock:
+            return self._derived.get(self.make_key(shop_id, period, step), {}).get(name)
+
+    def put_derived(self, shop_id, period, step, name, value):
+        """Bewaart iets dat uit de gecachte frame is berekend; vervalt zodra die frame wordt vervangen."""
+        key = self.make_key(shop_id, period, step)
+        with self._lock:
+            if key in self._entries:
+                self._derived.setdefault(key, {})[name] = value
+
+    def split(self, shop_ids, period, step):
+        """Geeft (gecachte frames per shop_id, shop_ids die nog opgehaald moeten worden)."""
+        cached, missing = {}, []
+        for shop_id in shop_ids:
+            df = self.get(shop_id, period, step)
+            if df is None:
+                missing.append(shop_id)
+            else:
+                cached[int(shop_id)] = df
+        return cached, missing
+
+    def split_stale(self, shop_ids, period, step):
+        """Zoals `split`, maar verlopen items binnen de stale-marge komen apart terug.
+
+        Geeft (verse frames per shop_id, stale frames per shop_id, ontbrekende shop_ids).
+        """
+        fresh, stale, missing = {}, {}, []
+        for shop_id in shop_ids:
+            df, is_stale = self._lookup(self.make_key(shop_id, period, step))
+            if df is None:
+                missing.append(shop_id)
+            elif is_stale:
+                stale[int(shop_id)] = df
+            else:
+                fresh[int(shop_id)] = df
+        return fresh, stale, missing
+
+    def store_frame(self, df, shop_ids, period, step):
+        """Splitst een opgehaalde frame per shop en cachet ook shops zonder data (lege frame)."""
+        per_shop = {}
+        if not df.empty and "shop_id" in df.columns:
+            per_shop = {int(shop_id): part for shop_id, part in df.groupby("shop_id", sort=False)}
+        for shop_id in shop_ids:
+            part = per_shop.get(int(shop_id), df.iloc[0:0])
+            self.put(shop_id, period, step, part)
+        return per_shop
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._derived.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def merge_shop_frames(frames_by_shop, shop_ids):
+    """Voegt per-shop frames samen in de volgorde van shop_ids, zoals een volledige fetch."""
+    frames = [frames_by_shop[int(s)] for s in shop_ids if int(s) in frames_by_shop]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache(ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                      max_stale_seconds=DEFAULT_MAX_STALE_SECONDS):
+    """Process-brede cache: modules blijven geladen tussen Streamlit-reruns en -sessies."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = KPICache(ttl_seconds=ttl_seconds, max_entries=max_entries,
+                                      max_stale_seconds=max_stale_seconds)
+        else:
+            _default_cache.ttl_seconds = ttl_seconds
+            _default_cache.max_entries = max_entries
+            _default_cache.max_stale_seconds = max_stale_seconds
+        return _default_cache
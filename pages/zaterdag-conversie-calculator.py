@@ -1,241 +1,258 @@
 # 📈 Zaterdag Conversie Calculator – Streamlit
 
 import streamlit as st
-import sys
-import os
-import pandas as pd
-import requests
-import plotly.express as px
-from datetime import date
-
-# 👇 Zet dit vóór de import!
-sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
-
-# ✅ Nu pas importeren
-from data_transformer import normalize_vemcount_response
-from shop_mapping import SHOP_NAME_MAP
+from datetime import date, timedelta
+
+from perf_trace import span, spans_frame, start_trace
+from roi_core import (
+    apply_page_style,
+    load_settings,
+    render_export_buttons,
+    render_growth_banner,
+    shop_label,
+    shop_picker,
+)
 
 # -----------------------------
 # CONFIGURATIE
 # -----------------------------
-API_URL = st.secrets["API_URL"].rstrip("/")
-DEFAULT_SHOP_IDS = [26304, 26560, 26509, 26480, 26640, 26359, 26630, 27038, 26647, 26646]
-
-# -----------------------------
-# API CLIENT
-# -----------------------------
-def get_kpi_data_for_stores(shop_ids, period="last_year", step="day"):
-    params = [("data", shop_id) for shop_id in shop_ids]
-    params += [
-        ("data_output", "count_in"),
-        ("data_output", "conversion_rate"),
-        ("data_output", "turnover"),
-        ("data_output", "sales_per_transaction"),
-        ("source", "shops"),
-        ("period", period),
-        ("step", step)
-    ]
-    try:
-        response = requests.post(API_URL, params=params)
-        if response.status_code == 200:
-            full_response = response.json()
-            if "data" in full_response and "last_year" in full_response["data"]:
-                raw_data = full_response["data"]["last_year"]
-                return normalize_vemcount_response(raw_data)
-        else:
-            st.error(f"❌ Error fetching data: {response.status_code} - {response.text}")
-    except Exception as e:
-        st.error(f"🚨 API call exception: {e}")
-    return pd.DataFrame()
-
-# -----------------------------
-# SIMULATIE FUNCTIE
-# -----------------------------
-def simulate_conversion_boost_on_saturdays(df, conversion_boost_pct):
-    if "date" not in df.columns:
-        raise ValueError("❌ The 'date' column is missing from the DataFrame.")
-    df["date"] = pd.to_datetime(df["date"])
-
-    # Volledige omzet per winkel (alle dagen)
-    total_turnover = df.groupby("shop_id")["turnover"].sum().reset_index()
-    total_turnover.columns = ["shop_id", "original_total_turnover"]
-
-    # Filter alleen zaterdagen
-    saturdays_df = df[df["date"].dt.day_name() == "Saturday"].copy()
-
-    if "sales_per_transaction" not in saturdays_df.columns:
-        st.error("❌ 'sales_per_transaction' is missing in the data.")
-        st.write("📋 Available columns:", saturdays_df.columns.tolist())
-        st.stop()
-
-    saturdays_df["atv"] = saturdays_df["sales_per_transaction"].replace(0, pd.NA)
-    saturdays_df["extra_conversion"] = conversion_boost_pct / 100.0
-    saturdays_df["extra_customers"] = saturdays_df["count_in"] * saturdays_df["extra_conversion"]
-    saturdays_df["extra_turnover"] = saturdays_df["extra_customers"] * saturdays_df["atv"]
-
-    saturday_grouped = saturdays_df.groupby("shop_id").agg(
-        original_saturday_turnover=("turnover", "sum"),
-        extra_turnover=("extra_turnover", "sum")
-    ).reset_index()
-
-    # Combineer met totale jaaromzet
-    results = pd.merge(total_turnover, saturday_grouped, on="shop_id", how="left")
-    results["store_name"] = results["shop_id"].map(SHOP_NAME_MAP)
-    results["new_total_turnover"] = results["original_total_turnover"] + results["extra_turnover"]
-    results["growth_pct"] = (results["extra_turnover"] / results["original_total_turnover"]) * 100
-
-    return results
+SETTINGS = load_settings()
+SWEEP_BOOST_VALUES = [round(0.1 * i, 1) for i in range(1, 51)]  # 0,1 % t/m 5 %
+PERIOD_OPTIONS = {"Last year": "last_year", "This year": "this_year", "Custom range": None}
 
 # -----------------------------
 # STREAMLIT UI
 # -----------------------------
 st.set_page_config(page_title="ROI Calculator - Saturday Conversion", layout="wide")
 
-# ✅ Styling: paarse pills & rode knop
-st.markdown(
-    """
-    <style>
-    /* Font import (optioneel) */
-    @import url('https://fonts.googleapis.com/css2?family=Instrument+Sans:wght@400;500;600&display=swap');
-
-    /* Forceer Instrument Sans als standaard font */
-    html, body, [class*="css"] {
-        font-family: 'Instrument Sans', sans-serif !important;
-    }
-
-    /* 🎨 Multiselect pills in paars */
-    [data-baseweb="tag"] {
-        background-color: #9E77ED !important;
-        color: white !important;
-    }
-
-    /* 🔴 "Run simulation" knop in PFM-rood */
-    button[data-testid="stBaseButton-secondary"] {
-        background-color: #F04438 !important;
-        color: white !important;
-        border-radius: 16px !important;
-        font-weight: 600 !important;
-        font-family: "Instrument Sans", sans-serif !important;
-        padding: 0.6rem 1.4rem !important;
-        border: none !important;
-        box-shadow: none !important;
-        transition: background-color 0.2s ease-in-out;
-    }
-
-    button[data-testid="stBaseButton-secondary"]:hover {
-        background-color: #d13c30 !important;
-        cursor: pointer;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# ⏱️ Timing per stap voor deze rerun (zichtbaar via het performancepaneel in de sidebar)
+perf = start_trace("zaterdag-conversie-calculator", json_log=SETTINGS["PERF_JSON_LOG"])
+show_perf = st.sidebar.checkbox("⏱️ Show performance panel", value=False)
 
-st.title("📈 ROI Calculator – Saturday Conversion Boost")
-st.markdown("Simulate the revenue impact of a higher Saturday conversion rate for your retail portfolio.")
+apply_page_style()
 
-# 🔁 Maak mapping van ID naar naam & naam naar ID
-ID_TO_NAME = SHOP_NAME_MAP
-NAME_TO_ID = {v: k for k, v in SHOP_NAME_MAP.items()}
+# 🔥 Optioneel: standaardportfolio's op de achtergrond warm houden (één warmer per proces)
+if SETTINGS["CACHE_WARMER_ENABLED"]:
+    from cache_warmer import start_cache_warmer
 
-# 🔁 Genereer naam-opties op basis van DEFAULT_SHOP_IDS
-default_names = [ID_TO_NAME.get(shop_id, str(shop_id)) for shop_id in DEFAULT_SHOP_IDS]
+    start_cache_warmer(SETTINGS)
 
-selected_names = st.multiselect("Select stores", options=list(NAME_TO_ID.keys()), default=default_names)
+st.title("📈 ROI Calculator – Saturday Conversion Boost")
+st.markdown("Simulate the revenue impact of a higher Saturday conversion rate for your retail portfolio.")
 
-# 🔁 Vertaal store_namen terug naar shop_ids voor de API
-shop_ids = [NAME_TO_ID[name] for name in selected_names]
+# 🏬 Winkels kiezen via het register (standaard: DEFAULT_SHOP_IDS); type-ahead bij grote registers
+shop_ids = shop_picker(SETTINGS)
 conversion_boost_pct = st.slider("Conversion increase (%)", min_value=0.1, max_value=5.0, value=1.0, step=0.1)
-
-# ✅ Simulatieblok
-if st.button("Run simulation"):
+granularity = st.radio("Data granularity", ["Daily", "Hourly"], horizontal=True)
+step = "hour" if granularity == "Hourly" else "day"
+
+# 🗓️ Periode: Vemcount-preset of een eigen bereik (ook over meerdere jaren, per maand opgehaald)
+period_label = st.radio("Period", list(PERIOD_OPTIONS), horizontal=True)
+period = PERIOD_OPTIONS[period_label]
+if period is None:
+    yesterday = date.today() - timedelta(days=1)
+    picked = st.date_input("Date range", value=(date(yesterday.year - 1, 1, 1), yesterday), max_value=yesterday)
+    # Tijdens het kiezen is er nog maar één datum geselecteerd
+    period = tuple(picked) if len(picked) == 2 else None
+
+# ✅ Data ophalen (alleen bij klikken); de simulatie zelf draait bij elke rerun
+# 🧩 Alles na de fetch loopt via de stage graph: een stap rekent alleen opnieuw als zijn
+# inputs veranderden (boost → simulatie en grafieken; de aggregaten blijven staan)
+if st.button("Run simulation", disabled=period is None):
+    # 💤 Fetch- en simulatiemodules pas laden als er echt data nodig is
+    from roi_core import (
+        compute_hourly_potential,
+        compute_weekday_potential,
+        get_kpi_data_for_stores,
+        get_saturday_aggregates,
+        get_stage_graph,
+    )
+
+    fetch_mark = perf.mark()
+    failed_shops = []
     with st.spinner("Calculating hidden location potential..."):
-        df_kpi = get_kpi_data_for_stores(shop_ids, period="last_year", step="day")
+        # Per winkel gecachet: na een andere selectie worden alleen de nieuwe winkels opgehaald
+        df_kpi = get_kpi_data_for_stores(
+            shop_ids, period=period, step=step, settings=SETTINGS, on_error=st.error,
+            on_stale=lambda stale: st.info(f"ℹ️ Showing cached data for {len(stale)} store(s) while it refreshes in the background."),
+            on_failed=failed_shops.extend,
+        )
 
     if not df_kpi.empty:
-        df_results = simulate_conversion_boost_on_saturdays(df_kpi, conversion_boost_pct)
-        total_extra_turnover = df_results["extra_turnover"].sum()
-
-        st.markdown(f"""
-            <div style='background-color: #FEAC76;
-                        color: #000000;
-                        padding: 1.5rem;
-                        border-radius: 0.75rem;
-                        font-size: 1.25rem;
-                        font-weight: 600;
-                        text-align: center;
-                        margin-bottom: 1.5rem;'>
-                🚀 The potential revenue growth is <span style='font-size:1.5rem;'>€{str(f"{total_extra_turnover:,.0f}").replace(",", ".")}</span>
-            </div>
-         """, unsafe_allow_html=True)
-
-
-        st.subheader("📊 Expected revenue growth from Saturday conversion boost")
-
-        def style_table(df):
-            display_df = df[["store_name", "original_total_turnover", "original_saturday_turnover", "extra_turnover", "new_total_turnover", "growth_pct"]].copy()
-            display_df.columns = ["Store", "Original Total Turnover", "Original Saturday Turnover", "Extra Turnover (Saturdays)", "New Total Turnover", "Growth %"]
-
-            return display_df.style.set_properties(
-                **{
-                    "background-color": "#FAFAFA",
-                    "color": "#0C111D",
-                    "border-color": "#85888E",
-                }
-            ).apply(
-                lambda x: ["background-color: #F0F1F1" if i % 2 else "" for i in range(len(x))], axis=0
-            ).format({
-                "Original Total Turnover": lambda x: f"€{int(x):,}".replace(",", "."),
-                "Original Saturday Turnover": lambda x: f"€{int(x):,}".replace(",", "."),
-                "Extra Turnover (Saturdays)": lambda x: f"€{int(x):,}".replace(",", "."),
-                "New Total Turnover": lambda x: f"€{int(x):,}".replace(",", "."),
-                "Growth %": "{:.2f}%"
-            })
-
-
-        st.dataframe(style_table(df_results))
-
-        df_results["extra_turnover_display"] = df_results["extra_turnover"].apply(
-            lambda x: f"{x:,.0f}".replace(",", ".")
+        graph = get_stage_graph(SETTINGS)
+        kpi = graph.source("kpi_df", df_kpi)
+        st.session_state["kpi_df"] = kpi
+        # Voorberekend door de cache warmer (of een eerdere run) waar mogelijk
+        st.session_state["kpi_aggregates"] = graph.run(
+            "saturday_aggregates",
+            lambda df, ids, p, s: get_saturday_aggregates(ids, p, s, df, SETTINGS),
+            kpi, list(shop_ids), period, step,
         )
-
-        fig = px.bar(
-            df_results,
-            x="store_name",
-            y="extra_turnover",
-            text="extra_turnover_display",  # ✅ Geformatteerde waarde tonen
-            color_discrete_sequence=["#762181"],
-            labels={"store_name": "Store", "extra_turnover": "Extra Turnover (Saturdays) (€)"},
-            title="Conversion Boost Impact on Saturdays"
+        st.session_state["kpi_weekday_potential"] = graph.run("weekday_potential", compute_weekday_potential, kpi)
+        st.session_state["kpi_hourly_potential"] = (
+            graph.run("hourly_potential", compute_hourly_potential, kpi) if step == "hour" else None
         )
+        st.session_state["kpi_shop_ids"] = list(shop_ids)
+        st.session_state["kpi_failed_shops"] = failed_shops
+        st.session_state["kpi_period"] = period
+        st.session_state["perf_fetch_spans"] = perf.spans_since(fetch_mark)
+    else:
+        for key in ["kpi_df", "kpi_aggregates", "kpi_weekday_potential", "kpi_hourly_potential", "kpi_shop_ids",
+                    "kpi_failed_shops", "kpi_period"]:
+            st.session_state.pop(key, None)
+        st.warning("⚠️ No data available for the selected period/stores.")
 
-        fig.update_traces(
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>Extra Turnover (€): €%{text}<extra></extra>'
+# ✅ Simulatieblok: de slider rekent direct door op de voorberekende aggregaten
+if "kpi_aggregates" in st.session_state:
+    from functools import partial
+
+    from roi_core import (
+        DEFAULT_CHART_TOP_N,
+        DEFAULT_PAGE_SIZE,
+        HEATMAP_MAX_STORES,
+        LARGE_TABLE_THRESHOLD,
+        TABLE_COLUMNS,
+        bootstrap_saturday_potential,
+        build_hourly_chart,
+        build_sensitivity_chart,
+        build_store_bar_chart,
+        build_table_page,
+        build_weekday_heatmap,
+        compute_saturday_matrix,
+        format_eur,
+        get_stage_graph,
+        simulate_from_aggregates,
+        simulate_from_hourly_potential,
+        simulate_intervals_from_bootstrap,
+        sort_and_paginate,
+        style_table,
+        style_table_page,
+        sweep_from_weekday_potential,
+        table_column_config,
+    )
+
+    graph = get_stage_graph(SETTINGS)
+    kpi = st.session_state["kpi_df"]
+
+    if st.session_state["kpi_shop_ids"] != list(shop_ids) or st.session_state["kpi_period"] != period:
+        st.info("ℹ️ The store selection or period has changed. Click \"Run simulation\" to update the data.")
+
+    results = graph.run("simulate", simulate_from_aggregates, st.session_state["kpi_aggregates"], conversion_boost_pct)
+    df_results = results.value
+    total_extra_turnover = df_results["extra_turnover"].sum()
+
+    render_growth_banner(total_extra_turnover)
+    # ⚠️ Een deels mislukte fetch: het totaal hierboven is dan niet het hele portfolio
+    failed_shops = st.session_state.get("kpi_failed_shops", [])
+    if failed_shops:
+        st.warning(
+            f"⚠️ These totals cover {len(df_results)} of {len(st.session_state['kpi_shop_ids'])} stores. "
+            f"Not loaded: {', '.join(shop_label(shop_id) for shop_id in failed_shops)}. "
+            "Click \"Run simulation\" to retry."
         )
 
-        fig.update_layout(
-            plot_bgcolor="#FAFAFA",
-            paper_bgcolor="#FAFAFA",
-            font_color="#0C111D",
-            xaxis=dict(
-                title="Store",
-                title_font=dict(color="#0C111D"),
-                tickfont=dict(color="#0C111D"),
-                linecolor="#85888E",
-                gridcolor="#85888E",
-                type='category'
+    # 🎲 Onzekerheid: bootstrap over de zaterdagen, één keer per dataset; de slider schaalt alleen
+    if st.checkbox("🎲 Show confidence intervals (bootstrap)", value=False):
+        bootstrap = graph.run(
+            "bootstrap",
+            lambda df, draws, confidence, seed: bootstrap_saturday_potential(
+                compute_saturday_matrix(df), n_draws=draws, confidence=confidence, seed=seed,
             ),
-            yaxis=dict(
-                title="Extra Turnover (€)",
-                title_font=dict(color="#0C111D"),
-                tickfont=dict(color="#0C111D"),
-                linecolor="#85888E",
-                gridcolor="#85888E",
-                # Geen tickformat, dit voorkomt 15.2k notatie
-            )
+            kpi, SETTINGS["BOOTSTRAP_DRAWS"], SETTINGS["BOOTSTRAP_CONFIDENCE"], SETTINGS["BOOTSTRAP_SEED"],
+        ).value
+        df_intervals, (_, portfolio_low, portfolio_high) = simulate_intervals_from_bootstrap(bootstrap, conversion_boost_pct)
+        st.markdown(
+            f"{bootstrap['confidence']:.0%} interval for the portfolio: "
+            f"**{format_eur([portfolio_low])[0]} – {format_eur([portfolio_high])[0]}** "
+            f"({bootstrap['n_draws']:,} bootstrap draws over the Saturdays, seed {bootstrap['seed']})"
         )
-
-        st.plotly_chart(fig, use_container_width=True)
+        df_intervals = df_intervals.sort_values("extra_turnover", ascending=False)
+        st.dataframe({
+            "Store": df_intervals["store_name"].fillna(df_intervals["shop_id"].astype(str)),
+            "Extra Turnover (Saturdays)": format_eur(df_intervals["extra_turnover"]),
+            "Low": format_eur(df_intervals["extra_turnover_low"]),
+            "High": format_eur(df_intervals["extra_turnover_high"]),
+        }, hide_index=True)
+
+    st.subheader("📊 Expected revenue growth from Saturday conversion boost")
+
+    if len(df_results) <= LARGE_TABLE_THRESHOLD:
+        # Een Styler rekent zijn stijlen pas bij het renderen uit; memoiseren levert niets op
+        with span("styler_build+render", rows=len(df_results)):
+            st.dataframe(style_table(df_results))
     else:
-        st.warning("⚠️ No data available for the selected period/stores.")
+        # 📄 Grote portfolio's: server-side sorteren en alleen de huidige pagina opmaken
+        sort_col, order_col, size_col, page_col = st.columns(4)
+        sort_labels = {label: column for column, label in TABLE_COLUMNS.items()}
+        sort_label = sort_col.selectbox("Sort by", list(sort_labels), index=3)
+        ascending = order_col.selectbox("Order", ["Descending", "Ascending"]) == "Ascending"
+        page_size = size_col.selectbox("Rows per page", [25, DEFAULT_PAGE_SIZE, 100, 200], index=1)
+        n_pages = max(1, -(-len(df_results) // page_size))
+        page = page_col.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+
+        with span("table_page_build+render", rows=len(df_results)) as fields:
+            page_df = graph.run(
+                "table_page",
+                lambda df, *args: build_table_page(sort_and_paginate(df, *args)[0]),
+                results, sort_labels[sort_label], ascending, page, page_size,
+            ).value
+            fields["page_rows"] = len(page_df)
+            st.dataframe(style_table_page(page_df), column_config=table_column_config(), hide_index=True)
+
+    # 📥 Export: resultaten per winkel en de onderliggende KPI-data (dag of uur; CSV of Parquet)
+    render_export_buttons([
+        ("📥 Results per store", df_results, "saturday_conversion_results"),
+        (f"📥 Raw KPI data ({len(kpi.value):,} rows)", kpi.value, "kpi_data"),
+    ])
+
+    # 📊 Bij grote portfolio's: top-N winkels + "Other", met een plafond op de figure-payload
+    chart_top_n = DEFAULT_CHART_TOP_N
+    if len(df_results) > DEFAULT_CHART_TOP_N:
+        chart_top_n = st.slider("Stores shown in chart", min_value=5, max_value=min(len(df_results), 500),
+                                value=DEFAULT_CHART_TOP_N, step=5)
+    with span("plotly_figure", rows=len(df_results)):
+        fig = graph.run("store_chart", build_store_bar_chart, results, chart_top_n).value
+
+    st.plotly_chart(fig, width="stretch")
+
+    # 🎯 Gevoeligheid: alle boosts × weekdagen × winkels in één broadcast; hangt niet van de slider af
+    st.subheader("🎯 Sensitivity across boost values and weekdays")
+    sweep = graph.run("sweep", sweep_from_weekday_potential, st.session_state["kpi_weekday_potential"], SWEEP_BOOST_VALUES)
+    st.plotly_chart(graph.run("sensitivity_chart", build_sensitivity_chart, sweep).value, width="stretch")
+
+    # Heatmap bij de huidige sliderwaarde; bij grote portfolio's alleen de winkels met het meeste potentieel
+    fig_heat = graph.run(
+        "weekday_heatmap", partial(build_weekday_heatmap, label=shop_label), sweep, conversion_boost_pct, HEATMAP_MAX_STORES,
+    ).value
+    st.plotly_chart(fig_heat, width="stretch")
+
+    # ⏰ Zaterdag per uur (alleen bij uurdata): waar zitten de piekuren?
+    if st.session_state.get("kpi_hourly_potential") is not None:
+        st.subheader("⏰ Saturday conversion boost by hour")
+        portfolio_hourly = graph.run(
+            "simulate_hourly",
+            lambda hourly, boost: simulate_from_hourly_potential(hourly, boost).groupby("hour", as_index=False)["extra_turnover"].sum(),
+            st.session_state["kpi_hourly_potential"], conversion_boost_pct,
+        )
+        st.plotly_chart(graph.run("hourly_chart", build_hourly_chart, portfolio_hourly).value, width="stretch")
+
+        peak_hours = portfolio_hourly.value.nlargest(3, "extra_turnover")["hour"].sort_values().tolist()
+        st.markdown("Peak hours to target: " + ", ".join(f"**{hour:02d}:00–{hour + 1:02d}:00**" for hour in peak_hours))
+
+# ⏱️ Performancepaneel: laatste data-fetch + de stappen van deze rerun
+if show_perf:
+    st.sidebar.markdown("**Last data fetch**")
+    st.sidebar.dataframe(spans_frame(st.session_state.get("perf_fetch_spans", [])), hide_index=True)
+    st.sidebar.markdown("**This rerun**")
+    st.sidebar.dataframe(spans_frame(perf.spans), hide_index=True)
+    if "kpi_aggregates" in st.session_state:
+        import pandas as pd
+
+        st.sidebar.markdown("**Stage cache** (hits/misses per step)")
+        st.sidebar.dataframe(pd.DataFrame(graph.stats()), hide_index=True)
+    if SETTINGS["CACHE_WARMER_ENABLED"]:
+        from cache_warmer import freshness_report, get_cache_warmer
+
+        warmer = get_cache_warmer()
+        st.sidebar.markdown(f"**Cache warmer** ({warmer.runs} runs)")
+        st.sidebar.dataframe(freshness_report(warmer.portfolios, SETTINGS), hide_index=True)
@@ -1,115 +1,26 @@
 # 📈 Zaterdag Conversie Calculator – Streamlit
-import importlib
-import data_transformer
-importlib.reload(data_transformer)
-from data_transformer import normalize_vemcount_response
+
 import streamlit as st
-import sys
-import os
-import pandas as pd
-import requests
-from datetime import date
 
-# Zorg dat parent directory toegankelijk is
-sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+from perf_trace import spans_frame, start_trace
+from roi_core import DEFAULT_SHOP_IDS, load_settings
 
 # -----------------------------
 # CONFIGURATIE
 # -----------------------------
-API_URL = st.secrets["API_URL"].rstrip("/")
-DEFAULT_SHOP_IDS = [26304, 26560, 26509, 26480, 26640, 26359, 26630, 27038, 26647, 26646]
+SETTINGS = load_settings()
 
 # -----------------------------
 # DEBUG TOGGLE
 # -----------------------------
 debug = st.sidebar.checkbox("🔍 Toon debug info", value=False)
 
-# -----------------------------
-# API CLIENT
-# -----------------------------
-def get_kpi_data_for_stores(shop_ids, period="last_year", step="day"):
-    params = [("data", shop_id) for shop_id in shop_ids]
-    params += [
-        ("data_output", "count_in"),
-        ("data_output", "conversion_rate"),
-        ("data_output", "turnover"),
-        ("data_output", "sales_per_transaction"),
-        ("source", "shops"),
-        ("period", period),
-        ("step", step)
-    ]
-
-    try:
-        response = requests.post(API_URL, params=params)
-
-        if debug:
-            st.write("🔁 Statuscode:", response.status_code)
-
-        if response.status_code == 200:
-            try:
-                full_response = response.json()
-
-                if "data" in full_response and "last_year" in full_response["data"]:
-                    raw_data = full_response["data"]["last_year"]
-
-                    # ✅ Alleen tonen bij debug
-                    if debug:
-                        for shop_id, shop_data in raw_data.items():
-                            dates = shop_data.get("dates", {})
-                            for date_str, date_info in list(dates.items())[:3]:  # max 3 dagen tonen
-                                st.write(f"🔍 {shop_id} - {date_str} - keys in dagdata:")
-                                st.json(list(date_info.get("data", {}).keys()))
-
-                    return normalize_vemcount_response(raw_data)
-                else:
-                    st.warning("⚠️ Response heeft niet het verwachte 'last_year' formaat.")
-                    return pd.DataFrame()
-            except Exception as json_error:
-                st.error(f"❌ JSON parsing mislukt: {json_error}")
-                return pd.DataFrame()
-        else:
-            st.error(f"❌ Fout bij ophalen data: {response.status_code} - {response.text}")
-            return pd.DataFrame()
-
-    except Exception as e:
-        st.error(f"🚨 API-call exception: {e}")
-        return pd.DataFrame()
-
-# -----------------------------
-# SIMULATIE FUNCTIE
-# -----------------------------
-def simulate_conversion_boost_on_saturdays(df, conversion_boost_pct):
-    if "date" not in df.columns:
-        raise ValueError("❌ De kolom 'date' ontbreekt in de DataFrame. Check je normalisatie.")
-
-    df["date"] = pd.to_datetime(df["date"])
-    df = df[df["date"].dt.day_name() == "Saturday"]
-
-    df = df.copy()
-    if "sales_per_transaction" not in df.columns:
-        st.error("❌ 'sales_per_transaction' ontbreekt in de DataFrame.")
-        st.write("📋 Beschikbare kolommen:", df.columns.tolist())
-        st.stop()
-
-    df["atv"] = df["sales_per_transaction"].replace(0, pd.NA)
-    df["extra_conversion"] = conversion_boost_pct / 100.0
-    df["extra_customers"] = df["count_in"] * df["extra_conversion"]
-    df["extra_turnover"] = df["extra_customers"] * df["atv"]
-
-    results = df.groupby("shop_id").agg(
-        original_turnover=("turnover", "sum"),
-        extra_turnover=("extra_turnover", "sum")
-    ).reset_index()
-
-    results["new_total_turnover"] = results["original_turnover"] + results["extra_turnover"]
-    results["growth_pct"] = (results["extra_turnover"] / results["original_turnover"]) * 100
-
-    return results
-
 # -----------------------------
 # STREAMLIT UI
 # -----------------------------
 st.set_page_config(page_title="ROI Calculator - Conversie op Zaterdagen", layout="wide")
+perf = start_trace("zaterdag-conversie-calculator1", json_log=SETTINGS["PERF_JSON_LOG"])
+
 st.title("📈 ROI Calculator - Conversieboost op Zaterdagen")
 st.markdown("Simuleer de omzetimpact van een hogere conversie op zaterdagen in 2024 voor je retailportfolio.")
 
@@ -119,8 +30,22 @@ conversion_boost_pct = st.slider("Conversieverhoging (%)", min_value=0.1, max_va
 
 # Ophalen data en simulatie uitvoeren
 if st.button("📊 Simuleer omzetgroei"):
+    # 💤 Fetch- en simulatiemodules pas laden als er echt data nodig is
+    from roi_core import (
+        SATURDAY_ONLY_FORMAT,
+        get_kpi_data_for_stores,
+        saturday_only_results,
+        simulate_conversion_boost_on_saturdays,
+    )
+
     with st.spinner("Data ophalen van Vemcount API..."):
-        df_kpi = get_kpi_data_for_stores(shop_ids, period="last_year", step="day")
+        df_kpi = get_kpi_data_for_stores(shop_ids, period="last_year", step="day", settings=SETTINGS, on_error=st.error)
+
+    # ✅ Alleen tonen bij debug: kolommen, eerste dagen en de timing per stap
+    if debug:
+        st.write("📋 Kolommen:", df_kpi.columns.tolist())
+        st.dataframe(df_kpi.head(3))
+        st.dataframe(spans_frame(perf.spans), hide_index=True)
 
     if not df_kpi.empty:
         df_results = simulate_conversion_boost_on_saturdays(df_kpi, conversion_boost_pct)
@@ -128,12 +53,9 @@ if st.button("📊 Simuleer omzetgroei"):
         st.success("✅ Simulatie voltooid")
         st.subheader("📊 Verwachte omzetgroei bij conversieboost op zaterdagen")
 
-        st.dataframe(df_results.style.format({
-            "original_turnover": "€{:,.0f}",
-            "extra_turnover": "€{:,.0f}",
-            "new_total_turnover": "€{:,.0f}",
-            "growth_pct": "{:.2f}%"
-        }))
+        # Alles t.o.v. de zaterdagomzet, zoals deze pagina altijd rekende
+        display_df = saturday_only_results(df_results).drop(columns="store_name")
+        st.dataframe(display_df.style.format(SATURDAY_ONLY_FORMAT), hide_index=True)
 
         st.bar_chart(df_results.set_index("shop_id")["extra_turnover"])
     else:
@@ -0,0 +1,109 @@
+# ⏱️ Timing per pipeline-stap (fetch, decode, normalize, filter, aggregatie, tabel, grafiek)
+#
+# `span()` is een no-op zolang er geen trace actief is, dus de modules kunnen
+# altijd geïnstrumenteerd blijven. Elke span wordt ook als JSON-regel gelogd
+# via de logger "roi.perf". Die propageert gewoon naar de logging van de app; een
+# eigen handler (JSON-regels op stderr) komt er alleen bij als de app daarvoor kiest
+# (`enable_json_logging`, of `PERF_JSON_LOG = true` in secrets.toml voor de pagina's).
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+LOGGER = logging.getLogger("roi.perf")
+
+_current_trace = contextvars.ContextVar("perf_trace", default=None)
+
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.spans.append(record)
+        if LOGGER.isEnabledFor(logging.INFO):
+            LOGGER.info(json.dumps({"trace": self.name, **record}, default=str))
+
+    def mark(self):
+        return len(self.spans)
+
+    def spans_since(self, mark):
+        with self._lock:
+            return list(self.spans[mark:])
+
+
+_json_handler = None
+_json_handler_lock = threading.Lock()
+
+
+def enable_json_logging(stream=None):
+    """Logt spans als kale JSON-regels naar `stream` (standaard stderr); één handler per proces.
+
+    De logger blijft propageren, zodat de logging van de app de spans ook ziet.
+    """
+    global _json_handler
+    with _json_handler_lock:
+        if _json_handler is None:
+            _json_handler = logging.StreamHandler(stream)
+            _json_handler.setFormatter(logging.Formatter("%(message)s"))
+            LOGGER.addHandler(_json_handler)
+            LOGGER.setLevel(logging.INFO)
+    return _json_handler
+
+
+def start_trace(name, json_log=False):
+    """Start een trace voor de huidige context (bijv. één Streamlit-rerun).
+
+    Met `json_log` komt er een JSON-handler op "roi.perf" bij (zie `enable_json_logging`).
+    """
+    if json_log:
+        enable_json_logging()
+    trace = Trace(name)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(stage, **fields):
+    """Meet een stap; extra velden (rows, bytes, ...) kunnen in de yielded dict worden gezet."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield fields
+        return
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        trace.add({"stage": stage, "ms": round((time.perf_counter() - start) * 1000, 2), **fields})
+
+
+def record(stage, seconds, **fields):
+    """Voegt een al gemeten stap toe (bijv. connect- vs transfertijd uit een response)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add({"stage": stage, "ms": round(seconds * 1000, 2), **fields})
+
+
+def run_in_context(pool, func, *args, **kwargs):
+    """`pool.submit` die de actieve trace meeneemt naar de workerthread."""
+    context = contextvars.copy_context()
+    return pool.submit(context.run, func, *args, **kwargs)
+
+
+def spans_frame(spans):
+    import pandas as pd
+
+    df = pd.DataFrame(spans)
+    if df.empty:
+        return df
+    columns = ["stage", "ms"] + [column for column in ["rows", "bytes"] if column in df.columns]
+    return df[columns + [column for column in df.columns if column not in columns]]
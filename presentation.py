@@ -0,0 +1,314 @@
+import numpy as np
+import pandas as pd
+
+TABLE_COLUMNS = {
+    "store_name": "Store",
+    "original_total_turnover": "Original Total Turnover",
+    "original_saturday_turnover": "Original Saturday Turnover",
+    "extra_turnover": "Extra Turnover (Saturdays)",
+    "new_total_turnover": "New Total Turnover",
+    "growth_pct": "Growth %",
+}
+EUR_COLUMNS = ["original_total_turnover", "original_saturday_turnover", "extra_turnover", "new_total_turnover"]
+
+# Boven dit aantal winkels: server-side sorteren + pagineren i.p.v. één Styler over alles
+LARGE_TABLE_THRESHOLD = 200
+DEFAULT_PAGE_SIZE = 50
+
+# Staafgrafiek: top-N winkels + "Other", labels en WebGL alleen waar het past
+DEFAULT_CHART_TOP_N = 25
+CHART_TEXT_THRESHOLD = 30
+CHART_WEBGL_THRESHOLD = 150
+MAX_FIGURE_BYTES = 250_000
+OTHER_LABEL = "Other"
+
+STRIPE_CSS = "background-color: #F0F1F1"
+BASE_PROPERTIES = {
+    "background-color": "#FAFAFA",
+    "color": "#0C111D",
+    "border-color": "#85888E",
+}
+
+
+# Opmaak via de Styler: de waarden zelf blijven numeriek, zodat de tabel ook in de
+# browser op getal sorteert ("€9.000" vóór "€10.000")
+TABLE_FORMAT = {
+    "Original Total Turnover": lambda x: f"€{int(x):,}".replace(",", "."),
+    "Original Saturday Turnover": lambda x: f"€{int(x):,}".replace(",", "."),
+    "Extra Turnover (Saturdays)": lambda x: f"€{int(x):,}".replace(",", "."),
+    "New Total Turnover": lambda x: f"€{int(x):,}".replace(",", "."),
+    "Growth %": "{:.2f}%"
+}
+
+
+def style_table(df):
+    display_df = df[list(TABLE_COLUMNS)].copy()
+    display_df.columns = list(TABLE_COLUMNS.values())
+
+    return display_df.style.set_properties(
+        **BASE_PROPERTIES
+    ).apply(
+        lambda x: [STRIPE_CSS if i % 2 else "" for i in range(len(x))], axis=0
+    ).format(TABLE_FORMAT)
+
+
+# 🗓️ Oudere pagina's rekenen alles ten opzichte van de zaterdagomzet: "Original Turnover" is
+# de zaterdagomzet, "New Total Turnover" zaterdag + extra en de groei is t.o.v. zaterdag
+SATURDAY_ONLY_COLUMNS = {
+    "store_name": "Store",
+    "original_turnover": "Original Turnover",
+    "extra_turnover": "Extra Turnover",
+    "new_total_turnover": "New Total Turnover",
+    "growth_pct": "Growth %",
+}
+SATURDAY_ONLY_FORMAT = {
+    "original_turnover": "€{:,.0f}",
+    "extra_turnover": "€{:,.0f}",
+    "new_total_turnover": "€{:,.0f}",
+    "growth_pct": "{:.2f}%",
+}
+
+
+def saturday_only_results(results):
+    """Zet simulatieresultaten om naar de kolommen en betekenis van de oudere pagina's."""
+    view = results[["shop_id", "store_name", "original_saturday_turnover", "extra_turnover"]].rename(
+        columns={"original_saturday_turnover": "original_turnover"}
+    )
+    view["new_total_turnover"] = view["original_turnover"] + view["extra_turnover"]
+    view["growth_pct"] = (view["extra_turnover"] / view["original_turnover"]) * 100
+    return view
+
+
+def style_saturday_only_table(df):
+    """Tabel van de oudere pagina's (zie `saturday_only_results`), in de huisstijl."""
+    display_df = df[list(SATURDAY_ONLY_COLUMNS)].copy()
+    display_df.columns = list(SATURDAY_ONLY_COLUMNS.values())
+
+    return display_df.style.set_properties(
+        **BASE_PROPERTIES
+    ).apply(
+        lambda x: [STRIPE_CSS if i % 2 else "" for i in range(len(x))], axis=0
+    ).format({SATURDAY_ONLY_COLUMNS[column]: fmt for column, fmt in SATURDAY_ONLY_FORMAT.items()})
+
+
+def format_thousands(values, truncate=False):
+    """Getallen met punt als duizendtal-scheiding, voor een hele kolom tegelijk (NaN -> "")."""
+    values = pd.Series(values, dtype="float64").reset_index(drop=True)
+    missing = values.isna()
+    whole = np.trunc(values.fillna(0)) if truncate else values.fillna(0).round()
+    digits = whole.abs().astype("int64").astype(str).str.replace(r"\B(?=(\d{3})+(?!\d))", ".", regex=True)
+    text = pd.Series(np.where(whole < 0, "-", "")) + digits
+    return text.where(~missing, "").to_numpy(dtype=object)
+
+
+def format_eur(values):
+    # Afkappen zoals f"€{int(x):,}" in style_table
+    text = format_thousands(values, truncate=True)
+    return np.where(text == "", "", "€" + text.astype(str))
+
+
+def format_pct(values):
+    values = np.asarray(values, dtype=np.float64)
+    text = np.char.mod("%.2f%%", values)
+    return np.where(np.isnan(values), "", text)
+
+
+def sort_and_paginate(df, sort_by="extra_turnover", ascending=False, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """Sorteert op de numerieke waarden en geeft (pagina, aantal pagina's) terug."""
+    n_pages = max(1, -(-len(df) // page_size))
+    page = min(max(1, int(page)), n_pages)
+    ordered = df.sort_values(sort_by, ascending=ascending, kind="stable", na_position="last")
+    start = (page - 1) * page_size
+    return ordered.iloc[start:start + page_size], n_pages
+
+
+def build_table_page(page_df):
+    """Weergave van één pagina met de tabelkoppen; de getallen blijven numeriek (opmaak: `style_table_page`)."""
+    display_df = pd.DataFrame({"Store": page_df["store_name"].fillna(page_df["shop_id"].astype(str)).to_numpy()})
+    for column in EUR_COLUMNS + ["growth_pct"]:
+        display_df[TABLE_COLUMNS[column]] = page_df[column].to_numpy(dtype=np.float64)
+    return display_df
+
+
+def style_table_page(display_df):
+    """Zelfde look als `style_table`, met de zebra-strepen in één keer berekend.
+
+    Alleen de rijen van deze pagina worden geformatteerd.
+    """
+    stripes = np.where(np.arange(len(display_df)) % 2 == 1, STRIPE_CSS, "")
+    stripe_frame = pd.DataFrame(
+        np.repeat(stripes[:, np.newaxis], display_df.shape[1], axis=1),
+        index=display_df.index,
+        columns=display_df.columns,
+    )
+    return display_df.style.set_properties(**BASE_PROPERTIES).apply(lambda _: stripe_frame, axis=None).format(
+        TABLE_FORMAT, na_rep=""
+    )
+
+
+def table_column_config():
+    """Getalkolommen als NumberColumn: sorteren in de browser gaat op de waarde, niet op de tekst."""
+    import streamlit as st
+
+    config = {"Store": st.column_config.TextColumn("Store", width="medium")}
+    for column in EUR_COLUMNS + ["growth_pct"]:
+        label = TABLE_COLUMNS[column]
+        config[label] = st.column_config.NumberColumn(label)
+    return config
+
+
+def top_n_with_other(df, top_n=DEFAULT_CHART_TOP_N):
+    """Houdt de top-N winkels op extra omzet; de rest wordt samengevoegd tot "Other"."""
+    chart_df = df[["shop_id", "store_name", "extra_turnover"]].copy()
+    chart_df["store_name"] = chart_df["store_name"].fillna(chart_df["shop_id"].astype(str))
+    if len(chart_df) <= top_n:
+        return chart_df[["store_name", "extra_turnover"]]
+    ordered = chart_df.sort_values("extra_turnover", ascending=False, kind="stable", na_position="last")
+    top = ordered.iloc[:top_n][["store_name", "extra_turnover"]]
+    other = pd.DataFrame({
+        "store_name": [f"{OTHER_LABEL} ({len(ordered) - top_n} stores)"],
+        "extra_turnover": [ordered["extra_turnover"].iloc[top_n:].sum()],
+    })
+    return pd.concat([top, other], ignore_index=True)
+
+
+def figure_payload_bytes(fig):
+    return len(fig.to_json().encode("utf-8"))
+
+
+def build_store_bar_chart(df, top_n=DEFAULT_CHART_TOP_N, max_bytes=MAX_FIGURE_BYTES):
+    """Staafgrafiek van extra omzet per winkel met een plafond op de figure-payload.
+
+    Past de figuur niet binnen `max_bytes`, dan wordt top-N gehalveerd tot hij past.
+    """
+    fig = _store_bar_chart(top_n_with_other(df, top_n))
+    while figure_payload_bytes(fig) > max_bytes and top_n > 1:
+        top_n = max(1, top_n // 2)
+        fig = _store_bar_chart(top_n_with_other(df, top_n))
+    return fig
+
+
+def _store_bar_chart(chart_df):
+    # plotly pas laden als er echt een grafiek wordt gebouwd
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    n_bars = len(chart_df)
+    show_text = n_bars <= CHART_TEXT_THRESHOLD
+    labels = {"store_name": "Store", "extra_turnover": "Extra Turnover (Saturdays) (€)"}
+
+    if n_bars > CHART_WEBGL_THRESHOLD:
+        # Plotly heeft geen WebGL-bar; bij veel categorieën tekent Scattergl de toppen
+        fig = go.Figure(go.Scattergl(
+            x=chart_df["store_name"],
+            y=chart_df["extra_turnover"],
+            mode="markers",
+            marker=dict(color="#762181", size=6),
+            hovertemplate="<b>%{x}</b><br>Extra Turnover (€): €%{y:,.0f}<extra></extra>",
+        ))
+        fig.update_layout(title="Conversion Boost Impact on Saturdays")
+    else:
+        chart_df = chart_df.assign(extra_turnover_display=format_thousands(chart_df["extra_turnover"].to_numpy()))
+        fig = px.bar(
+            chart_df,
+            x="store_name",
+            y="extra_turnover",
+            text="extra_turnover_display" if show_text else None,
+            custom_data=["extra_turnover_display"],
+            color_discrete_sequence=["#762181"],
+            labels=labels,
+            title="Conversion Boost Impact on Saturdays"
+        )
+        fig.update_traces(
+            textposition="outside" if show_text else None,
+            hovertemplate="<b>%{x}</b><br>Extra Turnover (€): €%{customdata[0]}<extra></extra>"
+        )
+
+    fig.update_layout(
+        plot_bgcolor="#FAFAFA",
+        paper_bgcolor="#FAFAFA",
+        font_color="#0C111D",
+        xaxis=dict(
+            title="Store",
+            title_font=dict(color="#0C111D"),
+            tickfont=dict(color="#0C111D"),
+            linecolor="#85888E",
+            gridcolor="#85888E",
+            type="category",
+            showticklabels=n_bars <= CHART_WEBGL_THRESHOLD,
+        ),
+        yaxis=dict(
+            title="Extra Turnover (€)",
+            title_font=dict(color="#0C111D"),
+            tickfont=dict(color="#0C111D"),
+            linecolor="#85888E",
+            gridcolor="#85888E",
+            # Geen tickformat, dit voorkomt 15.2k notatie
+        )
+    )
+    return fig
+
+
+# 🎯 Gevoeligheid en uurdata: losse builders, zodat de pagina ze als stappen kan memoiseren
+CHART_LAYOUT = dict(plot_bgcolor="#FAFAFA", paper_bgcolor="#FAFAFA", font_color="#0C111D")
+HEATMAP_MAX_STORES = 50
+
+
+def build_sensitivity_chart(sweep):
+    """Portfoliocurve per weekdag over alle boostwaarden van de sweep."""
+    import plotly.express as px
+
+    portfolio_curve = sweep["extra_turnover"].sum(axis=0)
+    curve_df = pd.DataFrame({
+        "weekday": np.repeat(sweep["weekdays"], len(sweep["boost_values"])),
+        "boost_pct": np.tile(sweep["boost_values"], len(sweep["weekdays"])),
+        "extra_turnover": portfolio_curve.ravel(),
+    })
+    fig = px.line(
+        curve_df,
+        x="boost_pct",
+        y="extra_turnover",
+        color="weekday",
+        labels={"boost_pct": "Conversion increase (%)", "extra_turnover": "Extra Turnover (€)", "weekday": "Weekday"},
+        title="Portfolio revenue sensitivity per weekday"
+    )
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
+
+
+def build_weekday_heatmap(sweep, boost_pct, max_stores=HEATMAP_MAX_STORES, label=str):
+    """Heatmap winkel × weekdag bij de sweepwaarde die het dichtst bij boost_pct ligt.
+
+    Bij grote portfolio's alleen de `max_stores` winkels met het meeste potentieel.
+    """
+    import plotly.express as px
+
+    boost_index = int(np.abs(sweep["boost_values"] - boost_pct).argmin())
+    heat = sweep["extra_turnover"][:, :, boost_index]
+    top = np.argsort(-heat.sum(axis=1))[:max_stores]
+    fig = px.imshow(
+        heat[top],
+        x=sweep["weekdays"],
+        y=[label(shop_id) for shop_id in sweep["shop_ids"][top]],
+        color_continuous_scale=["#FAFAFA", "#FEAC76", "#762181"],
+        labels={"x": "Weekday", "y": "Store", "color": "Extra Turnover (€)"},
+        title=f"Extra turnover per store and weekday at {sweep['boost_values'][boost_index]:.1f}% boost",
+        aspect="auto"
+    )
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
+
+
+def build_hourly_chart(portfolio_hourly):
+    import plotly.express as px
+
+    fig = px.bar(
+        portfolio_hourly,
+        x="hour",
+        y="extra_turnover",
+        color_discrete_sequence=["#762181"],
+        labels={"hour": "Hour of day", "extra_turnover": "Extra Turnover (€)"},
+        title="Extra Saturday turnover per hour (portfolio)"
+    )
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
@@ -0,0 +1,523 @@
+# 🧩 Gedeelde kern voor alle pagina's
+#
+# API-client, normalisatie, simulatiekernels, opmaak en de KPI-fetch
+# (cache → lokale historie → API) op één plek. De module wordt één keer per
+# proces geïmporteerd; de KPI-cache is procesbreed, dus data die op de ene
+# pagina (of in de ene sessie) is opgehaald, is op de andere direct beschikbaar.
+import logging
+import threading
+
+LOGGER = logging.getLogger("roi.core")
+
+# 💤 Zware modules (pandas, numpy, requests, plotly) worden pas geladen als een naam
+# hieronder voor het eerst wordt gebruikt. Streamlit draait het paginascript bij elke
+# interactie opnieuw; zo betaalt de eerste render (alleen widgets) die importtijd niet.
+_LAZY_EXPORTS = {
+    "data_transformer": ["normalize_vemcount_response", "to_compact_schema"],
+    "presentation": [
+        "DEFAULT_CHART_TOP_N",
+        "DEFAULT_PAGE_SIZE",
+        "LARGE_TABLE_THRESHOLD",
+        "SATURDAY_ONLY_FORMAT",
+        "TABLE_COLUMNS",
+        "HEATMAP_MAX_STORES",
+        "build_hourly_chart",
+        "build_sensitivity_chart",
+        "build_store_bar_chart",
+        "build_table_page",
+        "build_weekday_heatmap",
+        "format_eur",
+        "format_pct",
+        "format_thousands",
+        "saturday_only_results",
+        "sort_and_paginate",
+        "style_saturday_only_table",
+        "style_table",
+        "style_table_page",
+        "table_column_config",
+    ],
+    "simulation": [
+        "WEEKDAYS",
+        "bootstrap_saturday_potential",
+        "compute_hourly_potential",
+        "compute_saturday_aggregates",
+        "compute_saturday_matrix",
+        "compute_weekday_potential",
+        "simulate_conversion_boost_on_saturdays",
+        "simulate_from_aggregates",
+        "simulate_from_hourly_potential",
+        "simulate_intervals_from_bootstrap",
+        "sweep_from_weekday_potential",
+    ],
+    "vemcount_client": ["VemcountAPIError", "fetch_report_frame"],
+}
+_LAZY_MODULE_BY_NAME = {name: module for module, names in _LAZY_EXPORTS.items() for name in names}
+
+
+def __getattr__(name):
+    module = _LAZY_MODULE_BY_NAME.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+DEFAULT_SHOP_IDS = [26304, 26560, 26509, 26480, 26640, 26359, 26630, 27038, 26647, 26646]
+
+# Standaardwaarden voor optionele secrets; API_URL is verplicht
+SETTING_DEFAULTS = {
+    "KPI_CACHE_TTL_SECONDS": 3600,
+    "KPI_CACHE_MAX_ENTRIES": 512,
+    "KPI_CACHE_MAX_STALE_SECONDS": 86400,  # verlopen data nog zo lang tonen terwijl er ververst wordt
+    "API_CHUNK_SIZE": 50,
+    "API_MAX_IN_FLIGHT": 8,
+    "API_TIMEOUT_SECONDS": 60.0,
+    "API_RETRIES": 2,
+    "API_BREAKER_FAILURES": 5,
+    "API_BREAKER_RESET_SECONDS": 30.0,
+    "API_STREAMING": False,
+    "KPI_COMPACT_SCHEMA": False,
+    "HISTORY_DIR": ".kpi_history",  # "" = geen lokale historie
+    "STAGE_CACHE_MAX_BYTES": 256 * 1024 * 1024,  # geheugenbudget voor gememoiseerde paginastappen (0 = uit)
+    "PERF_JSON_LOG": False,  # spans ook als JSON-regels op stderr (logger "roi.perf" propageert altijd)
+    "SHOP_REGISTRY_SOURCE": "",  # "" = ingebouwde SHOP_NAME_MAP; anders CSV/JSON-pad of URL (zie shop_registry.py)
+    "SHOP_PICKER_MAX_OPTIONS": 200,  # grotere registers: zoeken in plaats van alle winkels als opties
+    # 🎲 Bootstrap-intervallen; vaste seed = reproduceerbare rapporten
+    "BOOTSTRAP_DRAWS": 10_000,
+    "BOOTSTRAP_CONFIDENCE": 0.95,
+    "BOOTSTRAP_SEED": 42,
+    # 🔥 Cache warmer (zie cache_warmer.py)
+    "CACHE_WARMER_ENABLED": False,
+    "CACHE_WARMER_INTERVAL_SECONDS": 1800.0,
+    "CACHE_WARMER_JITTER_SECONDS": 120.0,
+    "CACHE_WARMER_CONCURRENCY": 1,  # portfolio's tegelijk
+    "CACHE_WARMER_MAX_IN_FLIGHT": 2,  # chunk-requests per portfolio, zodat sessies voorrang houden
+    "WARM_PORTFOLIOS": {"default": DEFAULT_SHOP_IDS},
+}
+
+# ✅ Styling: paarse pills & rode knop (gedeeld door alle pagina's)
+PAGE_CSS = """
+    <style>
+    /* Font import (optioneel) */
+    @import url('https://fonts.googleapis.com/css2?family=Instrument+Sans:wght@400;500;600&display=swap');
+
+    /* Forceer Instrument Sans als standaard font */
+    html, body, [class*="css"] {
+        font-family: 'Instrument Sans', sans-serif !important;
+    }
+
+    /* 🎨 Multiselect pills in paars */
+    [data-baseweb="tag"] {
+        background-color: #9E77ED !important;
+        color: white !important;
+    }
+
+    /* 🔴 "Run simulation" knop in PFM-rood */
+    button[data-testid="stBaseButton-secondary"] {
+        background-color: #F04438 !important;
+        color: white !important;
+        border-radius: 16px !important;
+        font-weight: 600 !important;
+        font-family: "Instrument Sans", sans-serif !important;
+        padding: 0.6rem 1.4rem !important;
+        border: none !important;
+        box-shadow: none !important;
+        transition: background-color 0.2s ease-in-out;
+    }
+
+    button[data-testid="stBaseButton-secondary"]:hover {
+        background-color: #d13c30 !important;
+        cursor: pointer;
+    }
+    </style>
+    """
+
+
+def load_settings(secrets=None):
+    """Leest de configuratie uit `st.secrets` (of een dict) met de standaardwaarden hierboven."""
+    if secrets is None:
+        import streamlit as st
+
+        secrets = st.secrets
+    settings = {"API_URL": secrets["API_URL"].rstrip("/")}
+    for key, default in SETTING_DEFAULTS.items():
+        value = secrets.get(key, default)
+        settings[key] = _parse_bool(key, value) if isinstance(default, bool) else type(default)(value)
+    return settings
+
+
+def _parse_bool(key, value):
+    """Bool-secret als bool/getal of als string ("true"/"false", "1"/"0", "yes"/"no", "on"/"off").
+
+    Niet via `bool(value)`: de string "false" (bijv. uit een env-var) zou dan True worden.
+    """
+    if not isinstance(value, str):
+        return bool(value)
+    text = value.strip().lower()
+    if text in ("1", "true", "yes", "on"):
+        return True
+    if text in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError(f"{key} must be true or false, got {value!r}")
+
+
+def get_kpi_cache(settings):
+    from kpi_cache import get_default_cache
+
+    return get_default_cache(
+        settings["KPI_CACHE_TTL_SECONDS"], settings["KPI_CACHE_MAX_ENTRIES"], settings["KPI_CACHE_MAX_STALE_SECONDS"]
+    )
+
+
+def get_stage_graph(settings):
+    from stage_graph import get_stage_graph as _get_stage_graph
+
+    return _get_stage_graph(settings["STAGE_CACHE_MAX_BYTES"])
+
+
+def get_kpi_data_for_stores(shop_ids, period="last_year", step="day", settings=None, on_error=None, on_stale=None,
+                            on_failed=None):
+    """KPI's voor shop_ids: eerst de procesbrede cache, dan de lokale historie, dan de API.
+
+    `period` is een Vemcount-periode of een (date_from, date_to)-tuple; een datumbereik
+    wordt per maand gecachet (zie `get_kpi_data_by_month`). Verlopen cache-items
+    worden direct geserveerd en op de achtergrond ververst; `on_stale` krijgt dan de
+    betreffende shop_ids. `on_error` krijgt een foutmelding (bijv. `st.error`); bij
+    een mislukte fetch komt alleen terug wat er al was (anders een lege DataFrame),
+    en wordt er niets gecachet. `on_failed` krijgt dan de shop_ids die daardoor
+    ontbreken, zodat een totaal niet als het hele portfolio wordt getoond.
+    """
+    if isinstance(period, tuple):
+        return get_kpi_data_by_month(shop_ids, period, step, settings, on_error, on_stale, on_failed)
+
+    from history_store import period_date_range, read_history, write_history
+    from kpi_cache import merge_shop_frames
+
+    settings = settings or load_settings()
+    history_dir = settings["HISTORY_DIR"]
+
+    # 🗃️ Alleen shops die niet in de cache zitten worden opgehaald; verlopen shops
+    # worden meteen getoond en op de achtergrond ververst (stale-while-revalidate)
+    cache = get_kpi_cache(settings)
+    cached, stale, missing = cache.split_stale(shop_ids, period, step)
+    if stale:
+        refresh_in_background(list(stale), period, step, settings)
+        cached.update(stale)
+        if on_stale is not None:
+            on_stale(list(stale))
+
+    # 🗄️ Daarna de lokale historie: shops die het bereik (na het aanvullen van de gaten) op schijf hebben
+    date_range = period_date_range(period) if history_dir and step == "day" else None
+    failed = []
+    if missing and date_range:
+        on_disk, failed = sync_history_range(history_dir, missing, *date_range, settings=settings, on_error=on_error)
+        if on_disk:
+            df_disk = read_history(history_dir, on_disk, *date_range)
+            cached.update(cache.store_frame(df_disk, on_disk, period, step))
+        missing = [shop_id for shop_id in missing if shop_id not in on_disk and shop_id not in failed]
+
+    if missing:
+        df_missing = fetch_kpi_data(missing, period=period, step=step, settings=settings, on_error=on_error)
+        if df_missing is not None:
+            cached.update(cache.store_frame(df_missing, missing, period, step))
+            if date_range:
+                write_history(history_dir, df_missing, *date_range, shop_ids=missing)
+        else:
+            failed += missing
+    if failed and on_failed is not None:
+        on_failed([shop_id for shop_id in shop_ids if shop_id in failed])
+    return merge_shop_frames(cached, shop_ids)
+
+
+def sync_history_range(history_dir, shop_ids, start, end, settings=None, on_error=None):
+    """Vult voor deels gedekte shops alleen de ontbrekende dagen van [start, end] aan in de historie.
+
+    Zoals `history_store.sync_history`: shops met dezelfde gaten delen hun requests. Geeft
+    (gedekt, mislukt): shops die nu het hele bereik op schijf hebben, en shops waarvan
+    een gat niet kon worden opgehaald. Shops zonder enige dag in het bereik staan in
+    geen van beide; die haalt de aanroeper in één keer op.
+    """
+    from history_store import missing_ranges, write_history
+
+    by_gaps = {}
+    for shop_id in shop_ids:
+        gaps = missing_ranges(history_dir, shop_id, start, end)
+        if gaps != [(start, end)]:
+            by_gaps.setdefault(tuple(gaps), []).append(shop_id)
+
+    covered, failed = [], []
+    for gaps, shops in by_gaps.items():
+        for gap in gaps:
+            df = fetch_kpi_data(shops, period=gap, step="day", settings=settings, on_error=on_error)
+            if df is None:
+                failed += shops
+                break
+            write_history(history_dir, df, *gap, shop_ids=shops)
+        else:
+            covered += shops
+    return covered, failed
+
+
+def get_kpi_data_by_month(shop_ids, period, step="day", settings=None, on_error=None, on_stale=None, on_failed=None):
+    """Zoals `get_kpi_data_for_stores`, maar met elke kalendermaand als eigen cache-item.
+
+    Een langer (of verschoven) bereik haalt alleen de maanden op die nog niet in de
+    cache of de lokale historie staan; die gaan parallel als maand-requests.
+    """
+    from history_store import read_history, write_history
+    from kpi_cache import merge_shop_frames
+    from vemcount_client import merge_monthly_frames, month_ranges
+
+    settings = settings or load_settings()
+    history_dir = settings["HISTORY_DIR"] if step == "day" else ""
+    cache = get_kpi_cache(settings)
+
+    months = month_ranges(period)
+    cached_by_month, missing_by_month, stale_shops, failed = {}, {}, set(), set()
+    for month in months:
+        cached, stale, missing = cache.split_stale(shop_ids, month, step)
+        if stale:
+            refresh_in_background(list(stale), month, step, settings)
+            cached.update(stale)
+            stale_shops.update(stale)
+        if missing and history_dir:
+            on_disk, failed_gaps = sync_history_range(history_dir, missing, *month, settings=settings, on_error=on_error)
+            if on_disk:
+                cached.update(cache.store_frame(read_history(history_dir, on_disk, *month), on_disk, month, step))
+            failed.update(failed_gaps)
+            missing = [shop_id for shop_id in missing if shop_id not in on_disk and shop_id not in failed_gaps]
+        cached_by_month[month] = cached
+        if missing:
+            missing_by_month[month] = missing
+    if stale_shops and on_stale is not None:
+        on_stale(sorted(stale_shops))
+
+    if missing_by_month:
+        fetched = fetch_kpi_months(missing_by_month, step=step, settings=settings, on_error=on_error) or {}
+        for month in sorted(fetched):
+            cached_by_month[month].update(cache.store_frame(fetched[month], missing_by_month[month], month, step))
+            if history_dir:
+                write_history(history_dir, fetched[month], *month, shop_ids=missing_by_month[month])
+        failed.update(shop_id for month, shops in missing_by_month.items() if month not in fetched for shop_id in shops)
+    if failed and on_failed is not None:
+        on_failed([shop_id for shop_id in shop_ids if shop_id in failed])
+
+    frames = [merge_shop_frames(cached_by_month[month], shop_ids) for month in months]
+    return merge_monthly_frames(frames, shop_ids)
+
+
+SATURDAY_AGGREGATES = "saturday_aggregates"
+
+
+def get_saturday_aggregates(shop_ids, period="last_year", step="day", df=None, settings=None):
+    """Zaterdag-aggregaten per shop, hergebruikt uit de cache waar ze al berekend zijn.
+
+    Per shop hangen ze aan het cache-item van de KPI-frame (en vervallen ze met een
+    refresh), dus wat de cache warmer of een eerdere sessie berekende, wordt niet
+    opnieuw gedaan. Shops zonder cache-item (bijv. bij een datumbereik) worden uit
+    `df` berekend. Zelfde uitvoer als `compute_saturday_aggregates`.
+    """
+    import pandas as pd
+    from kpi_cache import merge_shop_frames
+    from simulation import compute_saturday_aggregates
+
+    if isinstance(period, tuple):
+        return compute_saturday_aggregates(df)
+
+    cache = get_kpi_cache(settings or load_settings())
+    parts, todo = [], []
+    for shop_id in dict.fromkeys(int(shop_id) for shop_id in shop_ids):
+        aggregates = cache.get_derived(shop_id, period, step, SATURDAY_AGGREGATES)
+        if aggregates is None:
+            todo.append(shop_id)
+        else:
+            parts.append(aggregates)
+
+    frames = {shop_id: cache.get(shop_id, period, step, allow_stale=True) for shop_id in todo}
+    cached = {shop_id: frame for shop_id, frame in frames.items() if frame is not None and not frame.empty}
+    if cached:
+        computed = compute_saturday_aggregates(merge_shop_frames(cached, list(cached)))
+        for shop_id, row in computed.groupby("shop_id", sort=False):
+            cache.put_derived(shop_id, period, step, SATURDAY_AGGREGATES, row)
+            parts.append(row)
+
+    uncached = [shop_id for shop_id in todo if shop_id not in cached]
+    if uncached and df is not None:
+        subset = df[df["shop_id"].isin(uncached)]
+        if not subset.empty:
+            parts.append(compute_saturday_aggregates(subset))
+
+    if not parts:
+        return compute_saturday_aggregates(df) if df is not None else None
+    return pd.concat(parts, ignore_index=True).sort_values("shop_id", ignore_index=True)
+
+
+# 🔄 Achtergrondverversing van stale cache-items; één lopende refresh per (period, step, shops)
+_refresh_pool = None
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+
+def refresh_in_background(shop_ids, period, step="day", settings=None):
+    """Plant een refresh in; geeft False als precies deze refresh al loopt."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    global _refresh_pool
+    settings = settings or load_settings()
+    key = (period, step, tuple(sorted(int(shop_id) for shop_id in shop_ids)))
+    with _refresh_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+        if _refresh_pool is None:
+            _refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="kpi-refresh")
+    _refresh_pool.submit(_refresh, key, shop_ids, period, step, settings)
+    return True
+
+
+def _refresh(key, shop_ids, period, step, settings):
+    try:
+        df = fetch_kpi_data(shop_ids, period=period, step=step, settings=settings, on_error=LOGGER.warning)
+        if df is not None:
+            get_kpi_cache(settings).store_frame(df, shop_ids, period, step)
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
+
+
+def refreshes_in_flight():
+    with _refresh_lock:
+        return len(_refreshing)
+
+
+def _fetch_options(settings, step):
+    from circuit_breaker import get_circuit_breaker
+
+    # Eén breaker per wrapper-URL, gedeeld door alle sessies
+    get_circuit_breaker(settings["API_URL"], settings["API_BREAKER_FAILURES"], settings["API_BREAKER_RESET_SECONDS"])
+    # Uurdata is 24× zo groot: altijd streaming parsen en compact opslaan
+    return dict(
+        streaming=settings["API_STREAMING"] or step == "hour",
+        compact=settings["KPI_COMPACT_SCHEMA"] or step == "hour",
+        chunk_size=settings["API_CHUNK_SIZE"],
+        max_in_flight=settings["API_MAX_IN_FLIGHT"],
+        timeout=(5, settings["API_TIMEOUT_SECONDS"]),
+        retries=settings["API_RETRIES"],
+    )
+
+
+def _guarded_fetch(fetch, on_error, *args, **kwargs):
+    from vemcount_client import VemcountAPIError
+
+    try:
+        return fetch(*args, **kwargs)
+    except VemcountAPIError as e:
+        message = f"❌ Error fetching data: {e}"
+    except Exception as e:
+        message = f"🚨 API call exception: {e}"
+    if on_error is not None:
+        on_error(message)
+    # None = mislukt, zodat fouten niet als lege data in de cache belanden
+    return None
+
+
+def fetch_kpi_data(shop_ids, period="last_year", step="day", settings=None, on_error=None):
+    from vemcount_client import fetch_report_frame
+
+    settings = settings or load_settings()
+    return _guarded_fetch(
+        fetch_report_frame, on_error, settings["API_URL"], shop_ids, period=period, step=step,
+        **_fetch_options(settings, step),
+    )
+
+
+def fetch_kpi_months(shops_by_month, step="day", settings=None, on_error=None):
+    from vemcount_client import fetch_monthly_frames
+
+    settings = settings or load_settings()
+    return _guarded_fetch(
+        fetch_monthly_frames, on_error, settings["API_URL"], shops_by_month, step=step,
+        **_fetch_options(settings, step),
+    )
+
+
+def get_registry(settings=None):
+    from shop_registry import get_shop_registry
+
+    return get_shop_registry((settings or load_settings())["SHOP_REGISTRY_SOURCE"])
+
+
+def shop_label(shop_id):
+    from shop_registry import get_shop_registry
+
+    return get_shop_registry().label(shop_id)
+
+
+def shop_picker(settings, label="Select stores", key="selected_shop_ids"):
+    """Winkelkeuze met type-ahead; geeft de gekozen shop_ids.
+
+    Kleine registers tonen alle winkels als opties. Grote registers (meer dan
+    `SHOP_PICKER_MAX_OPTIONS`) tonen alleen de huidige selectie plus de zoektreffers
+    van de prefix-index, zodat de widget bij 10k+ winkels licht blijft.
+    """
+    import streamlit as st
+
+    registry = get_registry(settings)
+    if key not in st.session_state:
+        st.session_state[key] = [shop_id for shop_id in DEFAULT_SHOP_IDS if shop_id in registry]
+
+    max_options = settings["SHOP_PICKER_MAX_OPTIONS"]
+    if len(registry) <= max_options:
+        options = list(registry.by_id)
+    else:
+        query = st.text_input(f"Search stores ({len(registry):,} available)", key=f"{key}_query",
+                              placeholder="Type a store name or ID")
+        options = list(dict.fromkeys(st.session_state[key] + registry.search(query, limit=max_options)))
+    return st.multiselect(label, options=options, format_func=registry.label, key=key)
+
+
+def apply_page_style():
+    import streamlit as st
+
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
+
+
+def render_export_buttons(frames, key="export"):
+    """Downloadknoppen voor [(label, df, bestandsnaam)]; het bestand wordt pas bij een klik geschreven."""
+    from functools import partial
+
+    import streamlit as st
+    from exporter import EXPORT_FORMATS, export_file_name, open_export
+
+    fmt = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True, key=f"{key}_format")
+    for column, (label, df, name) in zip(st.columns(len(frames)), frames):
+        column.download_button(
+            label,
+            # Het tijdelijke bestand zelf: Streamlit leest het één keer, er staat geen kopie van ons naast
+            data=partial(open_export, df, fmt),
+            file_name=export_file_name(name, fmt),
+            mime=EXPORT_FORMATS[fmt][0],
+            key=f"{key}_{name}",
+            on_click="ignore",
+        )
+
+
+def render_growth_banner(total_extra_turnover):
+    import streamlit as st
+    from presentation import format_thousands
+
+    st.markdown(f"""
+        <div style='background-color: #FEAC76;
+                    color: #000000;
+                    padding: 1.5rem;
+                    border-radius: 0.75rem;
+                    font-size: 1.25rem;
+                    font-weight: 600;
+                    text-align: center;
+                    margin-bottom: 1.5rem;'>
+            🚀 The potential revenue growth is <span style='font-size:1.5rem;'>€{format_thousands([total_extra_turnover])[0]}</span>
+        </div>
+     """, unsafe_allow_html=True)
@@ -0,0 +1,142 @@
+# 🏬 Winkelregister: id, naam, regio en land, met indexen voor snelle lookups
+#
+# Vervangt het omkeren van `SHOP_NAME_MAP` op elke rerun. Het register wordt één
+# keer per proces (per bron) gebouwd, met kant-en-klare indexen:
+#   id → winkel, naam → ids (namen zijn niet uniek), label → id en een gesorteerde
+#   prefix-index (bisect) voor type-ahead zoeken, ook bij 10k+ winkels.
+# Bron: "" (de ingebouwde SHOP_NAME_MAP), een CSV-/JSON-bestand of een http(s)-URL
+# die een JSON-lijst met winkels teruggeeft.
+import csv
+import json
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+
+from shop_mapping import SHOP_NAME_MAP
+
+Shop = namedtuple("Shop", ["shop_id", "name", "region", "country"])
+
+DEFAULT_SEARCH_LIMIT = 50
+
+
+def normalize(text):
+    """Hoofdletter- en accentongevoelig: 'Zürich' en 'zurich' zijn gelijk."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+class ShopRegistry:
+    def __init__(self, shops):
+        self.by_id = {}
+        for shop in shops:
+            self.by_id[int(shop.shop_id)] = shop._replace(shop_id=int(shop.shop_id))
+
+        self.ids_by_name = {}
+        for shop in self.by_id.values():
+            self.ids_by_name.setdefault(normalize(shop.name), []).append(shop.shop_id)
+
+        # Dubbele namen (bijv. twee keer "Paris") krijgen regio/land en id erbij, zodat elk label uniek is
+        self.labels = {}
+        for shop in self.by_id.values():
+            if len(self.ids_by_name[normalize(shop.name)]) == 1:
+                self.labels[shop.shop_id] = shop.name
+            else:
+                where = shop.region or shop.country
+                self.labels[shop.shop_id] = f"{shop.name}, {where} ({shop.shop_id})" if where else f"{shop.name} ({shop.shop_id})"
+        self.id_by_label = {label: shop_id for shop_id, label in self.labels.items()}
+
+        # Prefix-index: de hele naam, elk volgend woord ("den haag" → ook "haag") en het id
+        keys = []
+        for shop in self.by_id.values():
+            words = normalize(shop.name).split()
+            keys.extend((" ".join(words[i:]), shop.shop_id) for i in range(len(words)))
+            keys.append((str(shop.shop_id), shop.shop_id))
+        self._keys = sorted(keys)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, shop_id):
+        return int(shop_id) in self.by_id
+
+    def name(self, shop_id):
+        shop = self.by_id.get(int(shop_id))
+        return shop.name if shop else str(shop_id)
+
+    def label(self, shop_id):
+        return self.labels.get(int(shop_id), str(shop_id))
+
+    def ids_for_name(self, name):
+        return list(self.ids_by_name.get(normalize(name), []))
+
+    def ids_for_labels(self, labels):
+        return [self.id_by_label[label] for label in labels if label in self.id_by_label]
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """Shop_ids waarvan de naam (of een woord daarin) of het id met `query` begint.
+
+        O(log n + limit) via bisect; exacte naamtreffers eerst, daarna alfabetisch.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        exact = self.ids_for_name(prefix)
+        found = dict.fromkeys(exact[:limit])
+        index = bisect_left(self._keys, (prefix,))
+        while len(found) < limit and index < len(self._keys) and self._keys[index][0].startswith(prefix):
+            found.setdefault(self._keys[index][1])
+            index += 1
+        return list(found)
+
+
+def _read_file(path):
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _read_url(url):
+    import requests
+
+    response = requests.get(url, timeout=(5, 30))
+    response.raise_for_status()
+    payload = response.json()
+    # Zowel een kale lijst als {"data": [...]} (zoals de wrapper-responses)
+    return payload["data"] if isinstance(payload, dict) else payload
+
+
+def load_shop_registry(source=""):
+    """Bouwt het register uit een bron; records hebben shop_id/id, name, region en country."""
+    if not source:
+        return ShopRegistry(Shop(shop_id, name, "", "") for shop_id, name in SHOP_NAME_MAP.items())
+    records = _read_url(source) if source.startswith(("http://", "https://")) else _read_file(source)
+    return ShopRegistry(
+        Shop(
+            int(record.get("shop_id", record.get("id"))),
+            str(record.get("name") or record.get("shop_id", record.get("id"))),
+            record.get("region") or "",
+            record.get("country") or "",
+        )
+        for record in records
+    )
+
+
+_registries = {}
+_current_source = ""
+_registries_lock = threading.Lock()
+
+
+def get_shop_registry(source=None):
+    """Eén register per bron per proces. Zonder bron: het register dat de app als laatste laadde."""
+    global _current_source
+    with _registries_lock:
+        if source is None:
+            source = _current_source
+        registry = _registries.get(source)
+        if registry is None:
+            registry = _registries[source] = load_shop_registry(source)
+        _current_source = source
+        return registry
@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+
+from perf_trace import span
+from shop_registry import get_shop_registry
+
+SATURDAY = 5
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+DEFAULT_BOOTSTRAP_DRAWS = 10_000
+DEFAULT_CONFIDENCE = 0.95
+BOOTSTRAP_BLOCK_SHOPS = 1_000  # winkels per matrixproduct; begrenst het geheugen op blok × trekkingen
+
+
+def compute_saturday_aggregates(df):
+    """Eenmalige voorbewerking per shop, onafhankelijk van de conversieboost.
+
+    Het boost-effect is lineair: extra omzet = boost × Σ(count_in × atv) over de
+    zaterdagen. Met deze sommen per shop kost elke sliderwaarde nog maar O(shops).
+    """
+    if "date" not in df.columns:
+        raise ValueError("❌ The 'date' column is missing from the DataFrame.")
+    if "sales_per_transaction" not in df.columns:
+        raise ValueError("❌ 'sales_per_transaction' is missing in the data.")
+
+    with span("saturday_filter", rows=len(df)) as fields:
+        dates = pd.to_datetime(df["date"])
+        is_saturday = (dates.dt.dayofweek == SATURDAY).to_numpy()
+        potential = _boost_potential(df)
+        saturdays = pd.DataFrame({
+            "shop_id": df["shop_id"].to_numpy()[is_saturday],
+            "turnover": df["turnover"].to_numpy()[is_saturday],
+            "potential": potential[is_saturday],
+        })
+        fields["saturday_rows"] = len(saturdays)
+
+    with span("aggregation") as fields:
+        # Volledige omzet per winkel (alle dagen)
+        total_turnover = df.groupby("shop_id")["turnover"].sum().reset_index()
+        total_turnover.columns = ["shop_id", "original_total_turnover"]
+
+        saturday_grouped = saturdays.groupby("shop_id").agg(
+            original_saturday_turnover=("turnover", "sum"),
+            saturday_potential=("potential", "sum")
+        ).reset_index()
+
+        aggregates = pd.merge(total_turnover, saturday_grouped, on="shop_id", how="left")
+        fields["rows"] = len(aggregates)
+    return aggregates
+
+
+def _boost_potential(df):
+    # count_in × atv per rij; ATV van 0 telt niet mee (zoals voorheen via replace(0, pd.NA)).
+    # Rekent in float32 als de frame het compacte schema heeft, zodat er niets terug-upcast.
+    dtype = np.float32 if df["sales_per_transaction"].dtype == np.float32 else np.float64
+    atv = df["sales_per_transaction"].to_numpy(dtype=dtype, na_value=np.nan)
+    atv = np.where(atv != 0, atv, dtype(np.nan))
+    return df["count_in"].to_numpy(dtype=dtype, na_value=np.nan) * atv
+
+
+def simulate_from_aggregates(aggregates, conversion_boost_pct):
+    results = aggregates[["shop_id", "original_total_turnover", "original_saturday_turnover"]].copy()
+    results["extra_turnover"] = aggregates["saturday_potential"] * (conversion_boost_pct / 100.0)
+    results["store_name"] = results["shop_id"].map(get_shop_registry().labels)
+    results["new_total_turnover"] = results["original_total_turnover"] + results["extra_turnover"]
+    results["growth_pct"] = (results["extra_turnover"] / results["original_total_turnover"]) * 100
+    return results
+
+
+def simulate_conversion_boost_on_saturdays(df, conversion_boost_pct):
+    return simulate_from_aggregates(compute_saturday_aggregates(df), conversion_boost_pct)
+
+
+def compute_weekday_potential(df):
+    """Σ(count_in × atv) per (shop, weekdag) als matrix van vorm (shops, 7), via één bincount."""
+    dates = pd.to_datetime(df["date"])
+    codes, shop_ids = pd.factorize(df["shop_id"], sort=True)
+    weekday = dates.dt.dayofweek.to_numpy(dtype=np.float64, na_value=np.nan)
+    potential = _boost_potential(df)
+
+    valid = (codes >= 0) & ~np.isnan(weekday)
+    flat_index = codes[valid] * 7 + weekday[valid].astype(np.int64)
+    matrix = np.bincount(
+        flat_index, weights=np.nan_to_num(potential[valid]), minlength=len(shop_ids) * 7
+    ).reshape(len(shop_ids), 7)
+    return np.asarray(shop_ids), matrix
+
+
+def sweep_from_weekday_potential(weekday_potential, boost_values, weekdays=WEEKDAYS):
+    """Extra omzet voor elke (shop, weekdag, boost) in één broadcast.
+
+    Geeft een dict met `shop_ids`, `weekdays`, `boost_values` en de tensor
+    `extra_turnover` van vorm (shops, weekdagen, boosts).
+    """
+    shop_ids, matrix = weekday_potential
+    weekdays = list(weekdays)
+    weekday_index = [WEEKDAYS.index(weekday) for weekday in weekdays]
+    boost_values = np.asarray(boost_values, dtype=np.float64)
+    extra_turnover = matrix[:, weekday_index, np.newaxis] * (boost_values / 100.0)[np.newaxis, np.newaxis, :]
+    return {
+        "shop_ids": shop_ids,
+        "weekdays": weekdays,
+        "boost_values": boost_values,
+        "extra_turnover": extra_turnover,
+    }
+
+
+def sweep_conversion_boost(df, boost_values, weekdays=WEEKDAYS):
+    return sweep_from_weekday_potential(compute_weekday_potential(df), boost_values, weekdays)
+
+
+def compute_hourly_potential(df, weekday=SATURDAY):
+    """Σ(count_in × atv) per (shop, uur van de dag) op één weekdag, als matrix (shops, 24)."""
+    dates = pd.to_datetime(df["date"])
+    codes, shop_ids = pd.factorize(df["shop_id"], sort=True)
+    day = dates.dt.dayofweek.to_numpy(dtype=np.float64, na_value=np.nan)
+    hour = dates.dt.hour.to_numpy(dtype=np.float64, na_value=np.nan)
+    potential = _boost_potential(df)
+
+    valid = (codes >= 0) & (day == weekday)
+    flat_index = codes[valid] * 24 + hour[valid].astype(np.int64)
+    matrix = np.bincount(
+        flat_index, weights=np.nan_to_num(potential[valid]), minlength=len(shop_ids) * 24
+    ).reshape(len(shop_ids), 24)
+    return np.asarray(shop_ids), matrix
+
+
+def simulate_from_hourly_potential(hourly_potential, conversion_boost_pct):
+    shop_ids, matrix = hourly_potential
+    results = pd.DataFrame({
+        "shop_id": np.repeat(shop_ids, 24),
+        "hour": np.tile(np.arange(24), len(shop_ids)),
+        "extra_turnover": (matrix * (conversion_boost_pct / 100.0)).ravel(),
+    })
+    results["store_name"] = results["shop_id"].map(get_shop_registry().labels)
+    return results
+
+
+def simulate_conversion_boost_by_hour(df, conversion_boost_pct, weekday=SATURDAY):
+    return simulate_from_hourly_potential(compute_hourly_potential(df, weekday), conversion_boost_pct)
+
+
+def compute_saturday_matrix(df):
+    """Σ(count_in × atv) per (shop, zaterdag) als matrix (shops, zaterdagen), via één bincount.
+
+    Kolommen zijn de zaterdagen in de data (uurdata wordt per dag opgeteld); een
+    zaterdag zonder data voor een shop telt als 0, net als in de aggregaten.
+    """
+    dates = pd.to_datetime(df["date"])
+    codes, shop_ids = pd.factorize(df["shop_id"], sort=True)
+    is_saturday = (dates.dt.dayofweek == SATURDAY).to_numpy() & (codes >= 0)
+    day_codes, saturdays = pd.factorize(dates[is_saturday].dt.normalize(), sort=True)
+    potential = np.nan_to_num(_boost_potential(df)[is_saturday])
+
+    flat_index = codes[is_saturday] * len(saturdays) + day_codes
+    matrix = np.bincount(flat_index, weights=potential, minlength=len(shop_ids) * len(saturdays))
+    return np.asarray(shop_ids), matrix.reshape(len(shop_ids), len(saturdays))
+
+
+def _quantiles(samples, probabilities):
+    """Kwantielen langs de laatste as (lineair, zoals np.quantile) met één np.partition i.p.v. een sort."""
+    n = samples.shape[-1]
+    positions = np.asarray(probabilities, dtype=np.float64) * (n - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, n - 1)
+    partitioned = np.partition(samples, np.unique(np.concatenate([lower, upper])), axis=-1)
+    fraction = positions - lower
+    return partitioned[..., lower] * (1 - fraction) + partitioned[..., upper] * fraction
+
+
+def bootstrap_saturday_potential(saturday_matrix, n_draws=DEFAULT_BOOTSTRAP_DRAWS, confidence=DEFAULT_CONFIDENCE, seed=None):
+    """Bootstrap-intervallen voor de zaterdagpotentie per shop en voor het portfolio.
+
+    Elke trekking kiest de zaterdagen opnieuw, met teruglegging. Alle shops delen per
+    trekking dezelfde zaterdagen, zodat gedeelde effecten (feestdagen, weer) in het
+    portfolio-interval meetellen. Een trekking wordt een telvector per zaterdag
+    (index-array → bincount); de sommen voor alle trekkingen zijn dan één matrixproduct,
+    zonder Python-lus per trekking. De boost is lineair: schalen kan achteraf.
+    """
+    shop_ids, matrix = saturday_matrix
+    n_saturdays = matrix.shape[1]
+    rng = np.random.default_rng(seed)
+
+    with span("bootstrap", shops=len(shop_ids), draws=n_draws):
+        index = rng.integers(0, max(n_saturdays, 1), size=(n_draws, n_saturdays))
+        index += np.arange(n_draws)[:, np.newaxis] * n_saturdays
+        counts = np.bincount(index.ravel(), minlength=n_draws * n_saturdays).reshape(n_draws, n_saturdays)
+        counts = np.ascontiguousarray(counts.T, dtype=np.float64)  # (zaterdagen, trekkingen)
+
+        tail = (1.0 - confidence) / 2
+        bounds = np.empty((len(shop_ids), 2))
+        portfolio_samples = np.zeros(n_draws)
+        for start in range(0, len(shop_ids), BOOTSTRAP_BLOCK_SHOPS):
+            samples = matrix[start:start + BOOTSTRAP_BLOCK_SHOPS] @ counts  # (shops, trekkingen)
+            bounds[start:start + BOOTSTRAP_BLOCK_SHOPS] = _quantiles(samples, [tail, 1.0 - tail])
+            portfolio_samples += samples.sum(axis=0)
+        portfolio_low, portfolio_high = _quantiles(portfolio_samples, [tail, 1.0 - tail])
+
+    return {
+        "shop_ids": shop_ids,
+        "point": matrix.sum(axis=1),
+        "low": bounds[:, 0],
+        "high": bounds[:, 1],
+        "portfolio": (matrix.sum(), portfolio_low, portfolio_high),
+        "n_draws": n_draws,
+        "confidence": confidence,
+        "seed": seed,
+    }
+
+
+def simulate_intervals_from_bootstrap(bootstrap, conversion_boost_pct):
+    """Extra omzet met interval per shop (DataFrame) en voor het portfolio (punt, laag, hoog)."""
+    factor = conversion_boost_pct / 100.0
+    results = pd.DataFrame({
+        "shop_id": bootstrap["shop_ids"],
+        "extra_turnover": bootstrap["point"] * factor,
+        "extra_turnover_low": bootstrap["low"] * factor,
+        "extra_turnover_high": bootstrap["high"] * factor,
+    })
+    results["store_name"] = results["shop_id"].map(get_shop_registry().labels)
+    return results, tuple(value * factor for value in bootstrap["portfolio"])
+
+
+def simulate_conversion_boost_with_intervals(df, conversion_boost_pct, n_draws=DEFAULT_BOOTSTRAP_DRAWS,
+                                             confidence=DEFAULT_CONFIDENCE, seed=None):
+    bootstrap = bootstrap_saturday_potential(compute_saturday_matrix(df), n_draws, confidence, seed)
+    return simulate_intervals_from_bootstrap(bootstrap, conversion_boost_pct)
@@ -0,0 +1,74 @@
+# 🛬 Single-flight: identieke requests die tegelijk lopen delen één upstream call
+#
+# Streamlit draait elke sessie in een eigen thread. Vragen meerdere sessies tegelijk
+# hetzelfde op (bijv. het standaardportfolio), dan doet de eerste de call en wachten
+# de andere op diens resultaat (of fout) in plaats van een duplicaat te sturen.
+# Alleen lopende calls worden gedeeld; daarna is het de taak van de KPI-cache.
+import threading
+
+from perf_trace import span
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self.enabled = True
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """Voert func uit, of wacht op een lopende call met dezelfde key en deelt diens uitkomst."""
+        if not self.enabled:
+            return func(*args, **kwargs)
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            with span("single_flight_wait"):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Eerst uit de tabel halen, dan pas de wachters wekken: een nieuwe aanvraag
+            # na afloop start zo altijd een verse call
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return {"leaders": self.leaders, "shared": self.shared, "in_flight": len(self._calls)}
+
+    def reset_stats(self):
+        with self._lock:
+            self.leaders = 0
+            self.shared = 0
@@ -0,0 +1,268 @@
+# 🧩 Stage graph: memoisatie per pipelinestap, zodat een rerun alleen herberekent wat veranderde
+#
+# De pagina is een keten van stappen: fetch → normalize → zaterdagfilter →
+# groupby/merge (aggregaten) → simulatie per boost → tabel/grafieken. Elke stap krijgt
+# een key uit zijn naam, de functie en de content-hash van zijn inputs; het resultaat
+# van een stap draagt die key mee (`StageResult`), zodat een volgende stap niet opnieuw
+# de hele frame hoeft te hashen. Zelfde inputs = zelfde key = resultaat uit het geheugen.
+#
+# - Inputs: DataFrames/Series via `pd.util.hash_pandas_object`, arrays via hun bytes,
+#   de rest (getallen, strings, tuples, dicts, datums) via repr.
+# - Functies: naam, bytecode, constanten, defaults en closure-waarden; bij een
+#   `functools.partial` ook de gebonden args/keywords. Een andere functie of een ander
+#   gevangen argument geeft dus een andere key. Globals die de functie leest tellen niet
+#   mee: geef zulke parameters als input mee.
+# - Geheugen: LRU begrensd op bytes (geschat: `memory_usage(deep=True)`, `nbytes`,
+#   plotly-figuren via hun dict). Een resultaat groter dan het budget wordt niet bewaard.
+# - Tellers per stap (hits, misses, rekentijd, bytes) voor tuning, zie `stats()`.
+# - Process-breed, zoals de KPI-cache: sessies met dezelfde data delen hun stappen.
+#   Gelijktijdige misses op dezelfde key rekenen één keer (single-flight).
+#
+# Bewaarde resultaten worden gedeeld: stappen mogen hun inputs en outputs niet muteren.
+import functools
+import hashlib
+import sys
+import types
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from perf_trace import span
+from single_flight import SingleFlight
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class StageResult:
+    """Uitkomst van een stap plus de key waaronder hij is berekend."""
+
+    __slots__ = ("stage", "key", "value")
+
+    def __init__(self, stage, key, value):
+        self.stage = stage
+        self.key = key
+        self.value = value
+
+    def __repr__(self):
+        return f"StageResult({self.stage!r}, {self.key[:12]})"
+
+
+def content_hash(*values):
+    """Stabiele hash (hex) van de inhoud van values; een StageResult telt via zijn key."""
+    h = hashlib.blake2b(digest_size=16)
+    for value in values:
+        _update(h, value)
+    return h.hexdigest()
+
+
+def _update(h, value):
+    if isinstance(value, StageResult):
+        h.update(b"S" + value.key.encode())
+    elif isinstance(value, pd.DataFrame):
+        h.update(b"F" + repr((list(value.columns), [str(dtype) for dtype in value.dtypes], value.shape)).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        h.update(b"R" + repr((value.name, str(value.dtype), len(value))).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(b"A" + repr((str(value.dtype), value.shape)).encode())
+        if value.dtype == object:
+            h.update(repr(value.tolist()).encode())
+        else:
+            h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        h.update(b"D%d" % len(value))
+        for key in sorted(value, key=repr):
+            _update(h, key)
+            _update(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(b"L%d" % len(value))
+        for item in value:
+            _update(h, item)
+    elif callable(value) and not isinstance(value, type):
+        _update_callable(h, value)
+    else:
+        h.update(b"V" + repr(value).encode())
+
+
+def _update_callable(h, func):
+    # Niet via repr: daar staat het geheugenadres in, en Streamlit maakt bij elke rerun
+    # nieuwe functie-objecten voor lambdas in het paginascript
+    if isinstance(func, functools.partial):
+        h.update(b"P")
+        _update_callable(h, func.func)
+        _update(h, func.args)
+        _update(h, func.keywords)
+        return
+    h.update(b"C" + f"{getattr(func, '__module__', None)}.{getattr(func, '__qualname__', type(func).__qualname__)}".encode())
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return
+    _update_code(h, code)
+    _update(h, func.__defaults__ or ())
+    _update(h, func.__kwdefaults__ or {})
+    for cell in func.__closure__ or ():
+        try:
+            _update(h, cell.cell_contents)
+        except ValueError:  # lege cel
+            h.update(b"E")
+
+
+def _update_code(h, code):
+    h.update(code.co_code + repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _update_code(h, const)
+        else:
+            h.update(repr(const).encode())
+
+
+def estimate_bytes(value):
+    """Geschat geheugengebruik van een stapresultaat."""
+    if isinstance(value, StageResult):
+        return estimate_bytes(value.value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_bytes(key) + estimate_bytes(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(item) for item in value)
+    to_plotly_json = getattr(value, "to_plotly_json", None)
+    if to_plotly_json is not None:
+        return estimate_bytes(to_plotly_json())
+    return sys.getsizeof(value)
+
+
+class StageGraph:
+    """Memo per (stap, inputs) met een LRU-budget in bytes en tellers per stap."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries = OrderedDict()  # key -> (stage, value, bytes)
+        self._bytes = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def source(self, stage, value):
+        """Begin van de keten: een waarde van buiten (bijv. de opgehaalde frame) met zijn content-hash.
+
+        Wordt niet bewaard; het cachen van de fetch zelf is de taak van de KPI-cache.
+        """
+        return StageResult(stage, content_hash(stage, value), value)
+
+    def run(self, stage, func, *inputs):
+        """`func(*inputs)` voor deze stap, of het bewaarde resultaat bij dezelfde functie en inputs.
+
+        StageResult-inputs worden uitgepakt voor func; hun key telt mee in plaats van hun inhoud.
+        """
+        key = content_hash(stage, func, inputs)
+        with self._lock:
+            stats = self._stage_stats(stage)
+            entry = self._entries.get(key) if self.enabled else None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                stats["hits"] += 1
+                return StageResult(stage, key, entry[1])
+            stats["misses"] += 1
+
+        return StageResult(stage, key, self._flight.do(key, self._compute, stage, key, func, inputs))
+
+    def _compute(self, stage, key, func, inputs):
+        args = [item.value if isinstance(item, StageResult) else item for item in inputs]
+        start = time.perf_counter()
+        with span(f"stage:{stage}"):
+            value = func(*args)
+        seconds = time.perf_counter() - start
+        size = estimate_bytes(value)
+        with self._lock:
+            stats = self._stage_stats(stage)
+            stats["compute_ms"] += seconds * 1000
+            if self.enabled and size <= self.max_bytes:
+                self._store(key, stage, value, size)
+        return value
+
+    def _store(self, key, stage, value, size):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._forget(old)
+        self._entries[key] = (stage, value, size)
+        self._bytes += size
+        self._stats[stage]["bytes"] += size
+        self._stats[stage]["entries"] += 1
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._forget(evicted)
+            self._stats[evicted[0]]["evictions"] += 1
+
+    def _forget(self, entry):
+        stage, _, size = entry
+        self._bytes -= size
+        self._stats[stage]["bytes"] -= size
+        self._stats[stage]["entries"] -= 1
+
+    def _stage_stats(self, stage):
+        stats = self._stats.get(stage)
+        if stats is None:
+            stats = self._stats[stage] = {
+                "hits": 0, "misses": 0, "compute_ms": 0.0, "entries": 0, "bytes": 0, "evictions": 0,
+            }
+        return stats
+
+    def stats(self):
+        """Tellers per stap, in volgorde van eerste gebruik."""
+        with self._lock:
+            rows = []
+            for stage, stats in self._stats.items():
+                calls = stats["hits"] + stats["misses"]
+                rows.append({
+                    "stage": stage,
+                    **stats,
+                    "compute_ms": round(stats["compute_ms"], 2),
+                    "hit_rate": round(stats["hits"] / calls, 3) if calls else 0.0,
+                })
+            return rows
+
+    def reset_stats(self):
+        with self._lock:
+            for stats in self._stats.values():
+                stats.update(hits=0, misses=0, compute_ms=0.0, evictions=0)
+
+    def nbytes(self):
+        with self._lock:
+            return self._bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            for stats in self._stats.values():
+                stats.update(entries=0, bytes=0)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_default_graph = None
+_default_graph_lock = threading.Lock()
+
+
+def get_stage_graph(max_bytes=DEFAULT_MAX_BYTES):
+    """Process-brede stage graph; een nieuw budget geldt vanaf de volgende opslag."""
+    global _default_graph
+    with _default_graph_lock:
+        if _default_graph is None:
+            _default_graph = StageGraph(max_bytes)
+        else:
+            _default_graph.max_bytes = max_bytes
+        return _default_graph
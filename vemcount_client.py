@@ -0,0 +1,353 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from data_transformer import normalize_vemcount_response, normalize_vemcount_stream
+from circuit_breaker import get_circuit_breaker
+from perf_trace import record, run_in_context, span
+from single_flight import SingleFlight
+
+KPI_OUTPUTS = ["count_in", "conversion_rate", "turnover", "sales_per_transaction"]
+
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_TIMEOUT = (5, 60)  # (connect, read) in seconden, per chunk
+DEFAULT_RETRIES = 2  # extra pogingen per chunk bij timeouts, verbindingsfouten, 429 en 5xx
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 4.0
+
+
+class VemcountAPIError(Exception):
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CircuitOpenError(VemcountAPIError):
+    pass
+
+
+# Eén keep-alive sessie per poolgrootte; een sessie die al is uitgegeven wordt nooit
+# gesloten, want andere threads kunnen er nog requests over hebben lopen
+_sessions = {}
+_session_lock = threading.Lock()
+
+# Identieke chunk-requests die tegelijk lopen (bijv. meerdere sessies met het
+# standaardportfolio) delen één upstream call
+_single_flight = SingleFlight()
+
+
+def get_single_flight():
+    return _single_flight
+
+
+def _flight_key(kind, api_url, shop_ids, period, step, *extra):
+    return (kind, api_url, tuple(int(shop_id) for shop_id in shop_ids), period, step) + extra
+
+
+def get_session(pool_size=DEFAULT_MAX_IN_FLIGHT):
+    """Gedeelde keep-alive sessie met een pool van `pool_size` verbindingen (één per grootte)."""
+    with _session_lock:
+        session = _sessions.get(pool_size)
+        if session is None:
+            session = _sessions[pool_size] = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        return session
+
+
+def build_params(shop_ids, period="last_year", step="day"):
+    """`period` is een Vemcount-periode ("last_year", ...) of een (date_from, date_to)-tuple."""
+    params = [("data", shop_id) for shop_id in shop_ids]
+    params += [("data_output", output) for output in KPI_OUTPUTS]
+    params += [("source", "shops")]
+    if is_date_range(period):
+        date_from, date_to = period
+        params += [
+            ("period", "date"),
+            ("form_date_from", str(date_from)),
+            ("form_date_to", str(date_to)),
+        ]
+    else:
+        params += [("period", period)]
+    params += [("step", step)]
+    return params
+
+
+def is_date_range(period):
+    return isinstance(period, tuple)
+
+
+def normalize_date_range(period):
+    """(date_from, date_to) als `date`-objecten; strings in ISO-formaat zijn ook goed."""
+    date_from, date_to = (d if isinstance(d, date) else date.fromisoformat(str(d)[:10]) for d in period)
+    if date_from > date_to:
+        raise ValueError(f"date_from {date_from} is after date_to {date_to}")
+    return date_from, date_to
+
+
+def month_ranges(period):
+    """Splitst een datumbereik in kalendermaanden; de eerste en laatste maand kunnen korter zijn."""
+    date_from, date_to = normalize_date_range(period)
+    months = []
+    start = date_from
+    while start <= date_to:
+        next_month = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        end = min(date_to, next_month - timedelta(days=1))
+        months.append((start, end))
+        start = next_month
+    return months
+
+
+def response_period_key(period):
+    return "date" if is_date_range(period) else period
+
+
+def extract_period_data(full_response, period):
+    """Geeft het `data -> <period>`-deel; valt terug op de enige periode als de sleutel afwijkt."""
+    if "data" not in full_response:
+        raise VemcountAPIError("Response has no 'data' field")
+    data = full_response["data"] or {}
+    key = response_period_key(period)
+    if key in data:
+        return data[key]
+    if len(data) == 1:
+        return next(iter(data.values()))
+    if not data:
+        return {}
+    raise VemcountAPIError(f"Response has no '{key}' period (got: {', '.join(data)})")
+
+
+def chunk_shop_ids(shop_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+    shop_ids = list(shop_ids)
+    chunk_size = max(1, int(chunk_size))
+    return [shop_ids[i:i + chunk_size] for i in range(0, len(shop_ids), chunk_size)]
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_CAP_SECONDS):
+    """Exponentiële backoff met "full jitter", zodat sessies niet tegelijk opnieuw proberen."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def call_with_retries(api_url, retries, func, *args):
+    """Roept func aan via de circuit breaker van api_url, met retries voor tijdelijke fouten.
+
+    Staat de breaker open, dan faalt de call direct met `CircuitOpenError`. Niet-
+    herhaalbare fouten (bijv. 4xx) tellen niet als storing: upstream antwoordt immers.
+    """
+    breaker = get_circuit_breaker(api_url)
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Upstream unavailable (circuit open), retry in {breaker.retry_after():.0f}s")
+        try:
+            result = func(*args)
+        except VemcountAPIError as e:
+            if not e.retryable:
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            record("retry_backoff", delay, attempt=attempt + 1, error=str(e)[:200])
+            time.sleep(delay)
+        except BaseException:
+            # Onverwachte fout: ook die moet de breaker vrijgeven, anders blijft een
+            # half-open proef voor altijd "lopend" en faalt elke volgende call
+            breaker.record_failure()
+            raise
+        else:
+            breaker.record_success()
+            return result
+
+
+def _status_error(response):
+    retryable = response.status_code >= 500 or response.status_code == 429
+    return VemcountAPIError(f"{response.status_code} - {response.text}", retryable=retryable)
+
+
+def fetch_chunk(api_url, shop_ids, period="last_year", step="day", timeout=DEFAULT_TIMEOUT, session=None,
+                retries=DEFAULT_RETRIES):
+    key = _flight_key("raw", api_url, shop_ids, period, step)
+    return _single_flight.do(key, call_with_retries, api_url, retries, _fetch_chunk,
+                             api_url, shop_ids, period, step, timeout, session)
+
+
+def _fetch_chunk(api_url, shop_ids, period, step, timeout, session):
+    session = session or get_session()
+    with span("http_fetch", shops=len(shop_ids)) as fields:
+        start = time.perf_counter()
+        try:
+            response = session.post(api_url, params=build_params(shop_ids, period, step), timeout=timeout)
+        except requests.RequestException as e:
+            raise VemcountAPIError(f"API call exception: {e}", retryable=True) from e
+        # elapsed = tot en met de headers (connect + wachttijd), de rest is body-transfer
+        headers_ms = response.elapsed.total_seconds() * 1000
+        fields["bytes"] = len(response.content)
+        fields["connect_ttfb_ms"] = round(headers_ms, 2)
+        fields["transfer_ms"] = round((time.perf_counter() - start) * 1000 - headers_ms, 2)
+    if response.status_code != 200:
+        raise _status_error(response)
+    with span("json_decode", bytes=len(response.content)):
+        try:
+            full_response = response.json()
+        except ValueError as e:
+            # Bijv. een HTML-foutpagina van een proxy met status 200
+            raise VemcountAPIError(f"Invalid JSON in API response: {e}", retryable=True) from e
+    return extract_period_data(full_response, period)
+
+
+def fetch_report(api_url, shop_ids, period="last_year", step="day",
+                 chunk_size=DEFAULT_CHUNK_SIZE, max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES):
+    """Haalt shops in chunks tegelijk op en voegt de `data -> <period>`-delen samen.
+
+    Het resultaat heeft dezelfde vorm als één volledige response en kan direct naar
+    `normalize_vemcount_response`. Eén mislukte chunk laat de hele fetch mislukken.
+    """
+    chunks = chunk_shop_ids(shop_ids, chunk_size)
+    if not chunks:
+        return {}
+    session = get_session(max_in_flight)
+
+    merged = {}
+    if len(chunks) == 1:
+        merged.update(fetch_chunk(api_url, chunks[0], period, step, timeout, session, retries))
+        return merged
+
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(chunks))) as pool:
+        futures = [
+            run_in_context(pool, fetch_chunk, api_url, chunk, period, step, timeout, session, retries) for chunk in chunks
+        ]
+        # In chunk-volgorde samenvoegen, zodat de shopvolgorde gelijk blijft aan de request
+        for future in futures:
+            merged.update(future.result())
+    return merged
+
+
+def fetch_chunk_frame(api_url, shop_ids, period="last_year", step="day", timeout=DEFAULT_TIMEOUT, session=None,
+                      compact=False, retries=DEFAULT_RETRIES):
+    """Zoals `fetch_chunk`, maar parseert de body terwijl hij binnenkomt (zie `normalize_vemcount_stream`)."""
+    key = _flight_key("frame", api_url, shop_ids, period, step, compact)
+    return _single_flight.do(key, call_with_retries, api_url, retries, _fetch_chunk_frame,
+                             api_url, shop_ids, period, step, timeout, session, compact)
+
+
+def _fetch_chunk_frame(api_url, shop_ids, period, step, timeout, session, compact):
+    import ijson
+
+    session = session or get_session()
+    with span("http_fetch+stream_parse", shops=len(shop_ids)) as fields:
+        try:
+            response = session.post(api_url, params=build_params(shop_ids, period, step), timeout=timeout, stream=True)
+        except requests.RequestException as e:
+            raise VemcountAPIError(f"API call exception: {e}", retryable=True) from e
+        fields["connect_ttfb_ms"] = round(response.elapsed.total_seconds() * 1000, 2)
+        with response:
+            if response.status_code != 200:
+                raise _status_error(response)
+            response.raw.decode_content = True
+            stream_period = None if is_date_range(period) else period
+            try:
+                df = normalize_vemcount_stream(response.raw, period=stream_period, compact=compact)
+            except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+                # Verbinding halverwege de body verbroken of read-timeout
+                raise VemcountAPIError(f"API stream interrupted: {e}", retryable=True) from e
+            except (ijson.JSONError, ValueError) as e:
+                raise VemcountAPIError(f"Invalid JSON in API response: {e}", retryable=True) from e
+            fields["bytes"] = response.raw.tell()
+        fields["rows"] = len(df)
+    return df
+
+
+def fetch_report_frame(api_url, shop_ids, period="last_year", step="day", streaming=False, compact=False,
+                       chunk_size=DEFAULT_CHUNK_SIZE, max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=DEFAULT_TIMEOUT,
+                       retries=DEFAULT_RETRIES):
+    """Haalt shops op en geeft direct de genormaliseerde DataFrame terug.
+
+    Met `streaming=True` wordt elke chunk incrementeel geparsed en wordt de ruwe
+    JSON-boom nooit in het geheugen gehouden; anders via `fetch_report`. Met
+    `compact=True` krijgt de frame het compacte schema (zie `data_transformer.COMPACT_DTYPES`).
+    Een datumbereik over meerdere maanden gaat als parallelle maand-requests (zie
+    `fetch_monthly_frames`) en wordt ontdubbeld op (shop_id, date) samengevoegd.
+    """
+    if is_date_range(period) and len(month_ranges(period)) > 1:
+        months = month_ranges(period)
+        frames = fetch_monthly_frames(api_url, {month: shop_ids for month in months}, step, streaming, compact,
+                                      chunk_size, max_in_flight, timeout, retries)
+        return merge_monthly_frames([frames[month] for month in months], shop_ids)
+
+    if not streaming:
+        raw_data = fetch_report(api_url, shop_ids, period, step, chunk_size, max_in_flight, timeout, retries)
+        with span("normalize", shops=len(raw_data)) as fields:
+            df = normalize_vemcount_response(raw_data, compact=compact)
+            fields["rows"] = len(df)
+        return df
+
+    chunks = chunk_shop_ids(shop_ids, chunk_size)
+    if not chunks:
+        return pd.DataFrame()
+    session = get_session(max_in_flight)
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(chunks))) as pool:
+        futures = [
+            run_in_context(pool, fetch_chunk_frame, api_url, chunk, period, step, timeout, session, compact, retries)
+            for chunk in chunks
+        ]
+        frames = [future.result() for future in futures]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def _fetch_chunk_normalized(api_url, shop_ids, period, step, timeout, session, compact, retries):
+    raw_data = fetch_chunk(api_url, shop_ids, period, step, timeout, session, retries)
+    return normalize_vemcount_response(raw_data, compact=compact)
+
+
+def fetch_monthly_frames(api_url, shops_by_month, step="day", streaming=False, compact=False,
+                         chunk_size=DEFAULT_CHUNK_SIZE, max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=DEFAULT_TIMEOUT,
+                         retries=DEFAULT_RETRIES):
+    """Haalt per maand (een (date_from, date_to)-tuple) de opgegeven shops op.
+
+    Alle (maand, chunk)-requests delen één pool van `max_in_flight`; het resultaat
+    is een DataFrame per maand, zodat de aanroeper elke maand apart kan cachen.
+    """
+    jobs = [(month, chunk) for month, shop_ids in shops_by_month.items() for chunk in chunk_shop_ids(shop_ids, chunk_size)]
+    frames = {month: [] for month in shops_by_month}
+    if jobs:
+        session = get_session(max_in_flight)
+        fetch = fetch_chunk_frame if streaming else _fetch_chunk_normalized
+        with span("monthly_fetch", months=len(shops_by_month), requests=len(jobs)):
+            with ThreadPoolExecutor(max_workers=min(max_in_flight, len(jobs))) as pool:
+                futures = [
+                    (month, run_in_context(pool, fetch, api_url, chunk, month, step, timeout, session, compact, retries))
+                    for month, chunk in jobs
+                ]
+                for month, future in futures:
+                    frames[month].append(future.result())
+    result = {}
+    for month, month_frames in frames.items():
+        month_frames = [frame for frame in month_frames if not frame.empty]
+        result[month] = pd.concat(month_frames, ignore_index=True) if month_frames else pd.DataFrame()
+    return result
+
+
+def merge_monthly_frames(frames, shop_ids):
+    """Voegt maandframes samen: ontdubbeld op (shop_id, date), per shop in requestvolgorde en op datum."""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True).drop_duplicates(["shop_id", "date"], keep="first")
+    position = {int(shop_id): i for i, shop_id in enumerate(shop_ids)}
+    order = df["shop_id"].astype("int64").map(position).fillna(len(position))
+    df = df.assign(_order=order.to_numpy()).sort_values(["_order", "date"], kind="stable")
+    return df.drop(columns="_order").reset_index(drop=True)